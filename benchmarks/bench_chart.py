@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import random
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import matplotlib.gridspec as gridspec
+import mplfinance as mpf
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.ticker import MaxNLocator
+from components.chart_model import CandleChart
+from config import *
+
+
+FRAMES = 200
+STEP_MS = 3_600_000
+
+
+def make_rows(n=60, seed=1):
+    rnd = random.Random(seed)
+    rows, price = [], 60000.0
+    for i in range(n):
+        o = price
+        c = o * (1 + rnd.uniform(-0.01, 0.01))
+        h = max(o, c) * (1 + rnd.uniform(0, 0.004))
+        l = min(o, c) * (1 - rnd.uniform(0, 0.004))
+        rows.append([1_700_000_000_000 + i * STEP_MS, o, h, l, c, rnd.uniform(50, 500)])
+        price = c
+    return rows
+
+
+def tick(rows, rnd):
+    last = list(rows[-1])
+    last[4] = last[1] * (1 + rnd.uniform(-0.002, 0.002))
+    last[2] = max(last[2], last[4])
+    last[3] = min(last[3], last[4])
+    last[5] += rnd.uniform(0, 2)
+    rows[-1] = last
+
+
+def make_figure():
+    fig = plt.Figure(figsize=(12, 6), dpi=100, facecolor=COLOR_BG_MAIN)
+    gs = gridspec.GridSpec(2, 1, height_ratios=[4, 1], figure=fig)
+    ax1 = fig.add_subplot(gs[0])
+    ax2 = fig.add_subplot(gs[1], sharex=ax1)
+    fig.subplots_adjust(left=0.02, right=0.88, top=0.98, bottom=0.04, hspace=0.05)
+    return fig, ax1, ax2, FigureCanvasAgg(fig)
+
+
+def legacy_frame(fig, ax1, ax2, canvas, rows):
+    df = pd.DataFrame(rows, columns=['ts', 'open', 'high', 'low', 'close', 'volume'])
+    df['ts'] = pd.to_datetime(df['ts'], unit='ms')
+    df.set_index('ts', inplace=True)
+
+    ax1.clear()
+    ax2.clear()
+    ma20 = df['close'].rolling(20).mean()
+    ma50 = df['close'].rolling(50).mean()
+    ax1.yaxis.set_major_locator(MaxNLocator(nbins=6, prune='lower'))
+    ax2.yaxis.set_major_locator(MaxNLocator(nbins=3, prune='upper'))
+    mc = mpf.make_marketcolors(
+        up=COLOR_GREEN, down=COLOR_RED, edge='inherit', wick='inherit',
+        volume={'up': "#2e845c", 'down': "#992935"}, alpha=1.0,
+    )
+    s = mpf.make_mpf_style(
+        marketcolors=mc, facecolor=COLOR_BG_MAIN, gridcolor='#333333', gridstyle='dotted',
+        rc={'axes.facecolor': COLOR_BG_MAIN, 'figure.facecolor': COLOR_BG_MAIN, 'font.size': 8}
+    )
+    mpf.plot(df, type='candle', style=s, mav=(20, 50), mavcolors=['#00e5ff', '#ff9900'],
+             ax=ax1, volume=ax2, xrotation=0, datetime_format='%H:%M',
+             ylabel="", ylabel_lower="", scale_width_adjustment=dict(volume=0.5))
+    ax1.text(0.01, 0.94, f"MA(20): {ma20.iloc[-1]:,.2f}", transform=ax1.transAxes)
+    ax1.text(0.01, 0.89, f"MA(50): {ma50.iloc[-1]:,.2f}", transform=ax1.transAxes)
+    last_price = df['close'].iloc[-1]
+    ax1.axhline(last_price, linestyle='--', linewidth=0.8)
+    ax1.text(1.005, last_price, f"{last_price:,.2f}", transform=ax1.get_yaxis_transform(), clip_on=False)
+    canvas.draw()
+
+
+def run(label, frame_fn):
+    rnd = random.Random(7)
+    rows = make_rows()
+    frame_fn(rows)
+    times = []
+    for _ in range(FRAMES):
+        tick(rows, rnd)
+        t0 = time.perf_counter()
+        frame_fn(rows)
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    print(f"{label:<12} mean {statistics.mean(times):7.2f} ms   "
+          f"p50 {times[len(times) // 2]:7.2f} ms   p95 {times[int(len(times) * 0.95)]:7.2f} ms")
+    return times
+
+
+def main():
+    fig, ax1, ax2, canvas = make_figure()
+    legacy = run("legacy", lambda rows: legacy_frame(fig, ax1, ax2, canvas, rows))
+
+    fig, ax1, ax2, canvas = make_figure()
+    chart = CandleChart(fig, ax1, ax2, canvas)
+    incremental = run("incremental", lambda rows: chart.update(("BTCUSDT", "1h"), rows))
+
+    print(f"speedup      {statistics.mean(legacy) / statistics.mean(incremental):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.decoders import JSON_BACKEND, MessageDecoder
+
+
+SECONDS = 2.0
+
+
+def make_messages(n=3000, seed=3):
+    rnd = random.Random(seed)
+    msgs = []
+    for i in range(n):
+        price = 60000 + rnd.uniform(-50, 50)
+        kind = i % 3
+        if kind == 0:
+            msgs.append(json.dumps({"stream": "btcusdt@aggTrade", "data": {
+                "e": "aggTrade", "E": 1700000000000 + i, "s": "BTCUSDT", "a": i, "p": f"{price:.2f}",
+                "q": f"{rnd.uniform(0.001, 2):.5f}", "f": i, "l": i, "T": 1700000000000 + i,
+                "m": rnd.random() < 0.5, "M": True}}))
+        elif kind == 1:
+            levels = lambda: [[f"{price + rnd.uniform(-20, 20):.2f}", f"{rnd.uniform(0, 5):.5f}"]
+                              for _ in range(rnd.randint(5, 30))]
+            msgs.append(json.dumps({"stream": "btcusdt@depth@100ms", "data": {
+                "e": "depthUpdate", "E": 1700000000000 + i, "s": "BTCUSDT", "U": i * 10, "u": i * 10 + 9,
+                "b": levels(), "a": levels()}}))
+        else:
+            msgs.append(json.dumps({"stream": "btcusdt@ticker", "data": {
+                "e": "24hrTicker", "E": 1700000000000 + i, "s": "BTCUSDT", "p": "120.00", "P": "0.20",
+                "w": f"{price:.2f}", "x": f"{price:.2f}", "c": f"{price:.2f}", "Q": "0.1", "b": f"{price:.2f}",
+                "B": "1.0", "a": f"{price:.2f}", "A": "1.0", "o": f"{price:.2f}", "h": f"{price + 500:.2f}",
+                "l": f"{price - 500:.2f}", "v": "12345.6", "q": "740000000.0", "O": 0, "C": 0,
+                "F": 0, "L": 0, "n": 1000}}))
+    return msgs
+
+
+def legacy_path(message):
+    payload = json.loads(message)
+    stream, data = payload['stream'], payload['data']
+    if 'ticker' in stream:
+        info = {'lastPrice': data['c'], 'priceChangePercent': data['P'], 'highPrice': data['h'],
+                'lowPrice': data['l'], 'volume': data['v'], 'quoteVolume': data['q']}
+        return (float(info['lastPrice']), float(info['priceChangePercent']), float(info['highPrice']),
+                float(info['lowPrice']), float(info['quoteVolume']))
+    if 'depth' in stream:
+        return ([(float(p), float(q)) for p, q in data['b']],
+                [(float(p), float(q)) for p, q in data['a']])
+    return float(data['p']), float(data['q']), data['m']
+
+
+def run(label, fn, msgs):
+    count = 0
+    t0 = time.perf_counter()
+    deadline = t0 + SECONDS
+    while time.perf_counter() < deadline:
+        for m in msgs:
+            fn(m)
+        count += len(msgs)
+    rate = count / (time.perf_counter() - t0)
+    print(f"{label:<22} {rate:12,.0f} msg/s")
+    return rate
+
+
+def main():
+    msgs = make_messages()
+    legacy = run("legacy json + float()", legacy_path, msgs)
+    run("decoder (json)", MessageDecoder(loads=json.loads).decode, msgs)
+    fast = run(f"decoder ({JSON_BACKEND})", MessageDecoder().decode, msgs)
+    print(f"speedup                {fast / legacy:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
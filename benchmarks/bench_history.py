@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import random
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+from bench_chart import make_figure, tick
+from components.chart_model import CandleChart
+
+
+FRAMES = 100
+STEP_MS = 60_000
+SIZES = (60, 5_000, 50_000, 500_000)
+
+
+def make_history(n, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 60000 * np.cumprod(1 + rng.uniform(-0.002, 0.002, n))
+    open_ = np.concatenate([[60000.0], close[:-1]])
+    rows = np.empty((n, 6))
+    rows[:, 0] = 1_600_000_000_000 + np.arange(n) * STEP_MS
+    rows[:, 1] = open_
+    rows[:, 2] = np.maximum(open_, close) * (1 + rng.uniform(0, 0.001, n))
+    rows[:, 3] = np.minimum(open_, close) * (1 - rng.uniform(0, 0.001, n))
+    rows[:, 4] = close
+    rows[:, 5] = rng.uniform(1, 50, n)
+    return rows
+
+
+def timed(fn):
+    times = []
+    for _ in range(FRAMES):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.mean(times)
+
+
+def main():
+    print(f"{'candles':>9} {'tick ms':>9} {'pan ms':>9} {'full-zoom ms':>13}")
+    for n in SIZES:
+        rows = make_history(n)
+        fig, ax1, ax2, canvas = make_figure()
+        chart = CandleChart(fig, ax1, ax2, canvas)
+        key = ("BTCUSDT", "1m")
+        live = rows[-60:].tolist()
+        chart.update(key, live)
+        chart.load_history(key, rows[:-60])
+
+        rnd = random.Random(1)
+
+        def on_tick():
+            tick(live, rnd)
+            chart.update(key, live)
+
+        def on_pan():
+            shift = rnd.uniform(-5, 5)
+            chart._set_view(chart.lo + shift, chart.hi + shift)
+            chart._render_view()
+            chart._rescale()
+            canvas.draw()
+
+        def on_full():
+            chart._set_view(0, len(chart.history))
+            chart._render_view()
+            chart._rescale()
+            canvas.draw()
+
+        tick_ms = timed(on_tick)
+        chart._set_view(n / 2, n / 2 + 60)
+        pan_ms = timed(on_pan)
+        full_ms = timed(on_full)
+        print(f"{len(chart.history):>9} {tick_ms:>9.2f} {pan_ms:>9.2f} {full_ms:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
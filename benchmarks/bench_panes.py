@@ -0,0 +1,156 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from mock_exchange import MockExchange
+from components.chart_model import CandleChart
+from config import *
+from utils.binance_api import BinanceAPI, BinanceStream
+from utils.candle_store import CandleStore
+from utils.render_scheduler import RenderScheduler
+from utils.workspace import Workspace
+
+
+COINS = ["BTC", "ETH", "SOL", "BNB", "XRP", "DOGE"]
+LAYOUTS = {1: (1, 1), 4: (2, 2), 9: (3, 3)}
+
+
+class _Root:
+    # The scheduler only needs after(); frames are driven by the benchmark.
+    def after(self, ms, fn):
+        pass
+
+
+def make_chart(rows, cols):
+    fig = Figure(figsize=(16 / cols, 9 / rows), dpi=100, facecolor=COLOR_BG_MAIN)
+    gs = fig.add_gridspec(2, 1, height_ratios=[4, 1])
+    ax1 = fig.add_subplot(gs[0])
+    ax2 = fig.add_subplot(gs[1], sharex=ax1)
+    fig.subplots_adjust(left=0.02, right=0.88, top=0.98, bottom=0.04, hspace=0.05)
+    return CandleChart(fig, ax1, ax2, FigureCanvasAgg(fig))
+
+
+def pane_specs(n):
+    # Wraps onto a second interval once every coin is taken, so larger grids
+    # share depth/ticker feeds between panes.
+    return [(f"{COINS[i % len(COINS)]}USDT", ("1m", "15m")[i // len(COINS) % 2]) for i in range(n)]
+
+
+def run(exchange, n, budget_ms, seconds):
+    rows, cols = LAYOUTS.get(n, (1, n))
+    sockets_before = exchange.counters['ws_connections']
+    ws = Workspace()
+    panes = [ws.open_pane(pair, interval) for pair, interval in pane_specs(n)]
+    charts = [make_chart(rows, cols) for _ in panes]
+
+    scheduler = RenderScheduler(_Root(), RENDER_FPS, tracer=ws.tracer, budget_ms=budget_ms)
+    for i, (pane, chart) in enumerate(zip(panes, charts)):
+        def render_chart(candles, pane=pane, chart=chart):
+            if candles is pane.candles and len(candles):
+                chart.update((candles.pair, candles.interval), candles.snapshot())
+
+        def render_heatmap(feed, pane=pane, chart=chart):
+            if feed is pane.feed:
+                chart.update_heatmap(feed.heatmap)
+
+        scheduler.register(pane.key('kline'), render_chart)
+        scheduler.register(pane.key('depth'), render_heatmap)
+
+    def route(topic, payload):
+        for pane in panes:
+            if pane.shows(topic, payload):
+                scheduler.push(pane.key(topic), payload)
+
+    ws.subscribe('kline', lambda candles: route('kline', candles))
+    ws.subscribe('depth', lambda feed: route('depth', feed))
+    ws.start()
+
+    deadline = time.time() + 10
+    while time.time() < deadline and not all(len(p.candles) for p in panes):
+        time.sleep(0.05)
+
+    scheduler.is_running = True
+    scheduler._frame()
+    scheduler.counters = {k: dict.fromkeys(v, 0) for k, v in scheduler.counters.items()}
+    frame_s = scheduler.frame_ms / 1000
+    times = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        t0 = time.perf_counter()
+        scheduler._frame()
+        elapsed = time.perf_counter() - t0
+        times.append(elapsed * 1000)
+        time.sleep(max(frame_s - elapsed, 0.001))
+
+    snap = ws.snapshot()
+    ws.stop()
+
+    stats = scheduler.stats()['streams']
+    refresh = [stats[p.key('kline')]['rendered'] / seconds for p in panes]
+    totals = [ws.tracer.summary('total', p.key('kline')) for p in panes]
+    totals = [s['p99_ms'] for s in totals if s]
+    times.sort()
+    return {
+        'panes': n,
+        'budget_ms': budget_ms,
+        'feeds': snap['feeds'],
+        'series': snap['series'],
+        'streams': len(snap['streams']),
+        'sockets': exchange.counters['ws_connections'] - sockets_before,
+        'frames': len(times),
+        'frame_mean_ms': statistics.mean(times),
+        'frame_p95_ms': times[int(len(times) * 0.95)],
+        'frame_max_ms': times[-1],
+        'pane_hz_min': min(refresh),
+        'pane_hz_mean': statistics.mean(refresh),
+        'deferred': sum(v['deferred'] for v in stats.values()),
+        'kline_p99_ms': max(totals) if totals else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame time as chart panes are added to one workspace.")
+    parser.add_argument("--panes", type=int, nargs="+", default=[1, 4, 9])
+    parser.add_argument("--seconds", type=float, default=5.0, help="measured seconds per run")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    exchange = MockExchange().start()
+    BinanceAPI.BASE_URL = exchange.rest_url
+    BinanceStream.STREAM_URL = exchange.stream_url
+    cache_dir = tempfile.TemporaryDirectory()
+    BinanceAPI.store = CandleStore(cache_dir.name, CANDLE_CACHE_MAX_BYTES, CANDLE_CACHE_MAX_ROWS)
+
+    results = []
+    print(f"{'panes':>5} {'budget':>7} {'streams':>7} {'sockets':>7} {'mean ms':>8} {'p95 ms':>8} "
+          f"{'max ms':>8} {'pane Hz':>8} {'min Hz':>7} {'deferred':>8} {'p99 lag':>8}")
+    for n in args.panes:
+        for budget in (None, RENDER_BUDGET_MS):
+            r = run(exchange, n, budget, args.seconds)
+            results.append(r)
+            print(f"{r['panes']:>5} {str(r['budget_ms'] or '-'):>7} {r['streams']:>7} {r['sockets']:>7} "
+                  f"{r['frame_mean_ms']:>8.2f} {r['frame_p95_ms']:>8.2f} {r['frame_max_ms']:>8.2f} "
+                  f"{r['pane_hz_mean']:>8.1f} {r['pane_hz_min']:>7.1f} {r['deferred']:>8} "
+                  f"{r['kline_p99_ms'] or 0:>8.0f}")
+
+    BinanceAPI.http.close()
+    exchange.stop()
+    cache_dir.cleanup()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Each run is a fresh interpreter so imports, font loading and the first
+# REST round trips are all paid again, as on a real cold start.
+TIMEOUT = 30
+
+
+def child_gui(started):
+    events = {}
+
+    def mark(name):
+        events.setdefault(name, (time.time() - started) * 1000)
+
+    import main
+    mark('imported')
+    app = main.CryptoTerminal()
+    mark('constructed')
+
+    update_data = app.top_nav.update_data
+
+    def on_price(ticker):
+        mark('first_price')
+        update_data(ticker)
+
+    app.top_nav.update_data = on_price
+
+    def poll():
+        if app.winfo_ismapped():
+            app.update_idletasks()
+            mark('first_frame')
+        if app.chart_panel is not None:
+            mark('chart_ready')
+        if len(events) == 5 or time.time() - started > TIMEOUT:
+            app.on_close()
+            return
+        app.after(1, poll)
+
+    app.after(1, poll)
+    app.mainloop()
+    return events
+
+
+def child_engine(started):
+    import threading
+    events = {}
+
+    def mark(name):
+        events.setdefault(name, (time.time() - started) * 1000)
+
+    from config import DEFAULT_PAIR, DEFAULT_INTERVAL, DEFAULT_COINS
+    from utils.market_engine import MarketEngine
+    mark('imported')
+    engine = MarketEngine(DEFAULT_PAIR, DEFAULT_INTERVAL, DEFAULT_COINS)
+    done = threading.Event()
+
+    def on_ticker(ticker):
+        if ticker.symbol == DEFAULT_PAIR:
+            mark('first_price')
+            done.set()
+
+    def on_kline(candles):
+        if candles.snapshot():
+            mark('first_candles')
+
+    engine.subscribe('ticker', on_ticker)
+    engine.subscribe('kline', on_kline)
+    engine.start()
+    done.wait(TIMEOUT)
+    engine.stop()
+    return events
+
+
+def run_child(mode, env):
+    started = time.time()
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, "--started", repr(started)],
+                          cwd=ROOT, env=env, capture_output=True, text=True, timeout=TIMEOUT * 2)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    return {'error': (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def summarise(runs):
+    names = sorted({k for r in runs for k in r}, key=lambda k: statistics.median(r[k] for r in runs if k in r))
+    return {k: {'median_ms': statistics.median(r[k] for r in runs if k in r),
+                'min_ms': min(r[k] for r in runs if k in r)} for k in names}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time to first frame and first price.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mode", choices=("gui", "engine"), help="only run one mode")
+    parser.add_argument("--live", action="store_true", help="use the real Binance endpoints instead of the mock")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--started", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        try:
+            events = child_gui(args.started) if args.child == "gui" else child_engine(args.started)
+        except Exception as e:
+            events = {'error': str(e)}
+        print(json.dumps(events))
+        return
+
+    exchange = None
+    env = dict(os.environ)
+    if not args.live:
+        from mock_exchange import MockExchange
+        exchange = MockExchange().start()
+        env["BINANCE_REST_URL"] = exchange.rest_url
+        env["BINANCE_STREAM_URL"] = exchange.stream_url
+
+    results = {}
+    try:
+        for mode in ([args.mode] if args.mode else ("engine", "gui")):
+            runs = []
+            for _ in range(args.runs):
+                events = run_child(mode, env)
+                if 'error' in events:
+                    results[mode] = {'skipped': events['error']}
+                    break
+                runs.append(events)
+            else:
+                results[mode] = summarise(runs)
+    finally:
+        if exchange:
+            exchange.stop()
+
+    for mode, r in results.items():
+        print(f"\n{mode} ({args.runs} cold starts)")
+        if 'skipped' in r:
+            print(f"  skipped ({r['skipped']})")
+            continue
+        for name, s in r.items():
+            print(f"  {name:<15} median {s['median_ms']:8.1f} ms  min {s['min_ms']:8.1f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import random
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import customtkinter as ctk
+from components.depth_ladder import DepthLadder
+from utils.order_book import BookSide
+from config import *
+
+
+UPDATES = 500
+
+
+class SyntheticBook:
+    def __init__(self, seed=5, mid=60000.0):
+        self.rnd = random.Random(seed)
+        self.mid = mid
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        for i in range(1, 200):
+            self.bids.update(mid - i * 0.5, self.rnd.uniform(0.01, 5))
+            self.asks.update(mid + i * 0.5, self.rnd.uniform(0.01, 5))
+
+    def step(self):
+        # A typical 100ms diff touches a handful of levels, mostly near the top.
+        for _ in range(self.rnd.randint(3, 12)):
+            side, sign = (self.bids, -1) if self.rnd.random() < 0.5 else (self.asks, 1)
+            price = self.mid + sign * self.rnd.randint(1, 40) * 0.5
+            qty = 0.0 if self.rnd.random() < 0.2 else self.rnd.uniform(0.01, 5)
+            side.update(price, qty)
+
+    def top(self, n):
+        return self.bids.top(n), self.asks.top(n)
+
+    def cumulative(self, n):
+        return self.bids.cumulative(n), self.asks.cumulative(n)
+
+
+def legacy_widget(parent, levels):
+    rows = []
+    for _ in range(2 * levels):
+        c = ctk.CTkCanvas(parent, height=20, bg=COLOR_BG_PANEL, highlightthickness=0)
+        c.pack(fill="x", padx=5, pady=1)
+        rows.append(c)
+    return rows
+
+
+def legacy_update(rows, book, levels):
+    bids, asks = book.top(2 * levels)
+    bid_depth, ask_depth = book.cumulative(2 * levels)
+    max_vol = max(bid_depth[-1], ask_depth[-1]) if bid_depth[-1] > 0 else 1.0
+    display_data = [(p, q, False) for p, q in asks[:levels][::-1]] + \
+                   [(p, q, True) for p, q in bids[:levels]]
+
+    for i, canvas in enumerate(rows):
+        canvas.delete("all")
+        if i < len(display_data):
+            p, q, is_bid = display_data[i]
+            w = canvas.winfo_width()
+            h = canvas.winfo_height()
+            bar_w = (q / max_vol) * w * 0.8
+            canvas.create_rectangle(w - bar_w, 0, w, h, fill="#0f2e22" if is_bid else "#38141a", outline="")
+            canvas.create_text(5, h/2, anchor="w", text=f"{p:,.2f}",
+                               fill=COLOR_GREEN if is_bid else COLOR_RED, font=("Consolas", 10, "bold"))
+            canvas.create_text(w-5, h/2, anchor="e", text=f"{q:.4f}",
+                               fill=COLOR_TEXT_MAIN, font=("Consolas", 10))
+
+
+def retained_update(ladder, book, levels):
+    bids, asks = book.top(levels)
+    bid_depth, ask_depth = book.cumulative(levels)
+    max_vol = max(bid_depth[-1], ask_depth[-1]) if bid_depth[-1] > 0 else 1.0
+    ladder.set_book(bids, asks, max_vol)
+
+
+def run(root, label, update_fn):
+    book = SyntheticBook()
+    update_fn(book)
+    root.update()
+    times = []
+    for _ in range(UPDATES):
+        book.step()
+        t0 = time.perf_counter()
+        update_fn(book)
+        root.update_idletasks()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    print(f"{label:<20} mean {statistics.mean(times):6.3f} ms   "
+          f"p50 {times[len(times) // 2]:6.3f} ms   p95 {times[int(len(times) * 0.95)]:6.3f} ms")
+    return statistics.mean(times)
+
+
+def main():
+    root = ctk.CTk()
+    root.geometry("320x1400")
+
+    for levels in (5, 10, 25):
+        frame = ctk.CTkFrame(root)
+        frame.pack(fill="both", expand=True)
+        rows = legacy_widget(frame, levels)
+        legacy = run(root, f"legacy   x{levels}", lambda b: legacy_update(rows, b, levels))
+        frame.destroy()
+
+        frame = ctk.CTkFrame(root)
+        frame.pack(fill="both", expand=True)
+        ladder = DepthLadder(frame, levels)
+        ladder.pack(fill="x", padx=5, pady=1)
+        retained = run(root, f"retained x{levels}", lambda b: retained_update(ladder, b, levels))
+        frame.destroy()
+
+        print(f"speedup  x{levels:<11} {legacy / retained:.1f}x")
+
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+import os
+import sys
+import json
+import math
+import time
+import base64
+import random
+import struct
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.candle_buffer import INTERVAL_MS
+
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+BASE_PRICES = {"BTCUSDT": 60000.0, "ETHUSDT": 3000.0, "BNBUSDT": 600.0, "SOLUSDT": 150.0,
+               "XRPUSDT": 0.6, "DOGEUSDT": 0.15}
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that exit with keep-alive sockets open (cold-start runs) are not errors.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _fmt(x):
+    return f"{x:.8f}".rstrip("0").rstrip(".")
+
+
+class SymbolState:
+    def __init__(self, symbol, seed):
+        self.symbol = symbol
+        self.base = BASE_PRICES.get(symbol, 100.0)
+        self.price = self.base
+        self.rnd = random.Random(seed)
+        self.update_id = 1_000_000
+        self.trade_id = 0
+        self.lock = threading.Lock()
+
+    def tick(self):
+        self.price *= 1 + self.rnd.uniform(-0.0005, 0.0005)
+        return self.price
+
+    def level_price(self, side, i):
+        tick = self.base * 1e-5
+        return self.price - (i + 1) * tick if side == "b" else self.price + (i + 1) * tick
+
+    def candle_close(self, ts, step):
+        # Deterministic so repeated REST calls agree with each other.
+        return self.base * (1 + 0.02 * math.sin(ts / (step * 37.0)) + 0.005 * math.sin(ts / (step * 3.1)))
+
+
+class MockExchange:
+    def __init__(self, host="127.0.0.1", port=0, rate=200, depth_levels=20):
+        self.rate = rate
+        self.depth_levels = depth_levels
+        self.symbols = {}
+        self.lock = threading.Lock()
+        self.counters = {'rest': 0, 'ws_sent': 0, 'ws_connections': 0}
+
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.headers.get("Upgrade", "").lower() == "websocket":
+                    exchange._serve_ws(self)
+                else:
+                    exchange._serve_rest(self)
+
+        self.server = _Server((host, port), Handler)
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+        self.thread = None
+
+    @property
+    def rest_url(self):
+        return f"http://{self.host}:{self.port}/api/v3"
+
+    @property
+    def stream_url(self):
+        return f"ws://{self.host}:{self.port}/stream"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def state(self, symbol):
+        symbol = symbol.upper()
+        with self.lock:
+            st = self.symbols.get(symbol)
+            if st is None:
+                st = self.symbols[symbol] = SymbolState(symbol, len(self.symbols) + 1)
+            return st
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.counters[key] += n
+
+    # REST
+
+    def _serve_rest(self, req):
+        url = urlparse(req.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self._count('rest')
+        try:
+            if url.path == "/api/v3/klines":
+                body, weight = self._klines(q), 2
+            elif url.path == "/api/v3/ticker/price":
+                body, weight = [{"symbol": s, "price": _fmt(st.price)} for s, st in list(self.symbols.items())], 4
+            elif url.path == "/api/v3/depth":
+                body, weight = self._depth(q), 50
+            else:
+                return self._reply(req, 404, {"code": -1, "msg": "not found"})
+        except (KeyError, ValueError) as e:
+            return self._reply(req, 400, {"code": -1100, "msg": str(e)})
+        self._reply(req, 200, body, {"X-MBX-USED-WEIGHT-1m": str(weight)})
+
+    def _reply(self, req, status, body, headers=None):
+        data = json.dumps(body).encode()
+        req.send_response(status)
+        req.send_header("Content-Type", "application/json")
+        req.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            req.send_header(k, v)
+        req.end_headers()
+        req.wfile.write(data)
+
+    def _klines(self, q):
+        st = self.state(q["symbol"])
+        step = INTERVAL_MS[q["interval"]]
+        limit = min(int(q.get("limit", 500)), 1000)
+        now = int(time.time() * 1000)
+        end = min(int(q.get("endTime", now)), now)
+        start = int(q["startTime"]) if "startTime" in q else end - (limit - 1) * step
+        t = -(-start // step) * step
+        rows = []
+        while t <= end and len(rows) < limit:
+            o = st.candle_close(t - step, step)
+            c = st.candle_close(t, step)
+            h, l = max(o, c) * 1.001, min(o, c) * 0.999
+            rows.append([t, _fmt(o), _fmt(h), _fmt(l), _fmt(c), "123.4", t + step - 1,
+                         "0", 100, "0", "0", "0"])
+            t += step
+        return rows
+
+    def _depth(self, q):
+        st = self.state(q["symbol"])
+        limit = min(int(q.get("limit", 100)), 5000)
+        with st.lock:
+            return {"lastUpdateId": st.update_id,
+                    "bids": [[_fmt(st.level_price("b", i)), "1.5"] for i in range(limit)],
+                    "asks": [[_fmt(st.level_price("a", i)), "1.5"] for i in range(limit)]}
+
+    # WebSocket
+
+    def _serve_ws(self, req):
+        key = req.headers["Sec-WebSocket-Key"]
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        req.send_response(101, "Switching Protocols")
+        req.send_header("Upgrade", "websocket")
+        req.send_header("Connection", "Upgrade")
+        req.send_header("Sec-WebSocket-Accept", accept)
+        req.end_headers()
+        req.wfile.flush()
+        req.close_connection = True
+        self._count('ws_connections')
+
+        conn = WsConnection(self, req)
+        q = parse_qs(urlparse(req.path).query)
+        if "streams" in q:
+            conn.streams = q["streams"][0].split("/")
+        threading.Thread(target=conn.read_loop, daemon=True).start()
+        conn.write_loop()
+
+    def make_message(self, stream):
+        symbol, _, kind = stream.partition("@")
+        st = self.state(symbol)
+        now = int(time.time() * 1000)
+        with st.lock:
+            price = st.tick()
+            if kind.startswith("depth"):
+                first = st.update_id + 1
+                n = st.rnd.randint(1, 5)
+                st.update_id += n
+                side = lambda s: [[_fmt(st.level_price(s, st.rnd.randrange(self.depth_levels))),
+                                   _fmt(st.rnd.uniform(0, 3))] for _ in range(n)]
+                data = {"e": "depthUpdate", "E": now, "s": st.symbol, "U": first, "u": st.update_id,
+                        "b": side("b"), "a": side("a")}
+            elif kind == "aggTrade":
+                st.trade_id += 1
+                data = {"e": "aggTrade", "E": now, "s": st.symbol, "a": st.trade_id, "p": _fmt(price),
+                        "q": _fmt(st.rnd.uniform(0.001, 2)), "f": st.trade_id, "l": st.trade_id,
+                        "T": now, "m": st.rnd.random() < 0.5, "M": True}
+            elif kind == "ticker":
+                data = {"e": "24hrTicker", "E": now, "s": st.symbol, "p": "0", "P": "0.50",
+                        "c": _fmt(price), "o": _fmt(st.base), "h": _fmt(price * 1.01), "l": _fmt(price * 0.99),
+                        "v": "1000", "q": _fmt(price * 1000)}
+            elif kind == "miniTicker":
+                data = {"e": "24hrMiniTicker", "E": now, "s": st.symbol, "c": _fmt(price),
+                        "o": _fmt(st.base), "h": _fmt(price * 1.01), "l": _fmt(price * 0.99),
+                        "v": "1000", "q": _fmt(price * 1000)}
+            elif kind.startswith("kline_"):
+                interval = kind[6:]
+                step = INTERVAL_MS.get(interval, 60_000)
+                t = now // step * step
+                o = st.candle_close(t - step, step)
+                data = {"e": "kline", "E": now, "s": st.symbol, "k": {
+                    "t": t, "T": t + step - 1, "s": st.symbol, "i": interval, "o": _fmt(o),
+                    "c": _fmt(price), "h": _fmt(max(o, price)), "l": _fmt(min(o, price)),
+                    "v": "10", "x": False}}
+            else:
+                return None
+        return json.dumps({"stream": stream, "data": data})
+
+
+class WsConnection:
+    def __init__(self, exchange, req):
+        self.exchange = exchange
+        self.rfile = req.rfile
+        self.wfile = req.wfile
+        self.streams = []
+        self.alive = True
+        self.lock = threading.Lock()
+
+    def send(self, text, opcode=0x1):
+        payload = text.encode() if isinstance(text, str) else text
+        n = len(payload)
+        if n < 126:
+            head = struct.pack("!BB", 0x80 | opcode, n)
+        elif n < 65536:
+            head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+        else:
+            head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+        with self.lock:
+            self.wfile.write(head + payload)
+            self.wfile.flush()
+
+    def read_frame(self):
+        b1, b2 = self.rfile.read(2)
+        opcode, n = b1 & 0x0F, b2 & 0x7F
+        if n == 126:
+            n = struct.unpack("!H", self.rfile.read(2))[0]
+        elif n == 127:
+            n = struct.unpack("!Q", self.rfile.read(8))[0]
+        mask = self.rfile.read(4) if b2 & 0x80 else b"\0\0\0\0"
+        data = bytes(b ^ mask[i % 4] for i, b in enumerate(self.rfile.read(n)))
+        return opcode, data
+
+    def read_loop(self):
+        try:
+            while self.alive:
+                opcode, data = self.read_frame()
+                if opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    self.send(data, 0xA)
+                elif opcode == 0x1:
+                    self.on_request(json.loads(data))
+        except (OSError, ValueError):
+            pass
+        self.alive = False
+
+    def on_request(self, req):
+        params = req.get("params", [])
+        if req.get("method") == "SUBSCRIBE":
+            self.streams = self.streams + [s for s in params if s not in self.streams]
+        elif req.get("method") == "UNSUBSCRIBE":
+            self.streams = [s for s in self.streams if s not in params]
+        self.send(json.dumps({"result": None, "id": req.get("id")}))
+
+    def write_loop(self):
+        interval = 1.0 / self.exchange.rate if self.exchange.rate else 0.0
+        next_at = time.perf_counter()
+        i = 0
+        try:
+            while self.alive:
+                streams = self.streams
+                if not streams:
+                    time.sleep(0.01)
+                    next_at = time.perf_counter()
+                    continue
+                message = self.exchange.make_message(streams[i % len(streams)])
+                i += 1
+                if message is not None:
+                    self.send(message)
+                    self.exchange._count('ws_sent')
+                if interval:
+                    next_at += interval
+                    delay = next_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        except OSError:
+            pass
+        self.alive = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Binance REST and WebSocket APIs.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=200, help="WebSocket messages per second per connection")
+    args = parser.parse_args()
+
+    exchange = MockExchange(port=args.port, rate=args.rate).start()
+    print(f"BINANCE_REST_URL={exchange.rest_url}")
+    print(f"BINANCE_STREAM_URL={exchange.stream_url}")
+    try:
+        while True:
+            time.sleep(5)
+            print(exchange.counters, flush=True)
+    except KeyboardInterrupt:
+        exchange.stop()
+
+
+if __name__ == "__main__":
+    main()
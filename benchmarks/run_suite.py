@@ -0,0 +1,325 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import platform
+import tempfile
+import statistics
+import subprocess
+import threading
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use("Agg")
+from mock_exchange import MockExchange
+from bench_chart import make_figure, make_rows, tick
+from config import *
+from utils.binance_api import BinanceAPI, BinanceStream, _parse_kline_rows
+from utils.candle_buffer import CandleBuffer
+from utils.candle_store import CandleStore
+from utils.ingest_process import ProcessStream
+from utils.liquidity_heatmap import LiquidityHeatmap
+from utils.market_engine import MarketEngine, TOPICS
+from utils.order_book import OrderBook
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (name, WebSocket messages per second, 0 sends as fast as the socket allows)
+SCENARIOS = (("steady", 200), ("busy", 2000), ("flood", 0))
+INGEST_MODES = ("thread", "process")
+
+
+def git_commit():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return rev, dirty
+    except OSError:
+        return None, None
+
+
+def rnd_qty(k):
+    return 0.5 + (k * 7919 % 100) / 50
+
+
+def measure(fn, seconds, min_runs=5):
+    times = []
+    deadline = time.perf_counter() + seconds
+    while len(times) < min_runs or time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return {
+        'runs': len(times),
+        'mean_ms': statistics.mean(times),
+        'p50_ms': times[len(times) // 2],
+        'p95_ms': times[min(len(times) - 1, int(len(times) * 0.95))],
+        'ops_per_s': 1000 / statistics.mean(times),
+    }
+
+
+def open_display():
+    try:
+        import customtkinter as ctk
+        root = ctk.CTk()
+        root.geometry("1200x800")
+        return root
+    except Exception as e:
+        return str(e)
+
+
+def micro_benchmarks(exchange, seconds):
+    results = {}
+    pair = DEFAULT_PAIR
+
+    raw = BinanceAPI.http.get_json(f"{BinanceAPI.BASE_URL}/klines",
+                                   {'symbol': pair, 'interval': "1m", 'limit': 1000})
+    results['parse_kline_rows'] = measure(lambda: _parse_kline_rows(raw), seconds)
+    results['get_klines'] = measure(lambda: BinanceAPI.get_klines(pair, "1m", 60), seconds)
+    results['get_comparison_data'] = measure(lambda: BinanceAPI.get_comparison_data(DEFAULT_COINS), seconds)
+
+    # What every chart refresh pays to hand the live candles to the renderer.
+    candles = CandleBuffer(pair, "1m", maxlen=1000)
+    candles.load(_parse_kline_rows(raw))
+    results['candle_snapshot'] = measure(lambda: np.asarray(candles.snapshot(), dtype=float), seconds, min_runs=1000)
+
+    symbol = pair.lower()
+    streams = [f"{symbol}@ticker", f"{symbol}@depth@100ms", f"{symbol}@aggTrade", f"{symbol}@kline_1m"]
+    messages = [exchange.make_message(streams[i % len(streams)]) for i in range(4000)]
+    stream = BinanceStream()
+    stream.subscribe(streams, lambda data: None)
+    stream.acked.update(stream.active.values())
+    stream.is_running = True
+    it = iter(range(1 << 62))
+    results['on_message'] = measure(
+        lambda: stream._on_message(None, messages[next(it) % len(messages)]), seconds, min_runs=1000)
+
+    # Per-sample heatmap cost with a 1000-level book and the clock advancing a bucket every 50 samples.
+    book = OrderBook(pair, None)
+    book.last_update_id = 0
+    for k in range(1000):
+        book.bids.update(60000 - 0.01 * (k + 1), rnd_qty(k))
+        book.asks.update(60000 + 0.01 * (k + 1), rnd_qty(k))
+    heatmap = LiquidityHeatmap(pair, HEATMAP_PRICE_BUCKETS, HEATMAP_TIME_BUCKETS, HEATMAP_BUCKET_MS,
+                               HEATMAP_STEP_BPS, HEATMAP_LEVELS, 0)
+    clock = itertools.count(0, HEATMAP_BUCKET_MS // 50)
+    results['heatmap_sample'] = measure(
+        lambda: heatmap.sample(book, next(clock)), seconds, min_runs=1000)
+
+    from components.chart_model import CandleChart
+    fig, ax1, ax2, canvas = make_figure()
+    chart = CandleChart(fig, ax1, ax2, canvas)
+    rows = make_rows()
+    rnd = random.Random(1)
+    key = (pair, "1h")
+    chart.update(key, rows)
+
+    def chart_frame():
+        tick(rows, rnd)
+        chart.update(key, rows)
+
+    results['update_chart'] = dict(measure(chart_frame, seconds), backend="Agg")
+
+    root = open_display()
+    if isinstance(root, str):
+        reason = f"no display: {root}"
+        results['update_orderbook'] = {'skipped': reason}
+        results['update_comparison'] = {'skipped': reason}
+        return results
+
+    from bench_widgets import SyntheticBook
+    from components.left_sidebar import LeftSidebar
+    from components.right_sidebar import RightSidebar
+    right = RightSidebar(root)
+    right.pack(side="right", fill="y")
+    left = LeftSidebar(root, lambda coin: None)
+    left.pack(side="left", fill="y")
+    root.update()
+
+    book = SyntheticBook()
+
+    def book_frame():
+        book.step()
+        right.update_orderbook(book)
+        root.update_idletasks()
+
+    results['update_orderbook'] = measure(book_frame, seconds)
+
+    series = {c: [rnd.uniform(-3, 3) for _ in range(24)] for c in DEFAULT_COINS}
+
+    def comparison_frame():
+        for vals in series.values():
+            vals[-1] += rnd.uniform(-0.1, 0.1)
+        left.update_comparison(series)
+        root.update_idletasks()
+
+    results['update_comparison'] = measure(comparison_frame, seconds)
+    root.destroy()
+    return results
+
+
+def frame_probe(stop, lateness):
+    # Stands in for the Tk main loop: how late does a thread that wants to
+    # run every frame get scheduled while ingest competes for the GIL?
+    period = 1 / RENDER_FPS
+    next_at = time.perf_counter() + period
+    while not stop.is_set():
+        time.sleep(max(next_at - time.perf_counter(), 0))
+        now = time.perf_counter()
+        lateness.append((now - next_at) * 1000)
+        next_at = max(next_at + period, now)
+
+
+def run_scenario(exchange, rate, duration, ingest):
+    exchange.rate = rate
+    stream = ProcessStream() if ingest == "process" else None
+    engine = MarketEngine(DEFAULT_PAIR, DEFAULT_INTERVAL, DEFAULT_COINS, stream=stream)
+
+    first = {}
+    started = time.perf_counter()
+
+    def listener(topic):
+        def on_publish(payload):
+            if topic not in first:
+                first[topic] = (time.perf_counter() - started) * 1000
+        return on_publish
+
+    for topic in TOPICS:
+        engine.subscribe(topic, listener(topic))
+
+    sent0 = exchange.counters['ws_sent']
+    lateness, stop = [], threading.Event()
+    probe = threading.Thread(target=frame_probe, args=(stop, lateness), daemon=True)
+    engine.start()
+    probe.start()
+    time.sleep(duration)
+    stop.set()
+    probe.join()
+    snap = engine.snapshot()
+    sent = exchange.counters['ws_sent'] - sent0
+    engine.stop()
+    lateness.sort()
+
+    received = snap['socket'].get('messages', 0)
+    return {
+        'rate': rate,
+        'ingest': ingest,
+        'duration_s': duration,
+        'sent': sent,
+        'received': received,
+        'throughput_msgs_per_s': received / snap['engine']['uptime_s'],
+        'dropped_stale': snap['socket'].get('dropped_stale', 0),
+        'reconnects': snap['socket'].get('reconnects', 0),
+        'first_publish_ms': first,
+        'frame_lateness_ms': {'p50': lateness[len(lateness) // 2],
+                              'p99': lateness[min(len(lateness) - 1, int(len(lateness) * 0.99))],
+                              'max': lateness[-1]},
+        'streams': snap['engine']['streams'],
+        'stages': snap['latency'],
+        'published': snap['engine']['published'],
+    }
+
+
+def compare(results, baseline):
+    # Positive numbers are regressions: slower micro-benchmarks, higher
+    # latency or lower throughput than the baseline run.
+    lines = []
+    for name, cur in results['micro'].items():
+        old = baseline.get('micro', {}).get(name)
+        if old and 'mean_ms' in old and 'mean_ms' in cur:
+            lines.append((f"micro/{name} mean", (cur['mean_ms'] / old['mean_ms'] - 1) * 100))
+    for name, cur in results['e2e'].items():
+        old = baseline.get('e2e', {}).get(name)
+        if not old:
+            continue
+        if old['throughput_msgs_per_s']:
+            lines.append((f"e2e/{name} throughput",
+                          (1 - cur['throughput_msgs_per_s'] / old['throughput_msgs_per_s']) * 100))
+        if 'frame_lateness_ms' in old and old['frame_lateness_ms']['p99'] > 0:
+            lines.append((f"e2e/{name} frame lateness p99",
+                          (cur['frame_lateness_ms']['p99'] / old['frame_lateness_ms']['p99'] - 1) * 100))
+        for kind, s in cur['streams'].items():
+            prev = old['streams'].get(kind)
+            if prev and prev['latency_p99_ms'] > 0:
+                lines.append((f"e2e/{name} {kind} p99",
+                              (s['latency_p99_ms'] / prev['latency_p99_ms'] - 1) * 100))
+    return lines
+
+
+def print_report(results):
+    print(f"commit {results['commit']}{' (dirty)' if results['dirty'] else ''}  python {results['python']}")
+    print(f"\n{'micro-benchmark':<22} {'mean ms':>10} {'p95 ms':>10} {'ops/s':>12}")
+    for name, r in results['micro'].items():
+        if 'skipped' in r:
+            print(f"{name:<22} skipped ({r['skipped']})")
+        else:
+            print(f"{name:<22} {r['mean_ms']:>10.3f} {r['p95_ms']:>10.3f} {r['ops_per_s']:>12.1f}")
+    for name, r in results['e2e'].items():
+        first = ", ".join(f"{k} {v:.0f} ms" for k, v in sorted(r['first_publish_ms'].items()))
+        print(f"\nscenario {name}: rate {r['rate'] or 'max'}/s  sent {r['sent']}  received {r['received']}  "
+              f"{r['throughput_msgs_per_s']:.1f} msg/s  dropped {r['dropped_stale']}")
+        late = r['frame_lateness_ms']
+        print(f"  first publish: {first}")
+        print(f"  frame lateness p50 {late['p50']:.2f} ms  p99 {late['p99']:.2f} ms  max {late['max']:.2f} ms")
+        for kind, s in sorted(r['streams'].items()):
+            print(f"  {kind:<15} {s['count']:>8} msgs  latency p50 {s['latency_p50_ms']:7.2f} ms  "
+                  f"p99 {s['latency_p99_ms']:7.2f} ms  max {s['latency_max_ms']:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite against a local mock exchange.")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time budget per micro-benchmark")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per end-to-end scenario")
+    parser.add_argument("--only", choices=("micro", "e2e"))
+    parser.add_argument("--ingest", choices=INGEST_MODES, help="run end-to-end scenarios in one ingest mode only")
+    args = parser.parse_args()
+
+    exchange = MockExchange().start()
+    BinanceAPI.BASE_URL = exchange.rest_url
+    BinanceStream.STREAM_URL = exchange.stream_url
+    # The ingest worker process reads its endpoints from the environment.
+    os.environ["BINANCE_REST_URL"] = exchange.rest_url
+    os.environ["BINANCE_STREAM_URL"] = exchange.stream_url
+    cache_dir = tempfile.TemporaryDirectory()
+    BinanceAPI.store = CandleStore(cache_dir.name, CANDLE_CACHE_MAX_BYTES, CANDLE_CACHE_MAX_ROWS)
+
+    commit, dirty = git_commit()
+    results = {'commit': commit, 'dirty': dirty, 'time': time.time(), 'python': platform.python_version(),
+               'platform': platform.platform(), 'micro': {}, 'e2e': {}}
+    try:
+        if args.only != "e2e":
+            results['micro'] = micro_benchmarks(exchange, args.seconds)
+        if args.only != "micro":
+            for ingest in ([args.ingest] if args.ingest else INGEST_MODES):
+                for name, rate in SCENARIOS:
+                    results['e2e'][f"{name}/{ingest}"] = run_scenario(exchange, rate, args.duration, ingest)
+    finally:
+        BinanceAPI.http.close()
+        exchange.stop()
+        cache_dir.cleanup()
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nvs {baseline.get('commit')} (positive = regression)")
+        for label, pct in compare(results, baseline):
+            print(f"  {label:<40} {pct:+7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+import numpy as np
+from datetime import datetime, timezone
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib import colormaps
+from matplotlib.colors import ListedColormap, PowerNorm, to_rgba
+from matplotlib.image import AxesImage
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+from utils.candle_buffer import INTERVAL_MS
+from utils.candle_history import CandleHistory
+from utils.indicators import IndicatorEngine
+from config import *
+
+
+VOL_UP = "#2e845c"
+VOL_DOWN = "#992935"
+INDICATOR_COLORS = {
+    "MA": ('#00e5ff', '#ff9900'),
+    "EMA": ('#e040fb',),
+    "BB": ('#8c9eff', '#5c6bc0', '#5c6bc0'),
+    "VWAP": ('#ffd54f',),
+    "RSI": ('#ab47bc',),
+    "MACD": ('#29b6f6', '#ff7043', '#777777'),
+    "ATR": ('#26a69a',),
+}
+BODY_HALF = 0.3
+VOL_HALF = 0.2
+MIN_VIEW = 10
+
+
+def _heat_cmap():
+    # Empty cells are fully transparent; opacity rises with resting size.
+    colors = colormaps['inferno'](np.linspace(0, 1, 256))
+    colors[:, 3] = HEATMAP_ALPHA * np.sqrt(np.linspace(0, 1, 256))
+    return ListedColormap(colors)
+
+
+def _boxes(x, half, bottom, top):
+    verts = np.empty((len(x), 4, 2))
+    verts[:, 0, 0] = verts[:, 1, 0] = x - half
+    verts[:, 2, 0] = verts[:, 3, 0] = x + half
+    verts[:, 0, 1] = verts[:, 3, 1] = bottom
+    verts[:, 1, 1] = verts[:, 2, 1] = top
+    return verts
+
+
+class CandleChart:
+    def __init__(self, fig, ax_price, ax_vol, canvas, enabled=INDICATORS_ENABLED, on_need_history=None):
+        self.fig = fig
+        self.ax1 = ax_price
+        self.ax2 = ax_vol
+        self.ax3 = ax_vol.twinx()
+        self.canvas = canvas
+        self.on_need_history = on_need_history
+
+        self.engine = IndicatorEngine()
+        self.enabled = set(enabled)
+        self.history = CandleHistory()
+
+        self.key = None
+        self.lo = self.hi = 0.0
+        self.follow = True
+        self.drag = None
+        self.history_pending = False
+        self.history_done = False
+
+        self.vis = None
+        self.vis_ind = {}
+        self.background = None
+        self.artists = []
+        self.heat_on = HEATMAP_ENABLED
+        self.heat_cmap = _heat_cmap()
+        self.heat_cursor = None
+        self.heat_meta = None
+
+        self.rgba_up = np.array(to_rgba(COLOR_GREEN))
+        self.rgba_down = np.array(to_rgba(COLOR_RED))
+        self.rgba_vol_up = np.array(to_rgba(VOL_UP))
+        self.rgba_vol_down = np.array(to_rgba(VOL_DOWN))
+
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('scroll_event', self._on_scroll)
+        self.canvas.mpl_connect('button_press_event', self._on_press)
+        self.canvas.mpl_connect('motion_notify_event', self._on_motion)
+        self.canvas.mpl_connect('button_release_event', self._on_release)
+
+    def update(self, key, rows):
+        if not rows:
+            return
+        data = np.asarray(rows, dtype=float)
+
+        if key != self.key or not len(self.history):
+            self._build(key, data)
+            return
+
+        change = self.history.merge_tail(data)
+        n = len(self.history)
+        if change is None:
+            self.engine.load(self.history.rows())
+        else:
+            revised, appended = change
+            if not revised and not appended:
+                return
+            base = self.history.rows()
+            if appended:
+                for j in range(n - appended, n):
+                    self.engine.append(base[j - 1], base[j])
+            else:
+                self.engine.update_last(base[-1])
+                if self._last_visible():
+                    self._update_last()
+                    if self._fits(base[-1]):
+                        self._blit()
+                        return
+
+        if self.follow:
+            width = self.hi - self.lo
+            self.hi = float(n)
+            self.lo = self.hi - width
+        self._render_view()
+        self._rescale()
+        self.canvas.draw()
+
+    def load_history(self, key, rows):
+        self.history_pending = False
+        if rows is None or key != self.key:
+            return
+        added = self.history.prepend(rows) if len(rows) else 0
+        if not added or len(self.history) >= CHART_MAX_HISTORY:
+            self.history_done = True
+        if not added:
+            return
+
+        self.lo += added
+        self.hi += added
+        self.engine.load(self.history.rows())
+        self._redraw()
+
+    def _build(self, key, data):
+        self.key = key
+        self.history.reset(data)
+        self.engine.load(self.history.rows())
+        self.hi = float(len(data))
+        self.lo = max(0.0, self.hi - CHART_DEFAULT_CANDLES)
+        self.follow = True
+        self.history_pending = False
+        self.history_done = False
+        self.background = None
+
+        for ax in (self.ax1, self.ax2, self.ax3):
+            ax.clear()
+            ax.set_facecolor(COLOR_BG_MAIN)
+            for spine in ax.spines.values():
+                spine.set_edgecolor(COLOR_BORDER)
+                spine.set_linewidth(1)
+        self.fig.patch.set_facecolor(COLOR_BG_MAIN)
+
+        # Drawn first among the animated artists so it sits behind the candles.
+        self.heat = AxesImage(self.ax1, cmap=self.heat_cmap, norm=PowerNorm(0.5, vmin=0, vmax=1),
+                              interpolation='nearest', origin='lower', animated=True)
+        self.heat.set_data(np.zeros((1, 1), dtype=np.float32))
+        self.heat.set_visible(False)
+        self.ax1.add_image(self.heat)
+        self.heat_cursor = None
+        self.heat_meta = None
+
+        self.wicks = LineCollection([], linewidths=0.8, animated=True)
+        self.bodies = PolyCollection([], linewidths=0.5, animated=True)
+        self.volumes = PolyCollection([], linewidths=0, animated=True)
+        self.ax1.add_collection(self.wicks)
+        self.ax1.add_collection(self.bodies)
+        self.ax2.add_collection(self.volumes)
+
+        self.ind_lines = {}
+        self.ind_labels = {}
+        for ind in self.engine.indicators:
+            ax = self.ax1 if ind.overlay else self.ax3
+            lines, labels = [], []
+            for color in INDICATOR_COLORS.get(ind.name, ('white',) * len(ind.outputs)):
+                line, = ax.plot([], [], color=color, linewidth=0.8, animated=True)
+                label = ax.text(0.01, 0, "", transform=ax.transAxes, color=color, fontsize=9,
+                                fontweight='bold', ha='left', animated=True)
+                lines.append(line)
+                labels.append(label)
+            self.ind_lines[ind.name] = lines
+            self.ind_labels[ind.name] = labels
+        self._layout_indicators()
+
+        self.price_line = self.ax1.axhline(0, color=COLOR_GREEN, linestyle='--',
+                                           linewidth=0.8, alpha=0.8, animated=True)
+        self.price_label = self.ax1.text(
+            x=1.005, y=0, s="", color='white', fontsize=9, fontweight='bold',
+            va='center', ha='left', transform=self.ax1.get_yaxis_transform(),
+            bbox=dict(boxstyle="square,pad=0.2", facecolor=COLOR_GREEN, edgecolor=COLOR_BG_MAIN, alpha=1.0),
+            clip_on=False, animated=True
+        )
+
+        ind_lines = [l for lines in self.ind_lines.values() for l in lines]
+        ind_labels = [t for labels in self.ind_labels.values() for t in labels]
+        self.artists = [self.heat, self.wicks, self.bodies, self.volumes, *ind_lines,
+                        self.price_line, *ind_labels, self.price_label]
+
+        self.ax1.yaxis.set_major_locator(MaxNLocator(nbins=6, prune='lower'))
+        self.ax2.yaxis.set_major_locator(MaxNLocator(nbins=3, prune='upper'))
+        self.ax2.xaxis.set_major_locator(MaxNLocator(nbins=6, integer=True))
+        self.ax2.xaxis.set_major_formatter(FuncFormatter(self._format_time))
+
+        self.ax1.grid(True, linestyle='dotted', color='#333333', alpha=0.5)
+        self.ax1.yaxis.tick_right()
+        self.ax1.tick_params(axis='y', colors='white', labelsize=8, pad=5)
+        self.ax1.tick_params(axis='x', labelbottom=False)
+        self.ax2.yaxis.tick_right()
+        self.ax2.yaxis.get_offset_text().set_color('white')
+        self.ax2.tick_params(axis='y', colors='white', labelsize=8, pad=5)
+        self.ax2.tick_params(axis='x', colors='white', labelsize=8, labelbottom=True, pad=5)
+        self.ax2.grid(False)
+        self.ax3.patch.set_visible(False)
+        self.ax3.xaxis.set_visible(False)
+        self.ax3.tick_params(axis='y', which='both', left=False, right=False,
+                             labelleft=False, labelright=False)
+        for spine in self.ax3.spines.values():
+            spine.set_visible(False)
+
+        self._render_view()
+        self._rescale()
+        self.canvas.draw()
+
+    def _budget(self):
+        return max(CHART_DEFAULT_CANDLES, int(self.ax1.bbox.width / CHART_MIN_CANDLE_PX))
+
+    def _render_view(self):
+        x, rows, idx, size = self.history.window(np.floor(self.lo), np.ceil(self.hi), self._budget())
+        self.vis = (x, rows, idx, size)
+        if not len(rows):
+            return
+
+        o, h, l, c, v = rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4], rows[:, 5]
+        up = (c >= o)[:, None]
+
+        self.body_verts = _boxes(x, BODY_HALF * size, np.minimum(o, c), np.maximum(o, c))
+        self.vol_verts = _boxes(x, VOL_HALF * size, np.zeros_like(v), v)
+        self.wick_segs = np.stack([np.column_stack([x, l]), np.column_stack([x, h])], axis=1)
+        self.body_colors = np.where(up, self.rgba_up, self.rgba_down)
+        self.vol_colors = np.where(up, self.rgba_vol_up, self.rgba_vol_down)
+        self._set_collections()
+
+        self.vis_ind = {}
+        for name, lines in self.ind_lines.items():
+            sampled = [values[idx] for values in self.engine.get(name)]
+            for line, values in zip(lines, sampled):
+                line.set_data(x, values)
+            self.vis_ind[name] = sampled
+
+        self._set_labels(self.history.rows()[-1])
+        self._place_heatmap()
+
+    def update_heatmap(self, heatmap):
+        if not self.heat_on or not len(self.history) or heatmap.symbol != self.key[0]:
+            return
+        change = heatmap.changes(self.heat_cursor)
+        if change is None:
+            return
+        self.heat_cursor = change['cursor']
+        block, shift = change['block'], change['shift']
+        if shift is None:
+            self.heat.set_data(block)
+        else:
+            # Scroll the image left by the buckets that elapsed and overwrite
+            # only the columns the sampler touched since the last frame.
+            grid = self.heat.get_array()
+            if shift:
+                grid[:, :-shift] = grid[:, shift:]
+            grid[:, -block.shape[1]:] = block
+            self.heat.changed()
+        self.heat.set_clim(0, change['vmax'] or 1.0)
+        self.heat_meta = change
+        self._place_heatmap()
+        self._blit()
+
+    def toggle_heatmap(self, on):
+        self.heat_on = on
+        self.heat_cursor = None
+        if self.key is None:
+            return
+        self._place_heatmap()
+        self._blit()
+
+    def _place_heatmap(self):
+        meta = self.heat_meta
+        if not self.heat_on or meta is None or not len(self.history):
+            self.heat.set_visible(False)
+            return
+        # Candle i spans x in [i - 0.5, i + 0.5); map bucket times onto that axis.
+        rows = self.history.rows()
+        step = INTERVAL_MS.get(self.key[1], 60_000)
+        end = (meta['head'] + 1) * meta['bucket_ms']
+        x1 = len(rows) - 1.5 + (end - rows[-1, 0]) / step
+        x0 = x1 - meta['cols'] * meta['bucket_ms'] / step
+        self.heat.set_extent((x0, x1, meta['base'], meta['base'] + meta['rows'] * meta['step']))
+        self.heat.set_visible(True)
+
+    def _set_collections(self):
+        self.bodies.set_verts(self.body_verts)
+        self.bodies.set_facecolor(self.body_colors)
+        self.bodies.set_edgecolor(self.body_colors)
+        self.wicks.set_segments(self.wick_segs)
+        self.wicks.set_color(self.body_colors)
+        self.volumes.set_verts(self.vol_verts)
+        self.volumes.set_facecolor(self.vol_colors)
+
+    def _last_visible(self):
+        if self.vis is None:
+            return False
+        x, rows, idx, size = self.vis
+        return size == 1 and len(idx) and idx[-1] == len(self.history) - 1
+
+    def _update_last(self):
+        x, rows, idx, _ = self.vis
+        i = len(rows) - 1
+        _, o, h, l, c, v = self.history.rows()[-1]
+        up = c >= o
+        xi = x[i:i + 1]
+
+        self.body_verts[i] = _boxes(xi, BODY_HALF, min(o, c), max(o, c))[0]
+        self.vol_verts[i] = _boxes(xi, VOL_HALF, 0.0, v)[0]
+        self.wick_segs[i] = ((xi[0], l), (xi[0], h))
+        self.body_colors[i] = self.rgba_up if up else self.rgba_down
+        self.vol_colors[i] = self.rgba_vol_up if up else self.rgba_vol_down
+        self._set_collections()
+
+        for name, lines in self.ind_lines.items():
+            sampled = self.vis_ind[name]
+            for line, values, last in zip(lines, sampled, self.engine.last(name)):
+                values[-1] = last
+                line.set_data(x, values)
+
+        self._set_labels(self.history.rows()[-1])
+
+    def _layout_indicators(self):
+        slots = {True: 0, False: 0}
+        for ind in self.engine.indicators:
+            on = ind.name in self.enabled
+            for line, label in zip(self.ind_lines[ind.name], self.ind_labels[ind.name]):
+                line.set_visible(on)
+                label.set_visible(on)
+                if on:
+                    top = 0.94 if ind.overlay else 0.85
+                    step = 0.05 if ind.overlay else 0.2
+                    label.set_y(top - step * slots[ind.overlay])
+                    slots[ind.overlay] += 1
+
+    def toggle(self, name, on=None):
+        ind = self.engine.by_name.get(name)
+        if ind is None:
+            return self.enabled
+        on = name not in self.enabled if on is None else on
+        if on:
+            if not ind.overlay:
+                self.enabled -= {i.name for i in self.engine.indicators if not i.overlay}
+            self.enabled.add(name)
+        else:
+            self.enabled.discard(name)
+
+        if len(self.history):
+            self._layout_indicators()
+            self._set_labels(self.history.rows()[-1])
+            self._rescale()
+            self.canvas.draw()
+        return self.enabled
+
+    def _visible_series(self, overlay):
+        for ind in self.engine.indicators:
+            if ind.name in self.enabled and ind.overlay == overlay:
+                yield ind, self.vis_ind.get(ind.name, ())
+
+    def _set_labels(self, last):
+        for ind in self.engine.indicators:
+            if ind.name not in self.enabled:
+                continue
+            for output, label, value in zip(ind.outputs, self.ind_labels[ind.name],
+                                            self.engine.last(ind.name)):
+                label.set_text(f"{output}: {value:,.2f}" if value == value else f"{output}: -")
+
+        last_open, last_price = last[1], last[4]
+        color_tag = COLOR_GREEN if last_price >= last_open else COLOR_RED
+        self.price_line.set_ydata([last_price, last_price])
+        self.price_line.set_color(color_tag)
+        self.price_label.set_y(last_price)
+        self.price_label.set_text(f"{last_price:,.2f}")
+        self.price_label.get_bbox_patch().set_facecolor(color_tag)
+
+    def _fits(self, last):
+        y0, y1 = self.ax1.get_ylim()
+        if not (y0 <= last[3] and last[2] <= y1 and last[5] <= self.ax2.get_ylim()[1]):
+            return False
+        for overlay, (lo, hi) in ((True, (y0, y1)), (False, self.ax3.get_ylim())):
+            for ind, _ in self._visible_series(overlay):
+                if ind.bounds:
+                    continue
+                for value in self.engine.last(ind.name):
+                    if value == value and not lo <= value <= hi:
+                        return False
+        return True
+
+    def _series_range(self, overlay, lo, hi):
+        for ind, series in self._visible_series(overlay):
+            if ind.bounds:
+                return ind.bounds
+            for values in series:
+                if np.isfinite(values).any():
+                    lo = min(lo, np.nanmin(values))
+                    hi = max(hi, np.nanmax(values))
+        return lo, hi
+
+    def _rescale(self):
+        self.ax1.set_xlim(self.lo - 0.8, self.hi - 0.2)
+        rows = self.vis[1] if self.vis is not None else ()
+        if not len(rows):
+            return
+
+        lo, hi = self._series_range(True, rows[:, 3].min(), rows[:, 2].max())
+        pad = (hi - lo) * 0.05 or hi * 0.001 or 1.0
+        self.ax1.set_ylim(lo - pad, hi + pad)
+        self.ax2.set_ylim(0, rows[:, 5].max() * 1.1 or 1.0)
+
+        lo, hi = self._series_range(False, np.inf, -np.inf)
+        if np.isfinite(lo) and np.isfinite(hi):
+            pad = (hi - lo) * 0.1 or abs(hi) * 0.1 or 1.0
+            self.ax3.set_ylim(lo - pad, hi + pad)
+
+    def _redraw(self):
+        self._render_view()
+        self._rescale()
+        self.canvas.draw_idle()
+        self._check_history()
+
+    def _set_view(self, lo, hi):
+        n = len(self.history)
+        width = min(max(hi - lo, MIN_VIEW), max(n, MIN_VIEW))
+        lo = min(max(lo, 0.0), max(n - width, 0.0))
+        self.lo, self.hi = lo, lo + width
+        self.follow = self.hi >= n - 0.5
+
+    def _check_history(self):
+        # Only reached from pan/zoom: a fresh 60-candle chart is always "near
+        # the left edge" and must not pull deep history on every switch.
+        if self.on_need_history is None or self.history_pending or self.history_done:
+            return
+        if self.lo < self.hi - self.lo:
+            self.history_pending = True
+            self.on_need_history(self.key, int(self.history.first_open_time()))
+
+    def _on_scroll(self, event):
+        if not len(self.history) or event.inaxes not in (self.ax1, self.ax2, self.ax3):
+            return
+        factor = 0.8 if event.button == 'up' else 1.25
+        centre = event.xdata
+        self._set_view(centre - (centre - self.lo) * factor, centre + (self.hi - centre) * factor)
+        self._redraw()
+
+    def _on_press(self, event):
+        if event.button == 1 and event.inaxes in (self.ax1, self.ax2, self.ax3):
+            self.drag = (event.x, self.lo, self.hi)
+
+    def _on_motion(self, event):
+        if self.drag is None or event.x is None:
+            return
+        x0, lo, hi = self.drag
+        shift = -(event.x - x0) * (hi - lo) / max(self.ax1.bbox.width, 1.0)
+        self._set_view(lo + shift, hi + shift)
+        self._redraw()
+
+    def _on_release(self, event):
+        self.drag = None
+
+    def _format_time(self, x, pos=None):
+        i = int(round(x))
+        rows = self.history.rows()
+        if not 0 <= i < len(rows):
+            return ""
+        ts = datetime.fromtimestamp(rows[i, 0] / 1000, tz=timezone.utc)
+        span = (self.hi - self.lo) * (rows[-1, 0] - rows[0, 0]) / max(len(rows) - 1, 1)
+        if span > 400 * 86_400_000:
+            return ts.strftime('%Y-%m')
+        if span > 3 * 86_400_000:
+            return ts.strftime('%m-%d')
+        return ts.strftime('%H:%M')
+
+    def _on_draw(self, event):
+        if not self.artists:
+            return
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self.artists:
+            self.fig.draw_artist(artist)
+
+    def _blit(self):
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_animated()
+        self.canvas.blit(self.fig.bbox)
@@ -1,28 +1,28 @@
-
 import customtkinter as ctk
-import mplfinance as mpf
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.ticker import MaxNLocator
+from components.chart_model import CandleChart
 from config import *
 
 
 class ChartPanel(ctk.CTkFrame):
-    def __init__(self, parent, callback_tf_change, callbacks_toggle=None):
+    def __init__(self, parent, callback_tf_change, callbacks_toggle=None, callback_history=None,
+                 interval=DEFAULT_INTERVAL):
         super().__init__(parent, fg_color="transparent")
         self.callback_tf_change = callback_tf_change
-        self.callbacks_toggle = callbacks_toggle or {}
+        self.callback_history = callback_history
+        self.callbacks_toggle = dict(callbacks_toggle or {}, heatmap=self.toggle_heatmap)
         self.toggle_states = {}
 
-        self.current_interval = DEFAULT_INTERVAL
+        self.current_interval = interval
         self.tf_buttons = {}
+        self.ind_buttons = {}
 
         self.grid_rowconfigure(1, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
-        self._create_toolbar()
         self._create_chart_canvas()
+        self._create_toolbar()
 
     def _create_toolbar(self):
         toolbar = ctk.CTkFrame(self, height=35, fg_color=COLOR_BG_PANEL,
@@ -44,19 +44,33 @@ class ChartPanel(ctk.CTkFrame):
             btn.pack(side="left", padx=2, pady=5)
             self.tf_buttons[tf] = btn
 
+        ctk.CTkFrame(toolbar, width=15, height=20,
+                     fg_color="transparent").pack(side="left")
+        for ind in self.chart.engine.indicators:
+            btn = ctk.CTkButton(
+                toolbar, text=ind.name, width=30, height=20,
+                fg_color=COLOR_ACTIVE if ind.name in self.chart.enabled else COLOR_BTN_DEFAULT,
+                hover_color=COLOR_BTN_DEFAULT,
+                font=("Arial", 10, "bold"),
+                command=lambda n=ind.name: self._on_indicator_click(n)
+            )
+            btn.pack(side="left", padx=2, pady=5)
+            self.ind_buttons[ind.name] = btn
+
         ctk.CTkFrame(toolbar, width=15, height=20,
                      fg_color="transparent").pack(side="right")
-        self._create_toggle_btn(toolbar, "OB", "orderbook")
-        self._create_toggle_btn(toolbar, "Tr", "trades")
-        self._create_toggle_btn(toolbar, "Ov", "overview")
+        for text, key in (("OB", "orderbook"), ("Tr", "trades"), ("Ov", "overview")):
+            if key in self.callbacks_toggle:
+                self._create_toggle_btn(toolbar, text, key)
+        self._create_toggle_btn(toolbar, "Hm", "heatmap", on=HEATMAP_ENABLED)
 
-    def _create_toggle_btn(self, parent, text, key):
-        self.toggle_states[key] = True
+    def _create_toggle_btn(self, parent, text, key, on=True):
+        self.toggle_states[key] = on
 
         btn = ctk.CTkButton(
             parent, text=text, width=30, height=20,
             font=("Arial", 10, "bold"),
-            fg_color=COLOR_ACTIVE,
+            fg_color=COLOR_ACTIVE if on else COLOR_BTN_DEFAULT,
             hover_color=COLOR_BTN_DEFAULT
         )
 
@@ -82,13 +96,22 @@ class ChartPanel(ctk.CTkFrame):
                 btn.configure(fg_color=COLOR_BTN_DEFAULT)
         self.callback_tf_change(self.current_interval)
 
+    def _on_indicator_click(self, name):
+        try:
+            enabled = self.chart.toggle(name)
+        except Exception as e:
+            print(f"Indicator Toggle Error: {e}")
+            return
+        for key, btn in self.ind_buttons.items():
+            btn.configure(fg_color=COLOR_ACTIVE if key in enabled else COLOR_BTN_DEFAULT)
+
     def _create_chart_canvas(self):
         self.chart_frame = ctk.CTkFrame(
             self, fg_color=COLOR_BG_MAIN, border_width=1, border_color=COLOR_BORDER)
         self.chart_frame.grid(row=1, column=0, sticky="nsew")
 
-        self.fig = plt.Figure(dpi=100, facecolor=COLOR_BG_MAIN)
-        gs = gridspec.GridSpec(2, 1, height_ratios=[4, 1], figure=self.fig)
+        self.fig = Figure(dpi=100, facecolor=COLOR_BG_MAIN)
+        gs = self.fig.add_gridspec(2, 1, height_ratios=[4, 1])
         self.ax1 = self.fig.add_subplot(gs[0])
         self.ax2 = self.fig.add_subplot(gs[1], sharex=self.ax1)
         self.fig.subplots_adjust(
@@ -99,78 +122,29 @@ class ChartPanel(ctk.CTkFrame):
         self.chart_canvas.get_tk_widget().configure(highlightthickness=0, borderwidth=0)
         self.chart_canvas.get_tk_widget().pack(fill="both", expand=True)
 
-    def update_chart(self, df):
-        if df.empty:
+        self.chart = CandleChart(self.fig, self.ax1, self.ax2, self.chart_canvas,
+                                 on_need_history=self.callback_history)
+
+    def update_chart(self, candles):
+        rows = candles.snapshot()
+        if not rows:
             return
         try:
-            self.ax1.clear()
-            self.ax2.clear()
-            self.fig.patch.set_facecolor(COLOR_BG_MAIN)
-            self.ax1.set_facecolor(COLOR_BG_MAIN)
-            self.ax2.set_facecolor(COLOR_BG_MAIN)
-
-            ma20 = df['close'].rolling(20).mean()
-            ma50 = df['close'].rolling(50).mean()
-            v_ma20 = ma20.iloc[-1] if len(ma20) > 0 else 0
-            v_ma50 = ma50.iloc[-1] if len(ma50) > 0 else 0
-
-            for ax in [self.ax1, self.ax2]:
-                for spine in ax.spines.values():
-                    spine.set_edgecolor(COLOR_BORDER)
-                    spine.set_linewidth(1)
-
-            self.ax1.yaxis.set_major_locator(
-                MaxNLocator(nbins=6, prune='lower'))
-            self.ax2.yaxis.set_major_locator(
-                MaxNLocator(nbins=3, prune='upper'))
-
-            mc = mpf.make_marketcolors(
-                up=COLOR_GREEN, down=COLOR_RED, edge='inherit', wick='inherit',
-                volume={'up': "#2e845c", 'down': "#992935"}, alpha=1.0,
-            )
-            s = mpf.make_mpf_style(
-                marketcolors=mc, facecolor=COLOR_BG_MAIN, gridcolor='#333333', gridstyle='dotted',
-                rc={'axes.facecolor': COLOR_BG_MAIN, 'figure.facecolor': COLOR_BG_MAIN, 'axes.edgecolor': COLOR_BG_MAIN,
-                    'xtick.color': 'white', 'ytick.color': 'white', 'text.color': 'white', 'font.size': 8,
-                    'axes.labelcolor': 'white', 'lines.linewidth': 0.8, 'axes.grid': True, 'axes.grid.axis': 'both'}
-            )
+            self.chart.update((candles.pair, candles.interval), rows)
+        except Exception as e:
+            print(f"Chart Drawing Error: {e}")
 
-            mpf.plot(
-                df, type='candle', style=s, mav=(20, 50), mavcolors=['#00e5ff', '#ff9900'],
-                ax=self.ax1, volume=self.ax2, xrotation=0, datetime_format='%H:%M',
-                ylabel="", ylabel_lower="", scale_width_adjustment=dict(volume=0.5)
-            )
-            self.ax2.set_ylabel("")
-
-            self.ax1.text(0.01, 0.94, f"MA(20): {v_ma20:,.2f}", transform=self.ax1.transAxes,
-                          color='#00e5ff', fontsize=9, fontweight='bold', ha='left')
-            self.ax1.text(0.01, 0.89, f"MA(50): {v_ma50:,.2f}", transform=self.ax1.transAxes,
-                          color='#ff9900', fontsize=9, fontweight='bold', ha='left')
-
-            self.ax1.grid(True, linestyle='dotted', color='#333333', alpha=0.5)
-            self.ax1.yaxis.tick_right()
-            self.ax1.tick_params(axis='y', colors='white', labelsize=8, pad=5)
-            plt.setp(self.ax1.get_xticklabels(), visible=False)
-
-            last_price = df['close'].iloc[-1]
-            last_open = df['open'].iloc[-1]
-            color_tag = COLOR_GREEN if last_price >= last_open else COLOR_RED
-            self.ax1.axhline(last_price, color=color_tag,
-                             linestyle='--', linewidth=0.8, alpha=0.8)
-            self.ax1.text(
-                x=1.005, y=last_price, s=f"{last_price:,.2f}", color='white', fontsize=9, fontweight='bold',
-                va='center', ha='left', transform=self.ax1.get_yaxis_transform(),
-                bbox=dict(boxstyle="square,pad=0.2", facecolor=color_tag, edgecolor=COLOR_BG_MAIN, alpha=1.0), clip_on=False
-            )
+    def update_heatmap(self, heatmap):
+        try:
+            self.chart.update_heatmap(heatmap)
+        except Exception as e:
+            print(f"Heatmap Drawing Error: {e}")
 
-            self.ax2.yaxis.tick_right()
-            self.ax2.tick_params(axis='y', colors='white', labelsize=8, pad=5)
-            self.ax2.tick_params(axis='x', colors='white',
-                                 labelsize=8, labelbottom=True, pad=5)
-            self.ax2.grid(False)
-            for collection in self.ax2.collections:
-                collection.set_linewidth(0)
+    def toggle_heatmap(self, show):
+        self.chart.toggle_heatmap(show)
 
-            self.chart_canvas.draw()
+    def load_history(self, key, rows):
+        try:
+            self.chart.load_history(key, rows)
         except Exception as e:
-            print(f"Chart Drawing Error: {e}")
+            print(f"Chart History Error: {e}")
@@ -0,0 +1,86 @@
+import customtkinter as ctk
+from config import *
+
+
+class DepthLadder(ctk.CTkCanvas):
+    def __init__(self, parent, levels=ORDERBOOK_LEVELS, row_height=22):
+        super().__init__(parent, height=2 * levels * row_height,
+                         bg=COLOR_BG_PANEL, highlightthickness=0)
+        self.levels = levels
+        self.row_height = row_height
+        self.width = 1
+        self.items = []
+        self.state = []
+        self.fracs = []
+
+        for i in range(2 * levels):
+            is_bid = i >= levels
+            bar = self.create_rectangle(0, 0, 0, 0, outline="", state="hidden",
+                                        fill="#0f2e22" if is_bid else "#38141a")
+            price = self.create_text(5, 0, anchor="w", text="", font=("Consolas", 10, "bold"),
+                                     fill=COLOR_GREEN if is_bid else COLOR_RED)
+            qty = self.create_text(0, 0, anchor="e", text="", font=("Consolas", 10),
+                                   fill=COLOR_TEXT_MAIN)
+            self.items.append((bar, price, qty))
+            self.state.append([None, None, None])
+            self.fracs.append(0.0)
+
+        self._layout()
+        self.bind("<Configure>", self._on_configure)
+
+    def _on_configure(self, event):
+        if event.width == self.width:
+            return
+        self.width = max(event.width, 1)
+        self._layout()
+
+    def _layout(self):
+        h = self.row_height
+        for i, (bar, price, qty) in enumerate(self.items):
+            mid = i * h + h / 2
+            self.coords(price, 5, mid)
+            self.coords(qty, self.width - 5, mid)
+            self.state[i][2] = None
+            self._set_bar(i, self.fracs[i])
+
+    def _set_bar(self, i, frac):
+        self.fracs[i] = frac
+        bar_w = int(frac * self.width * 0.8)
+        if self.state[i][2] == bar_w:
+            return
+        self.state[i][2] = bar_w
+        bar = self.items[i][0]
+        if bar_w <= 0:
+            self.itemconfigure(bar, state="hidden")
+            return
+        y0 = i * self.row_height + 1
+        self.coords(bar, self.width - bar_w, y0, self.width, y0 + self.row_height - 2)
+        self.itemconfigure(bar, state="normal")
+
+    def _set_row(self, i, level, max_vol):
+        _, price_item, qty_item = self.items[i]
+        state = self.state[i]
+        if level is None:
+            price_text = qty_text = ""
+            frac = 0.0
+        else:
+            p, q = level
+            price_text = f"{p:,.2f}"
+            qty_text = f"{q:.4f}"
+            frac = q / max_vol
+
+        if state[0] != price_text:
+            state[0] = price_text
+            self.itemconfigure(price_item, text=price_text)
+        if state[1] != qty_text:
+            state[1] = qty_text
+            self.itemconfigure(qty_item, text=qty_text)
+        self._set_bar(i, frac)
+
+    def set_book(self, bids, asks, max_vol):
+        n = self.levels
+        for i in range(n):
+            k = n - 1 - i
+            self._set_row(i, asks[k] if k < len(asks) else None, max_vol)
+        for i in range(n):
+            self._set_row(n + i, bids[i] if i < len(bids) else None, max_vol)
@@ -1,6 +1,4 @@
 import customtkinter as ctk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from config import *
 
 
@@ -15,6 +13,10 @@ class LeftSidebar(ctk.CTkFrame):
         self.grid_rowconfigure(1, weight=7)
         self.grid_columnconfigure(0, weight=1)
 
+        self.comp_series = {}
+        self.comp_visible = True
+        self.comp_fig = None
+
         self._create_watchlist()
         self._create_comparison_graph()
 
@@ -81,41 +83,26 @@ class LeftSidebar(ctk.CTkFrame):
         ctk.CTkLabel(h, text="24h Change (%)", font=FONT_BOLD,
                      text_color=COLOR_TEXT_MAIN).pack(side="left")
 
-        self.comp_fig = plt.Figure(
+    def _build_comparison_figure(self):
+        # Built on the first visible update rather than at startup: the
+        # Matplotlib figure and its Tk canvas are the slowest part of this panel.
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.comp_fig = Figure(
             figsize=(3, 3), dpi=100, facecolor=COLOR_BG_PANEL)
         self.comp_ax = self.comp_fig.add_subplot(111)
         self.comp_ax.set_facecolor(COLOR_BG_PANEL)
-
-        self.comp_canvas = FigureCanvasTkAgg(
-            self.comp_fig, master=self.comp_frame)
-        self.comp_canvas.get_tk_widget().pack(fill="both", expand=True, padx=5, pady=5)
-
-    def update_watchlist(self, prices):
-        if not prices:
-            return
-        price_map = {x['symbol']: x['price'] for x in prices}
-        for coin, label in self.watchlist_items.items():
-            pair = f"{coin}USDT"
-            if pair in price_map:
-                p = float(price_map[pair])
-                label.configure(text=f"{p:,.2f}")
-
-    def update_comparison(self, data):
-        if not data:
-            return
-        self.comp_ax.clear()
-        self.comp_ax.set_facecolor(COLOR_BG_PANEL)
-
         self.comp_fig.subplots_adjust(
             left=0.15, right=0.95, top=0.82, bottom=0.08)
 
         colors = ['#00ff88', '#00d0ff', '#ff0055',
                   '#ffe600', '#aa00ff', '#ff8800', '#ffffff']
-        for i, (coin, vals) in enumerate(data.items()):
-            if len(vals) > 0:
-                c = colors[i % len(colors)]
-                self.comp_ax.plot(range(len(vals)), vals,
-                                  label=coin, color=c, linewidth=1.2, alpha=0.9)
+        self.comp_lines = {}
+        for i, coin in enumerate(DEFAULT_COINS):
+            line, = self.comp_ax.plot([], [], label=coin, color=colors[i % len(colors)],
+                                      linewidth=1.2, alpha=0.9)
+            self.comp_lines[coin] = line
 
         self.comp_ax.axhline(
             0, color='white', linestyle='--', linewidth=0.5, alpha=0.5)
@@ -135,10 +122,40 @@ class LeftSidebar(ctk.CTkFrame):
             handletextpad=0.4
         )
 
-        self.comp_canvas.draw()
+        self.comp_canvas = FigureCanvasTkAgg(
+            self.comp_fig, master=self.comp_frame)
+        self.comp_canvas.get_tk_widget().pack(fill="both", expand=True, padx=5, pady=5)
+
+    def update_watchlist(self, prices, symbols):
+        for pair in symbols:
+            label = self.watchlist_items.get(pair.replace("USDT", ""))
+            row = prices.get(pair)
+            if label is not None and row is not None:
+                label.configure(text=f"{row[0]:,.2f}")
+
+    def update_comparison(self, data):
+        self.comp_series.update(data)
+        if data and self.comp_visible:
+            self._draw_comparison(data if self.comp_fig is not None else self.comp_series)
+
+    def _draw_comparison(self, data):
+        if self.comp_fig is None:
+            self._build_comparison_figure()
+        for coin, vals in data.items():
+            line = self.comp_lines.get(coin)
+            if line is not None:
+                line.set_data(range(len(vals)), vals)
+
+        self.comp_ax.relim()
+        self.comp_ax.autoscale_view()
+        self.comp_canvas.draw_idle()
 
     def toggle_graph(self, show):
+        self.comp_visible = show
         if show:
             self.comp_frame.grid(row=1, column=0, sticky="nsew", pady=(5, 0))
+            # Updates that arrived while hidden were only stored.
+            if self.comp_series:
+                self._draw_comparison(self.comp_series)
         else:
             self.comp_frame.grid_remove()
@@ -0,0 +1,85 @@
+import customtkinter as ctk
+from components.chart_panel import ChartPanel
+from config import *
+
+
+class PaneView(ctk.CTkFrame):
+    def __init__(self, parent, pair, interval, callback_change_pair, callback_tf_change, callback_history,
+                 show_latency=False):
+        super().__init__(parent, fg_color="transparent")
+        self.pair = pair
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        header = ctk.CTkFrame(self, height=30, fg_color=COLOR_BG_PANEL, corner_radius=0)
+        header.grid(row=0, column=0, sticky="ew")
+
+        self.pair_menu = ctk.CTkOptionMenu(
+            header,
+            values=[f"{c} / USDT" for c in DEFAULT_COINS],
+            command=lambda value: callback_change_pair(f"{value.split(' / ')[0]}USDT"),
+            fg_color=COLOR_BG_PANEL, button_color=COLOR_BG_PANEL,
+            text_color=COLOR_TEXT_MAIN, font=("Roboto", 12, "bold"), width=110
+        )
+        self.pair_menu.set(f"{pair.replace('USDT', '')} / USDT")
+        self.pair_menu.pack(side="left", padx=5)
+
+        self.lbl_price = ctk.CTkLabel(header, text="---", font=("Roboto", 12, "bold"), text_color=COLOR_GREEN)
+        self.lbl_price.pack(side="left", padx=10)
+        self.lbl_change = ctk.CTkLabel(header, text="", font=("Arial", 10, "bold"), text_color=COLOR_TEXT_SUB)
+        self.lbl_change.pack(side="left")
+
+        self.lbl_latency = None
+        self.latency_text = None
+        if show_latency:
+            self.lbl_latency = ctk.CTkLabel(header, text="", font=("Consolas", 10), text_color=COLOR_TEXT_SUB)
+            self.lbl_latency.pack(side="right", padx=10)
+
+        self.chart_panel = ChartPanel(self, callback_tf_change, callback_history=callback_history,
+                                      interval=interval)
+        self.chart_panel.grid(row=1, column=0, sticky="nsew")
+
+    def set_pair(self, pair):
+        self.pair = pair
+        self.lbl_price.configure(text="---", text_color=COLOR_GREEN)
+        self.lbl_change.configure(text="")
+
+    def update_ticker(self, ticker):
+        if not ticker:
+            return
+        color = COLOR_GREEN if ticker.change_pct >= 0 else COLOR_RED
+        self.lbl_price.configure(text=f"{ticker.last:,.2f}", text_color=color)
+        self.lbl_change.configure(text=f"{ticker.change_pct:+.2f}%", text_color=color)
+
+    def update_latency(self, summaries):
+        if self.lbl_latency is None:
+            return
+        parts = [f"{name} {s['p50_ms']:.0f}/{s['p99_ms']:.0f}"
+                 for name, s in summaries.items() if s is not None]
+        text = "lag p50/p99 ms  " + "  ".join(parts) if parts else ""
+        if text != self.latency_text:
+            self.latency_text = text
+            self.lbl_latency.configure(text=text)
+
+
+class PaneGrid(ctk.CTkFrame):
+    def __init__(self, parent, rows, cols, panes, callback_change_pair, callback_tf_change, callback_history,
+                 show_latency=False):
+        super().__init__(parent, fg_color="transparent")
+        self.views = []
+
+        for r in range(rows):
+            self.grid_rowconfigure(r, weight=1, uniform="pane")
+        for c in range(cols):
+            self.grid_columnconfigure(c, weight=1, uniform="pane")
+
+        for i, pane in enumerate(panes):
+            view = PaneView(
+                self, pane.pair, pane.interval,
+                lambda pair, i=i: callback_change_pair(i, pair),
+                lambda tf, i=i: callback_tf_change(i, tf),
+                lambda key, end_time, i=i: callback_history(i, key, end_time),
+                show_latency=show_latency)
+            view.grid(row=i // cols, column=i % cols, sticky="nsew", padx=3, pady=3)
+            self.views.append(view)
@@ -1,5 +1,6 @@
 import customtkinter as ctk
 from config import *
+from components.depth_ladder import DepthLadder
 
 
 class RightSidebar(ctk.CTkFrame):
@@ -23,12 +24,8 @@ class RightSidebar(ctk.CTkFrame):
 
         self.ob_container = ctk.CTkFrame(self.ob_frame, fg_color="transparent")
         self.ob_container.pack(fill="both", expand=True)
-        self.ob_rows = []
-        for _ in range(ROW_LIMIT):
-            c = ctk.CTkCanvas(self.ob_container, height=20,
-                              bg=COLOR_BG_PANEL, highlightthickness=0)
-            c.pack(fill="x", padx=5, pady=1)
-            self.ob_rows.append(c)
+        self.ladder = DepthLadder(self.ob_container, ORDERBOOK_LEVELS)
+        self.ladder.pack(fill="x", padx=5, pady=1)
 
     def _create_trades(self):
         self.tr_frame = ctk.CTkFrame(
@@ -41,11 +38,22 @@ class RightSidebar(ctk.CTkFrame):
         self.tr_container = ctk.CTkFrame(self.tr_frame, fg_color="transparent")
         self.tr_container.pack(fill="both", expand=True)
         self.tr_labels = []
-        for _ in range(ROW_LIMIT):
+        self.tr_state = []
+        for _ in range(TRADE_ROWS):
             l = ctk.CTkLabel(self.tr_container, text="",
                              font=FONT_UNIFIED, anchor="w")
             l.pack(fill="x", padx=10, pady=0)
             self.tr_labels.append(l)
+            self.tr_state.append(None)
+
+        self.flow_container = ctk.CTkFrame(self.tr_frame, fg_color="transparent")
+        self.flow_container.pack(fill="x", pady=(5, 5))
+        self.flow_labels = {}
+        for label, _ in TRADE_FLOW_WINDOWS:
+            l = ctk.CTkLabel(self.flow_container, text="", font=("Consolas", 10),
+                             text_color=COLOR_TEXT_SUB, anchor="w", justify="left")
+            l.pack(fill="x", padx=10, pady=0)
+            self.flow_labels[label] = l
 
     def toggle_orderbook(self, show):
         if show:
@@ -59,45 +67,18 @@ class RightSidebar(ctk.CTkFrame):
         else:
             self.tr_frame.grid_remove()
 
-    def update_orderbook(self, depth_data):
-        if not depth_data or not self.ob_frame.winfo_viewable():
+    def update_orderbook(self, book):
+        if not self.ob_frame.winfo_viewable():
             return
 
-        bids = depth_data.get('bids', [])
-        asks = depth_data.get('asks', [])
+        levels = self.ladder.levels
+        bids, asks = book.top(levels)
         if not bids or not asks:
             return
 
-        max_vol_bid = sum([float(x[1]) for x in bids[:ROW_LIMIT]])
-        max_vol_ask = sum([float(x[1]) for x in asks[:ROW_LIMIT]])
-        max_vol = max(max_vol_bid, max_vol_ask) if max_vol_bid > 0 else 1.0
-
-        half = ROW_LIMIT // 2
-        asks_slice = asks[:half][::-1]
-        bids_slice = bids[:half]
-
-        display_data = [(float(p), float(q), False) for p, q in asks_slice] + \
-                       [(float(p), float(q), True) for p, q in bids_slice]
-
-        for i, canvas in enumerate(self.ob_rows):
-            canvas.delete("all")
-            if i < len(display_data):
-                price, vol, is_bid = display_data[i]
-                self._draw_bar(canvas, price, vol, max_vol, is_bid)
-
-    def _draw_bar(self, canvas, p, q, max_v, is_bid):
-        w = canvas.winfo_width()
-        h = canvas.winfo_height()
-        bar_w = (q / max_v) * w * 0.8
-
-        color_bg = "#0f2e22" if is_bid else "#38141a"
-        color_fg = COLOR_GREEN if is_bid else COLOR_RED
-
-        canvas.create_rectangle(w - bar_w, 0, w, h, fill=color_bg, outline="")
-        canvas.create_text(
-            5, h/2, anchor="w", text=f"{p:,.2f}", fill=color_fg, font=("Consolas", 10, "bold"))
-        canvas.create_text(
-            w-5, h/2, anchor="e", text=f"{q:.4f}", fill=COLOR_TEXT_MAIN, font=("Consolas", 10))
+        bid_depth, ask_depth = book.cumulative(levels)
+        max_vol = max(bid_depth[-1], ask_depth[-1]) if bid_depth[-1] > 0 else 1.0
+        self.ladder.set_book(bids, asks, max_vol)
 
     def update_trades(self, trades_list):
         if not trades_list or not self.tr_frame.winfo_viewable():
@@ -106,11 +87,32 @@ class RightSidebar(ctk.CTkFrame):
         for i, lbl in enumerate(self.tr_labels):
             if i < len(trades_list):
                 t = trades_list[i]
-                p = float(t['p'])
-                q = float(t['q'])
-                is_buyer_maker = t['m']
-                color = COLOR_RED if is_buyer_maker else COLOR_GREEN
-
-                lbl.configure(text=f"{p:,.2f}      {q:.4f}", text_color=color)
+                color = COLOR_RED if t.is_buyer_maker else COLOR_GREEN
+                state = (f"{t.price:,.2f}      {t.qty:.4f}", color)
             else:
+                state = ("", None)
+
+            if self.tr_state[i] == state:
+                continue
+            self.tr_state[i] = state
+            if state[1] is None:
                 lbl.configure(text="")
+            else:
+                lbl.configure(text=state[0], text_color=state[1])
+
+    def update_trade_stats(self, stats):
+        if not self.tr_frame.winfo_viewable():
+            return
+
+        for label, st in stats.items():
+            lbl = self.flow_labels.get(label)
+            if lbl is None:
+                continue
+            if st['count']:
+                big = st['largest']
+                text = (f"{label:<3}VWAP {st['vwap']:,.2f}  n {st['count']}\n"
+                        f"   B {st['buy_volume']:.3f}  S {st['sell_volume']:.3f}  max {big[1]:.4f}")
+            else:
+                text = f"{label:<3}no trades\n"
+            if lbl.cget("text") != text:
+                lbl.configure(text=text)
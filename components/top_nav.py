@@ -1,11 +1,27 @@
 import customtkinter as ctk
-from PIL import Image
 import os
 from config import *
 
 
+_logos = {}
+
+
+def load_logo(symbol):
+    # Decoded and wrapped once per process; pair switches reuse the CTkImage.
+    if symbol not in _logos:
+        path = os.path.join(ASSET_DIR, f"{symbol.lower()}.png")
+        image = None
+        if os.path.exists(path):
+            from PIL import Image
+            with Image.open(path) as pil_image:
+                pil_image = pil_image.resize(LOGO_SIZE)
+            image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=LOGO_SIZE)
+        _logos[symbol] = image
+    return _logos[symbol]
+
+
 class TopNavPanel(ctk.CTkFrame):
-    def __init__(self, parent, callback_change_pair):
+    def __init__(self, parent, callback_change_pair, show_latency=False):
         super().__init__(parent, height=45, fg_color=COLOR_BG_PANEL, corner_radius=0)
         self.callback_change_pair = callback_change_pair
 
@@ -32,6 +48,22 @@ class TopNavPanel(ctk.CTkFrame):
         self.lbl_low = self._create_stat_header("Low", "---")
         self.lbl_vol = self._create_stat_header("Vol", "---")
 
+        self.lbl_latency = None
+        self.latency_text = None
+        if show_latency:
+            self.lbl_latency = ctk.CTkLabel(self, text="", font=("Consolas", 10),
+                                            text_color=COLOR_TEXT_SUB, justify="right")
+            self.lbl_latency.pack(side="right", padx=10)
+
+        self.after(STARTUP_DEFER_MS, self._preload_logos)
+
+    def _preload_logos(self):
+        for coin in DEFAULT_COINS:
+            try:
+                load_logo(coin)
+            except Exception as e:
+                print(f"Logo error: {e}")
+
     def _create_stat_header(self, title, val):
         f = ctk.CTkFrame(self, fg_color="transparent")
         f.pack(side="left", padx=5)
@@ -57,13 +89,10 @@ class TopNavPanel(ctk.CTkFrame):
 
     def update_logo(self, symbol):
         try:
-            image_path = f"{symbol}.png"
+            image = load_logo(symbol)
 
-            if os.path.exists(image_path):
-                pil_image = Image.open(image_path)
-                pil_image = pil_image.resize((25, 25))
-                self.logo_image = ctk.CTkImage(
-                    light_image=pil_image, dark_image=pil_image, size=(25, 25))
+            if image is not None:
+                self.logo_image = image
                 self.logo_label.configure(image=self.logo_image, text="")
             else:
                 self.logo_label.configure(
@@ -72,19 +101,29 @@ class TopNavPanel(ctk.CTkFrame):
             print(f"Logo error: {e}")
             self.logo_label.configure(image=None, text=symbol)
 
-    def update_data(self, ticker_data):
-        if not ticker_data:
+    def update_data(self, ticker):
+        if not ticker:
             return
-        p = float(ticker_data['lastPrice'])
-        c = float(ticker_data['priceChangePercent'])
+        p = ticker.last
+        c = ticker.change_pct
         color = COLOR_GREEN if c >= 0 else COLOR_RED
 
         self.lbl_price.configure(text=f"{p:,.2f}", text_color=color)
         self.lbl_change.configure(text=f"{c:+.2f}%", text_color=color)
-        self.lbl_high.configure(text=f"{float(ticker_data['highPrice']):,.2f}")
-        self.lbl_low.configure(text=f"{float(ticker_data['lowPrice']):,.2f}")
+        self.lbl_high.configure(text=f"{ticker.high:,.2f}")
+        self.lbl_low.configure(text=f"{ticker.low:,.2f}")
         self.lbl_vol.configure(
-            text=f"{float(ticker_data['quoteVolume'])/1000000:.2f}M")
+            text=f"{ticker.quote_volume/1000000:.2f}M")
+
+    def update_latency(self, summaries):
+        if self.lbl_latency is None:
+            return
+        parts = [f"{name} {s['p50_ms']:.0f}/{s['p99_ms']:.0f}"
+                 for name, s in summaries.items() if s is not None]
+        text = "lag p50/p99 ms  " + "  ".join(parts) if parts else ""
+        if text != self.latency_text:
+            self.latency_text = text
+            self.lbl_latency.configure(text=text)
 
     def set_selected_symbol(self, symbol):
         self.ticker_btn.set(f"{symbol} / USDT")
@@ -1,3 +1,5 @@
+import os
+
 COLOR_BG_MAIN = "#0b0e11"
 COLOR_BG_PANEL = "#181a20"
 COLOR_TEXT_MAIN = "#eaecef"
@@ -13,9 +15,63 @@ FONT_BOLD = ("Roboto", 13, "bold")
 SIDE_PAD = 15
 
 ROW_LIMIT = 10
+CHART_DEFAULT_CANDLES = 60
+CHART_MIN_CANDLE_PX = 3
+CHART_MAX_HISTORY = 500_000
+HISTORY_PAGE_SIZE = 1000
+HISTORY_PAGES_PER_LOAD = 8
+INDICATORS_ENABLED = ("MA",)
+ORDERBOOK_LEVELS = ROW_LIMIT // 2
+ORDERBOOK_RESYNC_DELAY = 1.0
+ORDERBOOK_RESYNC_MAX_DELAY = 60
+ORDERBOOK_RESYNC_ATTEMPTS = 8
+TRADE_ROWS = ROW_LIMIT
+RENDER_FPS = 30
+RENDER_BUDGET_MS = 12
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_SIZE = (25, 25)
+STARTUP_DEFER_MS = 30
+HTTP_MAX_IN_FLIGHT = 8
+REST_WEIGHT_LIMIT = 6000
+REST_WEIGHT_SHARES = (0.95, 0.85, 0.6)
+REST_MAX_WAIT = 30
+CANDLE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "candles")
+CANDLE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CANDLE_CACHE_MAX_ROWS = 5000
+TRADE_FLOW_CAPACITY = 65536
+TRADE_FLOW_WINDOWS = (("1s", 1_000), ("1m", 60_000), ("5m", 300_000))
+RECORD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+RECORD_SEGMENT_BYTES = 64 * 1024 * 1024
+RECORD_FLUSH_SECONDS = 1.0
+BINANCE_REST_URL = os.environ.get("BINANCE_REST_URL", "https://api.binance.com/api/v3")
+BINANCE_STREAM_URL = os.environ.get("BINANCE_STREAM_URL", "wss://stream.binance.com:9443/stream")
+STREAM_STALE_SECONDS = 15
+STREAM_MAX_BACKOFF = 30
+KLINE_LRU_MAX_ROWS = 20000
+KLINE_LRU_TTL = 30
+KLINE_PREFETCH_INTERVAL_MS = 30000
+LATENCY_SAMPLES = 2048
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+METRICS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics", "latency.prom")
+METRICS_EXPORT_SECONDS = 10
+LATENCY_OVERLAY = False
+INGEST_PROCESS = False
+INGEST_RING_CAPACITY = 16384
+INGEST_DEPTH_LEVELS = 100
+INGEST_POLL_MS = 2
+INGEST_HEARTBEAT_TIMEOUT = 10
+HEATMAP_ENABLED = True
+HEATMAP_PRICE_BUCKETS = 200
+HEATMAP_TIME_BUCKETS = 720
+HEATMAP_BUCKET_MS = 5_000
+HEATMAP_STEP_BPS = 1
+HEATMAP_LEVELS = 500
+HEATMAP_SAMPLE_MS = 100
+HEATMAP_ALPHA = 0.55
 SIDEBAR_WIDTH = 260
 
 DEFAULT_COINS = ["BTC", "ETH", "SOL", "BNB", "ADA", "XRP", "DOGE"]
 DEFAULT_SYMBOL = "BTC"
 DEFAULT_PAIR = "BTCUSDT"
 DEFAULT_INTERVAL = "1h"
+WORKSPACE_LAYOUT = "2x2"
@@ -0,0 +1,90 @@
+import argparse
+import json
+import time
+from config import *
+from utils.binance_api import BinanceAPI
+from utils.ingest_process import ProcessStream
+from utils.latency import MetricsExporter
+from utils.market_engine import MarketEngine, TOPICS
+from utils.recording import start_recording, start_replay
+
+
+def format_report(snap):
+    engine = snap['engine']
+    lines = [f"[{engine['uptime_s']:8.1f}s] {snap['pair']} {snap['interval']}  "
+             f"bid {snap['best_bid']}  ask {snap['best_ask']}  candles {snap['candles']}  "
+             f"reconnects {snap['socket'].get('reconnects', 0)}  "
+             f"dropped {snap['socket'].get('dropped_stale', 0)}  "
+             f"weight {snap['rest']['weight']['used']}/{snap['rest']['weight']['limit']}"]
+    for kind, s in sorted(engine['streams'].items()):
+        lines.append(f"  {kind:<15} {s['count']:>9} msgs {s['rate']:>8.1f}/s   "
+                     f"latency p50 {s['latency_p50_ms']:7.1f} ms  p99 {s['latency_p99_ms']:7.1f} ms  "
+                     f"max {s['latency_max_ms']:7.1f} ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the market data engine without the GUI.")
+    parser.add_argument("--pair", default=DEFAULT_PAIR)
+    parser.add_argument("--interval", default=DEFAULT_INTERVAL)
+    parser.add_argument("--duration", type=float, default=0, help="seconds to run, 0 runs until Ctrl+C")
+    parser.add_argument("--every", type=float, default=5, help="seconds between reports")
+    parser.add_argument("--output", help="append JSON lines to this file instead of printing a table")
+    parser.add_argument("--record", nargs="?", const=RECORD_DIR, help="record raw frames to this directory")
+    parser.add_argument("--replay", help="play back a recording (segment file or directory) instead of going live")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier, 0 plays as fast as possible")
+    parser.add_argument("--loop", action="store_true", help="restart the replay when it reaches the end")
+    parser.add_argument("--ingest-process", action="store_true",
+                        help="decode the WebSocket feed in a separate worker process")
+    parser.add_argument("--metrics", nargs="?", const=METRICS_FILE, help="export latency histograms in Prometheus text format")
+    args = parser.parse_args()
+
+    recorder, stream = None, None
+    if args.replay:
+        stream = start_replay(args.replay, args.speed, args.loop)
+    elif args.record:
+        recorder, stream = start_recording(args.record)
+    elif args.ingest_process or INGEST_PROCESS:
+        stream = ProcessStream()
+
+    engine = MarketEngine(args.pair.upper(), args.interval, DEFAULT_COINS, stream=stream)
+    for topic in TOPICS:
+        engine.subscribe(topic, lambda payload: None)
+    metrics = None
+    if args.metrics:
+        metrics = MetricsExporter(engine.tracer, args.metrics, METRICS_EXPORT_SECONDS)
+        metrics.start()
+    engine.start()
+
+    out = open(args.output, "a") if args.output else None
+    deadline = time.monotonic() + args.duration if args.duration else None
+    try:
+        done = False
+        while not done and (deadline is None or time.monotonic() < deadline):
+            wait = args.every if deadline is None else min(args.every, max(deadline - time.monotonic(), 0))
+            if args.replay:
+                done = stream.finished.wait(wait)
+            else:
+                time.sleep(wait)
+            snap = engine.snapshot()
+            if out:
+                out.write(json.dumps(dict(snap, time=time.time())) + "\n")
+                out.flush()
+            else:
+                print(format_report(snap), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+        BinanceAPI.http.close()
+        BinanceAPI.store.flush()
+        if metrics:
+            metrics.stop()
+        if recorder:
+            recorder.close()
+        if out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
+import argparse
 import customtkinter as ctk
-import threading
 from collections import deque
 from config import *
-from utils.binance_api import BinanceAPI, BinanceStream
+from utils.market_engine import MarketEngine, TOPICS
+from utils.render_scheduler import RenderScheduler
 from components.top_nav import TopNavPanel
-from components.chart_panel import ChartPanel
 from components.left_sidebar import LeftSidebar
 from components.right_sidebar import RightSidebar
 
@@ -13,24 +13,23 @@ ctk.set_default_color_theme("dark-blue")
 
 
 class CryptoTerminal(ctk.CTk):
-    def __init__(self):
+    def __init__(self, stream=None, show_latency=LATENCY_OVERLAY, metrics_path=None):
         super().__init__()
         self.title("Cryptocurrency Dashboard")
         self.geometry("1600x750")
         self.configure(fg_color=COLOR_BG_MAIN)
 
         self.symbol = DEFAULT_SYMBOL
-        self.pair = DEFAULT_PAIR
-        self.interval = DEFAULT_INTERVAL
         self.is_running = True
 
+        self.engine = MarketEngine(DEFAULT_PAIR, DEFAULT_INTERVAL, DEFAULT_COINS, stream=stream)
         self.trades_buffer = deque(maxlen=25)
 
         self.grid_rowconfigure(0, weight=0)
         self.grid_rowconfigure(1, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
-        self.top_nav = TopNavPanel(self, self.change_pair)
+        self.top_nav = TopNavPanel(self, self.change_pair, show_latency=show_latency)
 
         self.main_area = ctk.CTkFrame(self, fg_color="transparent")
         self.main_area.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
@@ -46,6 +45,42 @@ class CryptoTerminal(ctk.CTk):
         self.right_panel = RightSidebar(self.main_area)
         self.right_panel.grid(row=0, column=2, sticky="nsew", padx=(10, 0))
 
+        self.chart_panel = None
+
+        self.scheduler = RenderScheduler(self, RENDER_FPS, tracer=self.engine.tracer)
+        self.scheduler.register('kline', self._render_chart)
+        self.scheduler.register('ticker', self._render_ticker)
+        self.scheduler.register('depth', self._render_orderbook)
+        self.scheduler.register('comparison', self._render_comparison)
+        self.scheduler.register('watchlist', self._render_watchlist, append=True)
+        self.scheduler.register(
+            'aggTrade', self._render_trades, append=True, maxlen=self.trades_buffer.maxlen)
+        self.scheduler.start()
+
+        for topic in TOPICS:
+            self.engine.subscribe(topic, lambda payload, t=topic: self.scheduler.push(t, payload))
+        self.metrics = None
+        if metrics_path:
+            from utils.latency import MetricsExporter
+            self.metrics = MetricsExporter(self.engine.tracer, metrics_path, METRICS_EXPORT_SECONDS)
+            self.metrics.start()
+
+        self.engine.start()
+        self.loop_trade_stats()
+        if show_latency:
+            self.loop_latency()
+
+        # Let the window shell paint while the first REST calls are in flight,
+        # then build the Matplotlib chart.
+        self.after(STARTUP_DEFER_MS, self._build_chart_panel)
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def _build_chart_panel(self):
+        if not self.is_running:
+            return
+        from components.chart_panel import ChartPanel
+
         toggle_funcs = {
             "overview": self.left_panel.toggle_graph,
             "orderbook": self.right_panel.toggle_orderbook,
@@ -53,16 +88,10 @@ class CryptoTerminal(ctk.CTk):
         }
 
         self.chart_panel = ChartPanel(
-            self.main_area, self.change_interval, callbacks_toggle=toggle_funcs)
+            self.main_area, self.change_interval, callbacks_toggle=toggle_funcs,
+            callback_history=self._load_history)
         self.chart_panel.grid(row=0, column=1, sticky="nsew")
-
-        self.ws_manager = BinanceStream(self.handle_stream_data)
-
-        self.loop_chart()
-        self.loop_comparison()
-        self.ws_manager.start(self.pair)
-
-        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.scheduler.push('kline', self.engine.candles)
 
     def toggle_left_sidebar(self, is_visible):
         if is_visible:
@@ -72,88 +101,235 @@ class CryptoTerminal(ctk.CTk):
 
     def on_close(self):
         self.is_running = False
-        self.ws_manager.stop()
+        self.scheduler.stop()
+        self.engine.stop()
+        if self.metrics:
+            self.metrics.stop()
         self.destroy()
 
     def change_pair(self, new_pair_str, symbol=None):
         if symbol:
             self.symbol = symbol
-            self.pair = f"{symbol}USDT"
+            pair = f"{symbol}USDT"
         else:
             if " / " in new_pair_str:
                 sym = new_pair_str.split(" / ")[0]
                 self.symbol = sym
-                self.pair = f"{sym}USDT"
+                pair = f"{sym}USDT"
             else:
-                self.pair = new_pair_str
+                pair = new_pair_str
                 self.symbol = new_pair_str.replace("USDT", "")
 
         self.top_nav.update_logo(self.symbol)
         if hasattr(self.top_nav, 'ticker_btn'):
             self.top_nav.ticker_btn.set(f"{self.symbol} / USDT")
 
-        self._fetch_chart()
         self.trades_buffer.clear()
-        self.ws_manager.start(self.pair)
+        # Drop the old pair's pending frames first: set_pair pushes the new
+        # pair's cached candles synchronously and they must survive.
+        self.scheduler.discard()
+        self.engine.set_pair(pair)
 
     def change_interval(self, new_tf):
-        self.interval = new_tf
-        self._fetch_chart()
+        self.engine.set_interval(new_tf)
 
-    def loop_chart(self):
+    def _load_history(self, key, end_time):
+        def on_rows(rows):
+            if self.is_running and self.chart_panel is not None:
+                self.after(0, lambda: self.chart_panel.load_history(key, rows))
+
+        self.engine.load_history(key, end_time, on_rows)
+
+    def _render_watchlist(self, symbols):
+        self.left_panel.update_watchlist(self.engine.prices, set(symbols))
+
+    def _render_comparison(self, feed):
+        self.left_panel.update_comparison(feed.take_changes())
+
+    def _render_chart(self, candles):
+        if self.chart_panel is not None and candles is self.engine.candles:
+            self.chart_panel.update_chart(candles)
+
+    def _render_ticker(self, ticker):
+        if ticker.symbol == self.engine.pair:
+            self.top_nav.update_data(ticker)
+
+    def _render_orderbook(self, book):
+        if book is self.engine.order_book:
+            self.right_panel.update_orderbook(book)
+            if self.chart_panel is not None:
+                self.chart_panel.update_heatmap(self.engine.heatmap)
+
+    def _render_trades(self, new_trades):
+        for t in new_trades:
+            if t.symbol == self.engine.pair:
+                self.trades_buffer.appendleft(t)
+        self.right_panel.update_trades(list(self.trades_buffer))
+
+    def loop_trade_stats(self):
         if not self.is_running:
             return
-        threading.Thread(target=self._fetch_chart, daemon=True).start()
-        self.after(60000, self.loop_chart)
-
-    def _fetch_chart(self):
-        df = BinanceAPI.get_klines(self.pair, self.interval)
-        if not df.empty:
-            self.after(0, lambda: self.chart_panel.update_chart(df))
+        self.right_panel.update_trade_stats(self.engine.trade_flow.stats())
+        self.after(500, self.loop_trade_stats)
 
-    def loop_comparison(self):
+    def loop_latency(self):
         if not self.is_running:
             return
-        threading.Thread(target=self._fetch_comp, daemon=True).start()
-        self.after(5000, self.loop_comparison)
-
-    def _fetch_comp(self):
-        all_prices = BinanceAPI.get_all_prices()
-        comp_data = BinanceAPI.get_comparison_data(DEFAULT_COINS)
-        self.after(0, lambda: self._update_left_panel(all_prices, comp_data))
-
-    def _update_left_panel(self, all_prices, comp_data):
-        self.left_panel.update_watchlist(all_prices)
-        if hasattr(self.left_panel, 'update_comparison'):
-            self.left_panel.update_comparison(comp_data)
-        elif hasattr(self.left_panel, 'update_graph'):
-            self.left_panel.update_graph(comp_data)
-
-    def handle_stream_data(self, payload):
-        if not payload or 'data' not in payload:
+        tracer = self.engine.tracer
+        self.top_nav.update_latency({
+            "book": tracer.summary('total', 'depth'),
+            "chart": tracer.summary('total', 'kline'),
+            "trades": tracer.summary('total', 'aggTrade'),
+            "ticker": tracer.summary('total', 'ticker'),
+        })
+        self.after(1000, self.loop_latency)
+
+
+class WorkspaceTerminal(ctk.CTk):
+    # Several charts at once: every pane reads from one Workspace (one socket,
+    # one candle cache) and all of them are painted through one render budget.
+    def __init__(self, rows, cols, stream=None, show_latency=LATENCY_OVERLAY, metrics_path=None):
+        super().__init__()
+        self.title("Cryptocurrency Dashboard")
+        self.geometry("1600x900")
+        self.configure(fg_color=COLOR_BG_MAIN)
+        self.is_running = True
+
+        from utils.workspace import Workspace
+        from components.pane_grid import PaneGrid
+
+        self.workspace = Workspace(stream)
+        self.panes = [self.workspace.open_pane(f"{DEFAULT_COINS[i % len(DEFAULT_COINS)]}USDT", DEFAULT_INTERVAL)
+                      for i in range(rows * cols)]
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.pane_grid = PaneGrid(self, rows, cols, self.panes, self.change_pair, self.change_interval,
+                                  self._load_history, show_latency=show_latency)
+        self.pane_grid.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+
+        self.scheduler = RenderScheduler(self, RENDER_FPS, tracer=self.workspace.tracer,
+                                         budget_ms=RENDER_BUDGET_MS)
+        for i, pane in enumerate(self.panes):
+            self.scheduler.register(pane.key('kline'), lambda candles, i=i: self._render_chart(i, candles))
+            self.scheduler.register(pane.key('ticker'), lambda feed, i=i: self._render_ticker(i, feed))
+            self.scheduler.register(pane.key('depth'), lambda feed, i=i: self._render_heatmap(i, feed))
+        self.scheduler.start()
+
+        for topic in ('kline', 'ticker', 'depth'):
+            self.workspace.subscribe(topic, lambda payload, t=topic: self._route(t, payload))
+        self.metrics = None
+        if metrics_path:
+            from utils.latency import MetricsExporter
+            self.metrics = MetricsExporter(self.workspace.tracer, metrics_path, METRICS_EXPORT_SECONDS)
+            self.metrics.start()
+
+        self.workspace.start()
+        for pane in self.panes:
+            self.scheduler.push(pane.key('kline'), pane.candles)
+        if show_latency:
+            self.loop_latency()
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def _route(self, topic, payload):
+        # Several panes can share one payload (same pair or same series).
+        for pane in self.panes:
+            if pane.shows(topic, payload):
+                self.scheduler.push(pane.key(topic), payload)
+
+    def on_close(self):
+        self.is_running = False
+        self.scheduler.stop()
+        self.workspace.stop()
+        if self.metrics:
+            self.metrics.stop()
+        self.destroy()
+
+    def change_pair(self, i, pair):
+        self.pane_grid.views[i].set_pair(pair)
+        self.workspace.set_pair(self.panes[i], pair)
+        pane = self.panes[i]
+        if pane.feed.ticker is not None:
+            self.scheduler.push(pane.key('ticker'), pane.feed)
+
+    def change_interval(self, i, tf):
+        self.workspace.set_interval(self.panes[i], tf)
+
+    def _load_history(self, i, key, end_time):
+        def on_rows(rows):
+            if self.is_running:
+                self.after(0, lambda: self.pane_grid.views[i].chart_panel.load_history(key, rows))
+
+        self.workspace.load_history(key, end_time, on_rows)
+
+    def _render_chart(self, i, candles):
+        if candles is self.panes[i].candles:
+            self.pane_grid.views[i].chart_panel.update_chart(candles)
+
+    def _render_ticker(self, i, feed):
+        if feed is self.panes[i].feed:
+            self.pane_grid.views[i].update_ticker(feed.ticker)
+
+    def _render_heatmap(self, i, feed):
+        if feed is self.panes[i].feed:
+            self.pane_grid.views[i].chart_panel.update_heatmap(feed.heatmap)
+
+    def loop_latency(self):
+        if not self.is_running:
             return
-        stream_name = payload['stream']
-        data = payload['data']
-        self.after(0, lambda: self._update_ui_from_ws(stream_name, data))
-
-    def _update_ui_from_ws(self, stream, data):
-        if 'ticker' in stream:
-            ticker_info = {
-                'lastPrice': data['c'],
-                'priceChangePercent': data['P'],
-                'highPrice': data['h'],
-                'lowPrice': data['l'],
-                'volume': data['v'],
-                'quoteVolume': data['q']
-            }
-            self.top_nav.update_data(ticker_info)
-        elif 'depth' in stream:
-            self.right_panel.update_orderbook(data)
-        elif 'aggTrade' in stream:
-            self.trades_buffer.appendleft(data)
-            self.right_panel.update_trades(list(self.trades_buffer))
+        tracer = self.workspace.tracer
+        for pane, view in zip(self.panes, self.pane_grid.views):
+            view.update_latency({
+                "chart": tracer.summary('total', pane.key('kline')),
+                "book": tracer.summary('total', pane.key('depth')),
+                "ticker": tracer.summary('total', pane.key('ticker')),
+            })
+        self.after(1000, self.loop_latency)
+
+
+def pane_layout(text):
+    rows, sep, cols = text.lower().partition("x")
+    if not sep or not rows.isdigit() or not cols.isdigit() or int(rows) < 1 or int(cols) < 1:
+        raise argparse.ArgumentTypeError(f"expected RxC, e.g. 2x2, got {text!r}")
+    return int(rows), int(cols)
 
 
 if __name__ == "__main__":
-    app = CryptoTerminal()
+    parser = argparse.ArgumentParser(description="Cryptocurrency Dashboard")
+    parser.add_argument("--record", nargs="?", const=RECORD_DIR, help="record raw frames to this directory")
+    parser.add_argument("--replay", help="play back a recording instead of connecting to Binance")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier, 0 plays as fast as possible")
+    parser.add_argument("--latency", action="store_true", help="show per-stream exchange-to-screen latency in the top bar")
+    parser.add_argument("--ingest-process", action="store_true",
+                        help="decode the WebSocket feed in a separate worker process")
+    parser.add_argument("--metrics", nargs="?", const=METRICS_FILE, help="export latency histograms in Prometheus text format")
+    parser.add_argument("--panes", nargs="?", const=pane_layout(WORKSPACE_LAYOUT), type=pane_layout, metavar="RxC",
+                        help="show a grid of charts for several pairs, e.g. 2x2")
+    args = parser.parse_args()
+
+    recorder, stream = None, None
+    if args.replay:
+        from utils.recording import start_replay
+        stream = start_replay(args.replay, args.speed)
+    elif args.record:
+        from utils.recording import start_recording
+        recorder, stream = start_recording(args.record)
+    elif args.ingest_process or INGEST_PROCESS:
+        from utils.ingest_process import ProcessStream
+        stream = ProcessStream()
+
+    if args.panes:
+        rows, cols = args.panes
+        app = WorkspaceTerminal(rows, cols, stream, show_latency=args.latency or LATENCY_OVERLAY,
+                                metrics_path=args.metrics)
+    else:
+        app = CryptoTerminal(stream, show_latency=args.latency or LATENCY_OVERLAY, metrics_path=args.metrics)
     app.mainloop()
+    # The REST client and candle store are shared by every engine in the
+    # process; close the one and flush the other once on the way out.
+    from utils.binance_api import BinanceAPI
+    BinanceAPI.http.close()
+    BinanceAPI.store.flush()
+    if recorder:
+        recorder.close()
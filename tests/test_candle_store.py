@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import numpy as np
+from utils.candle_series import CANDLE_DTYPE
+from utils.candle_store import CandleStore
+
+
+STEP = 60_000
+BASE = 1_600_000_000_000 // STEP * STEP
+
+
+def rows(start, n):
+    return [[BASE + (start + k) * STEP, 1.0, 2.0, 0.5, 1.5, 10.0 + start + k] for k in range(n)]
+
+
+def stored(store, pair="BTCUSDT", interval="1m"):
+    return np.fromfile(store._path(pair, interval), dtype=CANDLE_DTYPE)
+
+
+def test_contiguous_appends_extend_the_file(tmp_path):
+    store = CandleStore(str(tmp_path), 1 << 20, 1000)
+    assert store.append("BTCUSDT", "1m", rows(0, 5)) == 5
+    assert store.append("BTCUSDT", "1m", rows(3, 5)) == 3
+    assert store.last_open_time("BTCUSDT", "1m") == BASE + 7 * STEP
+
+    series = store.read("BTCUSDT", "1m", limit=4)
+    assert series.ts.tolist() == [BASE + k * STEP for k in range(4, 8)]
+    assert series.volume.tolist() == [14.0, 15.0, 16.0, 17.0]
+
+
+def test_gap_rewrites_with_the_new_segment(tmp_path):
+    store = CandleStore(str(tmp_path), 1 << 20, 1000)
+    store.append("BTCUSDT", "1m", rows(0, 5))
+    assert store.append("BTCUSDT", "1m", rows(10, 3)) == 3
+    assert stored(store)['ts'].tolist() == [BASE + k * STEP for k in range(10, 13)]
+
+
+def test_non_contiguous_batch_keeps_its_tail(tmp_path):
+    store = CandleStore(str(tmp_path), 1 << 20, 1000)
+    store.append("BTCUSDT", "1m", rows(0, 3))
+    batch = rows(3, 2) + rows(8, 4)
+    assert store.append("BTCUSDT", "1m", batch) == 4
+    assert stored(store)['ts'].tolist() == [BASE + k * STEP for k in range(8, 12)]
+
+
+def test_append_trims_to_max_rows(tmp_path):
+    store = CandleStore(str(tmp_path), 1 << 20, 10)
+    store.append("BTCUSDT", "1m", rows(0, 8))
+    store.append("BTCUSDT", "1m", rows(8, 8))
+    assert stored(store)['ts'].tolist() == [BASE + k * STEP for k in range(6, 16)]
+
+
+def test_open_candles_are_not_stored(tmp_path):
+    store = CandleStore(str(tmp_path), 1 << 20, 1000)
+    now = int(time.time() * 1000) // STEP * STEP
+    live = [[now, 1.0, 1.0, 1.0, 1.0, 1.0]]
+    assert store.append("BTCUSDT", "1m", live) == 0
+    assert store.append("BTCUSDT", "1m", live, closed=True) == 1
+
+
+def test_repair_on_first_open(tmp_path):
+    store = CandleStore(str(tmp_path), 1 << 20, 1000)
+    arr = np.array([tuple(r) for r in rows(0, 3) + rows(2, 1) + rows(1, 4) + rows(9, 2)], dtype=CANDLE_DTYPE)
+    path = store._path("BTCUSDT", "1m")
+    with open(path, "wb") as f:
+        f.write(arr.tobytes() + b"\x00" * 7)
+
+    # Duplicates and out-of-order rows are dropped, a torn trailing record is
+    # truncated, and only the segment after the last gap is kept.
+    series = CandleStore(str(tmp_path), 1 << 20, 1000).read("BTCUSDT", "1m")
+    assert series.ts.tolist() == [BASE + 9 * STEP, BASE + 10 * STEP]
+    assert os.path.getsize(path) == 2 * CANDLE_DTYPE.itemsize
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    size = 5 * CANDLE_DTYPE.itemsize
+    store = CandleStore(str(tmp_path), 2 * size, 1000)
+    store.append("AAAUSDT", "1m", rows(0, 5))
+    store.append("BBBUSDT", "1m", rows(0, 5))
+    store.read("AAAUSDT", "1m")
+    store.append("CCCUSDT", "1m", rows(0, 5))
+
+    files = sorted(f for f in os.listdir(tmp_path) if f.endswith(".bin"))
+    assert files == ["AAAUSDT_1m.bin", "CCCUSDT_1m.bin"]
+    with open(tmp_path / "index.json") as f:
+        assert "BBBUSDT_1m.bin" not in json.load(f)
+
+
+def test_index_writes_are_batched(tmp_path):
+    store = CandleStore(str(tmp_path), 1 << 20, 1000, flush_every=3600)
+    store.append("BTCUSDT", "1m", rows(0, 5))
+    store.read("BTCUSDT", "1m")
+    assert not os.path.exists(tmp_path / "index.json")
+    store.flush()
+    with open(tmp_path / "index.json") as f:
+        assert list(json.load(f)) == ["BTCUSDT_1m.bin"]
@@ -0,0 +1,176 @@
+import threading
+import time
+import pytest
+from concurrent.futures import Future
+from utils.http_client import (HttpClient, WeightBudget, RateLimited, StaleResponse, request_weight, PRIORITY_USER,
+                               PRIORITY_NORMAL, PRIORITY_BACKGROUND)
+
+
+URL = "http://exchange.test/api/v3/klines"
+
+
+class FakeResponse:
+    def __init__(self, data, status=200, headers=None):
+        self.data = data
+        self.status_code = status
+        self.headers = headers or {}
+        self.text = str(data)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    # Stands in for requests.Session; each get can be held on an event.
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self.lock:
+            self.calls.append((url, params))
+        if self.gate is not None:
+            self.gate.wait(5)
+        return FakeResponse({'url': url, 'params': params})
+
+    def close(self):
+        pass
+
+
+def frozen(budget):
+    # Keeps the one-minute window from rolling over mid-test.
+    budget._roll = lambda now: None
+    return budget
+
+
+@pytest.fixture
+def client():
+    clients = []
+
+    def make(session=None, **kwargs):
+        c = HttpClient(**kwargs)
+        c.session = session or FakeSession()
+        frozen(c.budget)
+        clients.append(c)
+        return c
+
+    yield make
+    for c in clients:
+        c.close()
+
+
+def test_request_weights():
+    assert request_weight("http://x/depth", {'limit': 1000}) == 50
+    assert request_weight("http://x/depth", {'limit': 100}) == 5
+    assert request_weight("http://x/ticker/price", None) == 4
+    assert request_weight("http://x/ticker/price", {'symbol': 'BTCUSDT'}) == 2
+    assert request_weight(URL, None) == 2
+
+
+def test_budget_shares_by_priority():
+    budget = frozen(WeightBudget(100, (1.0, 0.5, 0.2)))
+    assert budget.reserve(20, PRIORITY_BACKGROUND) == 0
+    assert budget.reserve(1, PRIORITY_BACKGROUND) > 0
+    assert budget.reserve(30, PRIORITY_NORMAL) == 0
+    assert budget.reserve(1, PRIORITY_NORMAL) > 0
+    assert budget.reserve(50, PRIORITY_USER) == 0
+    assert budget.reserve(1, PRIORITY_USER) > 0
+    budget.release(10)
+    assert budget.reserve(10, PRIORITY_USER) == 0
+
+
+def test_budget_honours_retry_after():
+    budget = WeightBudget(100, (1.0, 1.0, 1.0))
+    budget.observe({"Retry-After": "5"}, 429)
+    assert 4 < budget.reserve(1, PRIORITY_USER) <= 5
+
+
+def test_identical_requests_are_coalesced(client):
+    gate = threading.Event()
+    session = FakeSession(gate)
+    c = client(session)
+    params = {'symbol': 'BTCUSDT', 'interval': '1m'}
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(c.get_json(URL, params))) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join(2)
+
+    assert len(session.calls) == 1
+    assert len(results) == 3 and all(r == results[0] for r in results)
+    assert c.stats()['coalesced'] == 2
+
+
+def test_joiner_reissues_when_owner_is_rate_limited(client):
+    session = FakeSession()
+    c = client(session)
+    # A background request for the same URL is in flight when a user fetch
+    # joins it; the owner then runs out of its share.
+    owner = Future()
+    c.inflight[(URL, ())] = (owner, PRIORITY_BACKGROUND)
+    result = []
+    joiner = threading.Thread(target=lambda: result.append(c.get_json(URL, priority=PRIORITY_USER)))
+    joiner.start()
+    time.sleep(0.05)
+    assert not session.calls
+    c.inflight.pop((URL, ()))
+    owner.set_exception(RateLimited("budget"))
+    joiner.join(2)
+    assert result and result[0]['url'] == URL
+    assert len(session.calls) == 1
+
+
+def test_lower_priority_joiner_shares_the_failure(client):
+    c = client()
+    owner = Future()
+    c.inflight[(URL, ())] = (owner, PRIORITY_USER)
+    owner.set_exception(RateLimited("budget"))
+    with pytest.raises(RateLimited):
+        c.get_json(URL, priority=PRIORITY_BACKGROUND)
+    assert c.session.calls == []
+
+
+def test_background_jobs_are_dropped_when_throttled(client):
+    c = client(weight_limit=100, weight_shares=(1.0, 0.5, 0.1), max_in_flight=2)
+    c.budget.reserve(10, PRIORITY_BACKGROUND)
+    future = c.submit(URL, priority=PRIORITY_BACKGROUND)
+    with pytest.raises(RateLimited):
+        future.result(2)
+    assert c.stats()['deferred'] == 1
+
+
+def test_user_jobs_overtake_throttled_ones(client):
+    session = FakeSession()
+    c = client(session, weight_limit=100, weight_shares=(1.0, 0.5, 0.1), max_in_flight=2, max_wait=30)
+    c.budget.reserve(50, PRIORITY_NORMAL)
+    normal = [c.submit(URL, {'n': i}, priority=PRIORITY_NORMAL) for i in range(3)]
+    user = c.submit(URL, {'u': 1}, priority=PRIORITY_USER)
+
+    assert user.result(2)['params'] == {'u': 1}
+    assert not any(f.done() for f in normal)
+    assert c.stats()['throttled'] >= 1
+    assert session.calls == [(URL, {'u': 1})]
+
+
+def test_throttled_job_fails_after_max_wait(client):
+    c = client(weight_limit=100, weight_shares=(1.0, 0.5, 0.1), max_in_flight=1, max_wait=0.3)
+    c.budget.reserve(50, PRIORITY_NORMAL)
+    future = c.submit(URL, priority=PRIORITY_NORMAL)
+    with pytest.raises(RateLimited):
+        future.result(2)
+
+
+def test_stale_jobs_return_their_weight(client):
+    c = client(weight_limit=100, weight_shares=(1.0, 1.0, 1.0))
+    future = c.submit(URL, current=lambda: False)
+    with pytest.raises(StaleResponse):
+        future.result(2)
+    assert c.budget.snapshot()['used'] == 0
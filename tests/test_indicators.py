@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from utils.indicators import IndicatorEngine, Indicator, default_indicators, DAY_MS
+
+
+def make_rows(n, seed=1):
+    # Hourly candles starting mid-day so VWAP crosses several sessions.
+    rnd = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rnd.normal(0, 1, n))
+    open_ = np.insert(close[:-1], 0, 100.0)
+    high = np.maximum(open_, close) + rnd.uniform(0, 1, n)
+    low = np.minimum(open_, close) - rnd.uniform(0, 1, n)
+    volume = rnd.uniform(1, 10, n)
+    ts = 20 * DAY_MS + DAY_MS // 2 + np.arange(n) * 3_600_000
+    return np.column_stack([ts, open_, high, low, close, volume])
+
+
+@pytest.mark.parametrize("ind", default_indicators(), ids=lambda ind: ind.name)
+def test_incremental_matches_vectorised(ind):
+    rows = make_rows(200)
+    engine = IndicatorEngine([ind])
+    engine.load(rows[:30])
+    for j in range(30, len(rows)):
+        engine.append(rows[j - 1], rows[j])
+
+    expected = type(ind)().load(rows)
+    for got, want in zip(engine.get(ind.name), expected):
+        np.testing.assert_allclose(got, want, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("ind", default_indicators(), ids=lambda ind: ind.name)
+def test_update_last_matches_reload(ind):
+    rows = make_rows(120)
+    engine = IndicatorEngine([ind])
+    engine.load(rows)
+    live = rows[-1].copy()
+    live[2] += 3
+    live[4] += 2
+    live[5] += 1
+    engine.update_last(live)
+
+    expected = type(ind)().load(np.vstack([rows[:-1], live]))
+    for got, want in zip(engine.get(ind.name), expected):
+        np.testing.assert_allclose(got, want, rtol=1e-9, atol=1e-9)
+
+
+def test_dropping_rows_keeps_the_tail():
+    rows = make_rows(150)
+    engine = IndicatorEngine()
+    engine.load(rows[:100])
+    for j in range(100, len(rows)):
+        engine.append(rows[j - 1], rows[j], drop=True)
+
+    for ind in default_indicators():
+        for got, want in zip(engine.get(ind.name), ind.load(rows)):
+            assert len(got) == 100
+            np.testing.assert_allclose(got, want[-100:], rtol=1e-9, atol=1e-9)
+
+
+def test_indicator_is_abstract():
+    with pytest.raises(TypeError):
+        Indicator()
@@ -0,0 +1,104 @@
+import time
+from utils.decoders import DepthDiff
+from utils.order_book import OrderBook
+
+
+SYMBOL = "BTCUSDT"
+
+
+def diff(first_id, last_id, bids=(), asks=()):
+    return DepthDiff(SYMBOL, first_id, last_id, list(bids), list(asks), 0)
+
+
+def snapshot(last_id):
+    return {'lastUpdateId': last_id, 'bids': [["100", "1"], ["99", "2"]], 'asks': [["101", "1"], ["102", "2"]]}
+
+
+class Snapshots:
+    # Answers each request with the next queued snapshot, or holds the
+    # callback until answer() is called.
+    def __init__(self, *snaps, hold=False):
+        self.snaps = list(snaps)
+        self.hold = hold
+        self.calls = []
+        self.waiting = None
+
+    def __call__(self, symbol, callback):
+        self.calls.append(time.monotonic())
+        if self.hold:
+            self.waiting = callback
+        else:
+            callback(self.snaps.pop(0) if self.snaps else {})
+
+    def answer(self, snap):
+        callback, self.waiting = self.waiting, None
+        callback(snap)
+
+
+def test_buffered_diffs_replay_onto_snapshot():
+    snaps = Snapshots(hold=True)
+    book = OrderBook(SYMBOL, snaps)
+    assert book.apply_diff(diff(8, 10, bids=[(100.0, 5.0)])) is False
+    book.apply_diff(diff(11, 12, asks=[(101.0, 0.0)]))
+    book.apply_diff(diff(13, 14, bids=[(98.0, 3.0)]))
+    assert len(snaps.calls) == 1
+
+    snaps.answer(snapshot(11))
+    # 8-10 is older than the snapshot; 11-12 straddles it and 13-14 follows.
+    assert book.last_update_id == 14
+    assert book.top(3) == ([(100.0, 1.0), (99.0, 2.0), (98.0, 3.0)], [(102.0, 2.0)])
+
+
+def test_stale_and_live_diffs():
+    book = OrderBook(SYMBOL, Snapshots(snapshot(10)))
+    book.apply_diff(diff(10, 11))
+    assert book.last_update_id == 11
+    assert book.apply_diff(diff(5, 11, bids=[(100.0, 9.0)])) is False
+    assert book.apply_diff(diff(12, 13, bids=[(100.0, 9.0)])) is True
+    assert book.top(1)[0] == [(100.0, 9.0)]
+
+
+def test_gap_resyncs_from_a_new_snapshot():
+    snaps = Snapshots(snapshot(10), snapshot(20))
+    book = OrderBook(SYMBOL, snaps, retry_delay=0)
+    book.apply_diff(diff(10, 11))
+    assert book.apply_diff(diff(15, 16)) is False
+    # The second snapshot answers at once and the buffered diff is older.
+    assert len(snaps.calls) == 2
+    assert book.last_update_id == 20
+    assert book.apply_diff(diff(21, 22)) is True
+
+
+def test_lagging_snapshot_backs_off():
+    snaps = Snapshots(*[snapshot(1)] * 100)
+    book = OrderBook(SYMBOL, snaps, retry_delay=0.05, max_delay=1, max_attempts=100)
+    uid = 1000
+    end = time.monotonic() + 0.3
+    while time.monotonic() < end:
+        book.apply_diff(diff(uid, uid + 1))
+        uid += 2
+        time.sleep(0.001)
+    # Requests at 0, 0.05, 0.15 (and perhaps 0.35 on a slow run): not one per diff.
+    assert 2 <= len(snaps.calls) <= 4
+    gaps = [b - a for a, b in zip(snaps.calls, snaps.calls[1:])]
+    assert all(later > earlier for earlier, later in zip(gaps, gaps[1:]))
+
+
+def test_failed_snapshots_give_up():
+    snaps = Snapshots()
+    book = OrderBook(SYMBOL, snaps, retry_delay=0, max_attempts=3)
+    for uid in range(10):
+        book.apply_diff(diff(uid, uid))
+    assert len(snaps.calls) == 3
+    assert book.last_update_id is None
+
+
+def test_no_request_while_snapshot_pending():
+    snaps = Snapshots(hold=True)
+    book = OrderBook(SYMBOL, snaps, retry_delay=0)
+    for uid in range(5):
+        book.apply_diff(diff(uid, uid))
+    assert len(snaps.calls) == 1
+    snaps.answer({})
+    book.apply_diff(diff(5, 5))
+    assert len(snaps.calls) == 2
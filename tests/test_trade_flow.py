@@ -0,0 +1,58 @@
+import time
+import pytest
+from utils.trade_flow import TradeFlow
+
+
+WINDOWS = (("1s", 1_000), ("1m", 60_000))
+T0 = 1_700_000_000_000
+
+
+def test_windows_aggregate_and_expire():
+    flow = TradeFlow(64, WINDOWS)
+    flow.add(T0, 100.0, 1.0, False)
+    flow.add(T0 + 500, 110.0, 3.0, True)
+    flow.add(T0 + 1_200, 120.0, 2.0, False)
+
+    stats = flow.stats(T0 + 1_200)
+    assert stats["1s"]["count"] == 2
+    assert stats["1s"]["vwap"] == pytest.approx((110 * 3 + 120 * 2) / 5)
+    assert stats["1s"]["buy_volume"] == 2.0 and stats["1s"]["sell_volume"] == 3.0
+    assert stats["1m"]["count"] == 3
+    assert stats["1m"]["largest"] == (110.0, 3.0, True)
+
+    stats = flow.stats(T0 + 61_000)
+    assert stats["1s"]["count"] == 0 and stats["1s"]["vwap"] == 0.0
+    assert stats["1m"]["count"] == 1 and stats["1m"]["largest"] == (120.0, 2.0, False)
+
+
+def test_largest_follows_expiry():
+    flow = TradeFlow(64, (("1s", 1_000),))
+    flow.add(T0, 100.0, 5.0, False)
+    flow.add(T0 + 100, 100.0, 2.0, False)
+    flow.add(T0 + 200, 100.0, 4.0, False)
+    assert flow.stats(T0 + 200)["1s"]["largest"][1] == 5.0
+    assert flow.stats(T0 + 1_050)["1s"]["largest"][1] == 4.0
+    assert flow.stats(T0 + 1_250)["1s"]["largest"] is None
+
+
+def test_overwritten_trades_leave_the_windows():
+    flow = TradeFlow(4, WINDOWS)
+    for k in range(10):
+        flow.add(T0 + k, 100.0, 1.0, k % 2 == 1)
+    stats = flow.stats(T0 + 9)
+    assert stats["1m"]["count"] == 4
+    assert stats["1m"]["buy_volume"] == 2.0 and stats["1m"]["sell_volume"] == 2.0
+    assert [t[0] for t in flow.recent(10)] == [T0 + 9, T0 + 8, T0 + 7, T0 + 6]
+
+
+def test_default_clock_follows_trade_times():
+    # Replayed trades are far in the past; windows still expire relative to
+    # the newest trade rather than the local wall clock.
+    flow = TradeFlow(64, WINDOWS)
+    old = int(time.time() * 1000) - 86_400_000
+    flow.add(old, 100.0, 1.0, False)
+    assert flow.stats()["1s"]["count"] == 1
+    time.sleep(1.1)
+    stats = flow.stats()
+    assert stats["1s"]["count"] == 0
+    assert stats["1m"]["count"] == 1
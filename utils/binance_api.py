@@ -1,100 +1,376 @@
-import requests
-import pandas as pd
+import numpy as np
 import threading
+import itertools
+import random
+import time
 import json
 import websocket
+from config import (HTTP_MAX_IN_FLIGHT, REST_WEIGHT_LIMIT, REST_WEIGHT_SHARES, REST_MAX_WAIT, CANDLE_CACHE_DIR, CANDLE_CACHE_MAX_BYTES, CANDLE_CACHE_MAX_ROWS,
+                    STREAM_STALE_SECONDS, STREAM_MAX_BACKOFF, HISTORY_PAGE_SIZE, BINANCE_REST_URL,
+                    BINANCE_STREAM_URL)
+from utils.candle_buffer import INTERVAL_MS
+from utils.candle_series import CandleSeries
+from utils.candle_store import CandleStore
+from utils.decoders import MessageDecoder
+from utils.http_client import (HttpClient, RateLimited, StaleResponse, request_weight, PRIORITY_USER,
+                               PRIORITY_NORMAL, PRIORITY_BACKGROUND)
+
+
+def _parse_kline_rows(raw):
+    return [[int(x[0]), float(x[1]), float(x[2]), float(x[3]), float(x[4]), float(x[5])]
+            for x in raw]
 
 
 class BinanceAPI:
-    BASE_URL = "https://api.binance.com/api/v3"
+    BASE_URL = BINANCE_REST_URL
+    http = HttpClient(max_in_flight=HTTP_MAX_IN_FLIGHT, weight_limit=REST_WEIGHT_LIMIT,
+                      weight_shares=REST_WEIGHT_SHARES, max_wait=REST_MAX_WAIT)
+    store = CandleStore(CANDLE_CACHE_DIR, CANDLE_CACHE_MAX_BYTES, CANDLE_CACHE_MAX_ROWS)
+
+    @staticmethod
+    def _kline_params(symbol, interval, limit, start_time=None):
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+        if start_time is not None:
+            params['startTime'] = int(start_time)
+        return params
+
+    @staticmethod
+    def get_kline_rows(symbol, interval, limit=60, start_time=None):
+        try:
+            raw = BinanceAPI.http.get_json(
+                f"{BinanceAPI.BASE_URL}/klines", BinanceAPI._kline_params(symbol, interval, limit, start_time))
+            return _parse_kline_rows(raw)
+        except RateLimited:
+            raise
+        except Exception as e:
+            print(f"Klines Error: {e}")
+            return []
+
+    @staticmethod
+    def get_cached_kline_rows(symbol, interval, limit=60):
+        try:
+            return BinanceAPI.store.read(symbol, interval, limit)
+        except Exception as e:
+            print(f"Candle Cache Error: {e}")
+            return CandleSeries(0)
+
+    @staticmethod
+    def sync_kline_rows(symbol, interval, limit=60):
+        step = INTERVAL_MS.get(interval, 60_000)
+        last = BinanceAPI.store.last_open_time(symbol, interval)
+        now_ms = int(time.time() * 1000)
+
+        if last is None or (now_ms - last) // step > 1000:
+            fetched = BinanceAPI.get_kline_rows(symbol, interval, limit)
+        else:
+            fetched = BinanceAPI.get_kline_rows(symbol, interval, 1000, start_time=last + step)
+
+        try:
+            BinanceAPI.store.append(symbol, interval, fetched)
+        except Exception as e:
+            print(f"Candle Cache Error: {e}")
+
+        rows = CandleSeries(limit, BinanceAPI.get_cached_kline_rows(symbol, interval, limit), slack=0)
+        last = rows.last_open_time()
+        tail = [r for r in fetched if last is None or r[0] > last]
+        if tail:
+            rows.extend(tail)
+        return rows
+
+    @staticmethod
+    def fetch_kline_rows(symbol, interval, callback, limit=60, tag="klines", priority=PRIORITY_USER, current=None):
+        def on_done(future):
+            if future.cancelled():
+                return
+            try:
+                rows = future.result()
+            except StaleResponse:
+                return
+            except RateLimited:
+                rows = []
+            except Exception as e:
+                print(f"Klines Error: {e}")
+                rows = []
+            callback(rows)
+
+        future = BinanceAPI.http.submit_call(
+            BinanceAPI.sync_kline_rows, symbol, interval, limit, tag=tag, priority=priority, current=current,
+            weight=request_weight(f"{BinanceAPI.BASE_URL}/klines", None))
+        future.add_done_callback(on_done)
+        return future
+
+    @staticmethod
+    def get_kline_rows_many(symbols, interval, limit=60, priority=PRIORITY_NORMAL):
+        url = f"{BinanceAPI.BASE_URL}/klines"
+        results = BinanceAPI.http.get_many(
+            [(url, BinanceAPI._kline_params(sym, interval, limit)) for sym in symbols], timeout=4, priority=priority)
+        data = {}
+        for sym, raw in zip(symbols, results):
+            try:
+                if raw:
+                    data[sym] = _parse_kline_rows(raw)
+            except Exception as e:
+                print(f"Klines Error ({sym}): {e}")
+        return data
+
+    @staticmethod
+    def get_kline_history(symbol, interval, end_time, pages, priority=PRIORITY_USER):
+        # Pages are laid out backwards from end_time and fetched concurrently;
+        # only the unbroken run of pages adjacent to end_time is kept.
+        step = INTERVAL_MS.get(interval, 60_000)
+        span = HISTORY_PAGE_SIZE * step
+        url = f"{BinanceAPI.BASE_URL}/klines"
+        requests_list = []
+        for k in range(pages):
+            params = BinanceAPI._kline_params(symbol, interval, HISTORY_PAGE_SIZE, end_time - (k + 1) * span)
+            params['endTime'] = int(end_time - k * span - 1)
+            requests_list.append((url, params))
+
+        results = BinanceAPI.http.get_many(requests_list, timeout=10, priority=priority)
+        if results and results[0] is None:
+            return None
+
+        chunks = []
+        for raw in results:
+            if not raw:
+                break
+            try:
+                chunks.append(np.array(_parse_kline_rows(raw)))
+            except Exception as e:
+                print(f"Klines History Error: {e}")
+                break
+        if not chunks:
+            return np.empty((0, 6))
+
+        rows = np.concatenate(chunks[::-1])
+        rows = rows[np.argsort(rows[:, 0], kind='stable')]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = rows[1:, 0] != rows[:-1, 0]
+        rows = rows[keep]
+        return rows[rows[:, 0] < end_time]
 
     @staticmethod
     def get_klines(symbol, interval, limit=60):
+        # The DataFrame is built from the series' column views; pandas is only
+        # imported when something actually asks for one.
         try:
-            url = f"{BinanceAPI.BASE_URL}/klines?symbol={symbol}&interval={interval}&limit={limit}"
-            resp = requests.get(url, timeout=3)
-            data = resp.json()
-
-            df = pd.DataFrame(data, columns=[
-                              'ts', 'open', 'high', 'low', 'close', 'volume', 'ct', 'qav', 'nt', 'tbv', 'tqv', 'ig'])
-            df['ts'] = pd.to_datetime(df['ts'], unit='ms')
-            df.set_index('ts', inplace=True)
-            df = df[['open', 'high', 'low', 'close', 'volume']].astype(float)
-            return df
+            return BinanceAPI.sync_kline_rows(symbol, interval, limit).to_dataframe()
         except Exception as e:
             print(f"Klines Error: {e}")
-            return pd.DataFrame()
+            return CandleSeries(0).to_dataframe()
 
     @staticmethod
     def get_all_prices():
         try:
-            return requests.get(f"{BinanceAPI.BASE_URL}/ticker/price", timeout=2).json()
+            return BinanceAPI.http.get_json(f"{BinanceAPI.BASE_URL}/ticker/price", timeout=2,
+                                            priority=PRIORITY_BACKGROUND)
         except:
             return []
 
+    @staticmethod
+    def fetch_depth_snapshot(symbol, callback, limit=1000, priority=PRIORITY_NORMAL):
+        # Queued behind the weight budget like any other call; a book that
+        # keeps resyncing is throttled instead of spending user headroom.
+        def on_done(future):
+            snap = {}
+            if not future.cancelled():
+                try:
+                    snap = future.result()
+                except Exception as e:
+                    print(f"Depth Snapshot Error: {e}")
+            callback(snap)
+
+        future = BinanceAPI.http.submit(
+            f"{BinanceAPI.BASE_URL}/depth", {'symbol': symbol, 'limit': limit}, priority=priority)
+        future.add_done_callback(on_done)
+        return future
+
     @staticmethod
     def get_comparison_data(coins_list):
         data = {}
         try:
-            for c in coins_list:
-                sym = c + "USDT"
-                url = f"{BinanceAPI.BASE_URL}/klines?symbol={sym}&interval=1h&limit=24"
-                resp = requests.get(url, timeout=2)
-                if resp.status_code == 200:
-                    raw = resp.json()
-                    closes = [float(x[4]) for x in raw]
-                    if closes:
-                        start_price = closes[0]
-                        data[c] = [((p - start_price) / start_price)
-                                   * 100 for p in closes]
+            url = f"{BinanceAPI.BASE_URL}/klines"
+            results = BinanceAPI.http.get_many(
+                [(url, BinanceAPI._kline_params(c + "USDT", "1h", 24)) for c in coins_list], timeout=4)
+            for c, raw in zip(coins_list, results):
+                if not raw:
+                    continue
+                closes = [float(x[4]) for x in raw]
+                start_price = closes[0]
+                data[c] = [((p - start_price) / start_price)
+                           * 100 for p in closes]
         except Exception as e:
             print(f"Comparison Data Error: {e}")
         return data
 
 
 class BinanceStream:
-    def __init__(self, callback_func):
+    STREAM_URL = BINANCE_STREAM_URL
+
+    def __init__(self, decoder=None, stale_after=STREAM_STALE_SECONDS, max_backoff=STREAM_MAX_BACKOFF,
+                 recorder=None):
         self.ws = None
-        self.callback_func = callback_func
+        self.decoder = decoder or MessageDecoder()
+        self.recorder = recorder
         self.thread = None
+        self.watchdog = None
         self.is_running = False
+        self.is_connected = False
+        self.stale_after = stale_after
+        self.max_backoff = max_backoff
 
-    def start(self, symbol):
-        self.stop()
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.callbacks = {}
+        self.active = {}
+        self.acked = set()
+        self.last_message = 0.0
+        self.stats = {'messages': 0, 'dropped_stale': 0, 'reconnects': 0}
+
+    def start(self):
+        if self.is_running:
+            return
         self.is_running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.watchdog = threading.Thread(target=self._watch, daemon=True)
+        self.watchdog.start()
+
+    def stop(self):
+        self.is_running = False
+        if self.ws:
+            self.ws.close()
+            self.ws = None
 
-        symbol = symbol.lower()
-        stream_url = f"wss://stream.binance.com:9443/stream?streams={symbol}@ticker/{symbol}@depth20/{symbol}@aggTrade"
+    def subscribe(self, streams, callback):
+        self.replace([], streams, callback)
 
-        def run_ws():
+    def unsubscribe(self, streams, callback):
+        self.replace(streams, [], callback)
+
+    def replace(self, old_streams, new_streams, callback):
+        removed, added = [], []
+        with self.lock:
+            for s in old_streams:
+                if s in new_streams:
+                    continue
+                callbacks = self.callbacks.get(s, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if not callbacks:
+                    self.callbacks.pop(s, None)
+                    self.active.pop(s, None)
+                    removed.append(s)
+            for s in new_streams:
+                callbacks = self.callbacks.setdefault(s, [])
+                if callback not in callbacks:
+                    callbacks.append(callback)
+                if s not in self.active:
+                    added.append(s)
+            if added:
+                req_id = next(self.ids)
+                for s in added:
+                    self.active[s] = req_id
+            connected = self.is_connected
+
+        if connected:
+            if removed:
+                self._send("UNSUBSCRIBE", removed, next(self.ids))
+            if added:
+                self._send("SUBSCRIBE", added, req_id)
+
+    def _send(self, method, streams, req_id):
+        try:
+            self.ws.send(json.dumps({"method": method, "params": streams, "id": req_id}))
+        except Exception as e:
+            print(f"WS Send Error: {e}")
+
+    def _run(self):
+        attempt = 0
+        while self.is_running:
             self.ws = websocket.WebSocketApp(
-                stream_url,
+                self.STREAM_URL,
+                on_open=self._on_open,
                 on_message=self._on_message,
                 on_error=self._on_error,
                 on_close=self._on_close
             )
-            self.ws.run_forever()
+            opened_at = time.monotonic()
+            self.ws.run_forever(ping_interval=20, ping_timeout=10)
+            self.is_connected = False
+            if not self.is_running:
+                break
 
-        self.thread = threading.Thread(target=run_ws, daemon=True)
-        self.thread.start()
+            if time.monotonic() - opened_at > self.max_backoff:
+                attempt = 0
+            delay = random.uniform(0, min(self.max_backoff, 2 ** attempt))
+            attempt += 1
+            self.stats['reconnects'] += 1
+            print(f"WS reconnecting in {delay:.1f}s")
+            time.sleep(delay)
 
-    def stop(self):
-        self.is_running = False
-        if self.ws:
-            self.ws.close()
-            self.ws = None
+    def _watch(self):
+        while self.is_running:
+            time.sleep(1)
+            ws = self.ws
+            if self.is_connected and ws and self.active and time.monotonic() - self.last_message > self.stale_after:
+                print("WS stream stale, forcing reconnect")
+                self.is_connected = False
+                ws.close()
+
+    def _on_open(self, ws):
+        with self.lock:
+            self.acked.clear()
+            streams = list(self.active)
+            req_id = next(self.ids)
+            for s in streams:
+                self.active[s] = req_id
+            self.is_connected = True
+            self.last_message = time.monotonic()
+        if streams:
+            self._send("SUBSCRIBE", streams, req_id)
 
     def _on_message(self, ws, message):
         if not self.is_running:
             return
+        recv = time.time() * 1000
+        self.last_message = time.monotonic()
+        if self.recorder is not None:
+            self.recorder.record_ws(message)
         try:
-            data = json.loads(message)
-            self.callback_func(data)
+            data = self.decoder.decode(message)
+            stream = data.get('stream')
+            if stream is None:
+                self._on_control(data)
+                return
+            data['recv'] = recv
+            data['decoded'] = time.time() * 1000
+
+            self.stats['messages'] += 1
+            # Callbacks run outside the lock; subscribe/unsubscribe may be
+            # called from inside one.
+            with self.lock:
+                gen = self.active.get(stream)
+                callbacks = tuple(self.callbacks.get(stream, ()))
+                acked = gen in self.acked
+            if gen is None or not acked or not callbacks:
+                self.stats['dropped_stale'] += 1
+                return
+            data['gen'] = gen
+            for callback in callbacks:
+                callback(data)
         except Exception as e:
             print(f"WS Decode Error: {e}")
 
+    def _on_control(self, data):
+        if 'error' in data:
+            print(f"WS Request Error: {data['error']}")
+        elif 'id' in data:
+            self.acked.add(data['id'])
+
     def _on_error(self, ws, error):
         print(f"WS Error: {error}")
 
     def _on_close(self, ws, *args):
+        self.is_connected = False
         print("WS Connection Closed")
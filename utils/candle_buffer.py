@@ -0,0 +1,75 @@
+import threading
+from utils.candle_series import CandleSeries
+
+
+INTERVAL_MS = {
+    "1m": 60_000,
+    "15m": 900_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+    "1d": 86_400_000,
+}
+
+
+class CandleBuffer:
+    def __init__(self, pair, interval, maxlen=60):
+        self.pair = pair
+        self.interval = interval
+        self.step_ms = INTERVAL_MS.get(interval, 60_000)
+        self.series = CandleSeries(maxlen)
+        self.lock = threading.Lock()
+        self.needs_backfill = True
+
+    def __len__(self):
+        with self.lock:
+            return len(self.series)
+
+    def matches(self, pair, interval):
+        return self.pair == pair and self.interval == interval
+
+    def last_open_time(self):
+        with self.lock:
+            return self.series.last_open_time()
+
+    def load(self, rows):
+        if not len(rows):
+            return
+        if not isinstance(rows, CandleSeries):
+            rows = CandleSeries(len(rows), rows)
+        with self.lock:
+            # Live candles at or after the last REST candle win over the REST copy.
+            series = self.series
+            newer = series.copy(series.index(rows.last_open_time()))
+            cut = rows.index(newer.first_open_time()) if len(newer) else len(rows)
+            series.clear()
+            series.extend(rows.copy(0, cut))
+            series.extend(newer)
+
+    def apply_kline(self, k):
+        if k.symbol != self.pair or k.interval != self.interval:
+            return False
+        row = k.row()
+        with self.lock:
+            series = self.series
+            last_ts = series.last_open_time()
+            if last_ts is None:
+                series.append(row)
+                self.needs_backfill = True
+                return True
+
+            if row[0] == last_ts:
+                series.update_last(row)
+            elif row[0] > last_ts:
+                if row[0] - last_ts > self.step_ms:
+                    self.needs_backfill = True
+                series.append(row)
+            else:
+                return False
+        return True
+
+    def snapshot(self):
+        with self.lock:
+            return self.series.copy()
+
+    def to_dataframe(self):
+        return self.snapshot().to_dataframe()
@@ -0,0 +1,152 @@
+import numpy as np
+
+
+MIN_LEVEL_ROWS = 64
+
+
+class _Rows:
+    def __init__(self, data=None, cols=6):
+        data = np.empty((0, cols)) if data is None else np.asarray(data, dtype=float)
+        self.data = np.empty((max(64, 2 * len(data)), cols))
+        self.data[:len(data)] = data
+        self.n = len(data)
+
+    def __len__(self):
+        return self.n
+
+    def view(self):
+        return self.data[:self.n]
+
+    def truncate(self, n):
+        self.n = min(self.n, n)
+
+    def extend(self, rows):
+        need = self.n + len(rows)
+        if need > len(self.data):
+            data = np.empty((max(need, 2 * len(self.data)), self.data.shape[1]))
+            data[:self.n] = self.data[:self.n]
+            self.data = data
+        self.data[self.n:need] = rows
+        self.n = need
+
+
+def _merge_pairs(rows):
+    # OHLCV merge of consecutive pairs: first open, max high, min low, last close, summed volume.
+    n = len(rows)
+    starts = np.arange(0, n, 2)
+    ends = np.minimum(starts + 2, n)
+    out = np.empty((len(starts), 6))
+    out[:, 0] = rows[starts, 0]
+    out[:, 1] = rows[starts, 1]
+    out[:, 2] = np.maximum.reduceat(rows[:, 2], starts)
+    out[:, 3] = np.minimum.reduceat(rows[:, 3], starts)
+    out[:, 4] = rows[ends - 1, 4]
+    out[:, 5] = np.add.reduceat(rows[:, 5], starts)
+    return out
+
+
+class CandleHistory:
+    def __init__(self, rows=None):
+        self.reset(rows)
+
+    def __len__(self):
+        return len(self.base)
+
+    def reset(self, rows=None):
+        self.base = _Rows(rows)
+        self._rebuild()
+
+    def rows(self):
+        return self.base.view()
+
+    def first_open_time(self):
+        return self.base.data[0, 0] if len(self.base) else None
+
+    def prepend(self, rows):
+        rows = np.asarray(rows, dtype=float)
+        if len(self.base):
+            rows = rows[rows[:, 0] < self.base.data[0, 0]] if len(rows) else rows
+        if not len(rows):
+            return 0
+        self.base = _Rows(np.concatenate([rows, self.base.view()]))
+        self._rebuild()
+        return len(rows)
+
+    def merge_tail(self, rows):
+        # Returns (revised_last, appended); None when older candles changed and
+        # the caller has to reload everything derived from the history.
+        rows = np.asarray(rows, dtype=float)
+        base = self.base.view()
+        n = len(base)
+        if not len(rows):
+            return False, 0
+        if not n:
+            self.reset(rows)
+            return None
+
+        i = int(np.searchsorted(base[:, 0], rows[0, 0]))
+        overlap = min(n - i, len(rows))
+        revised = False
+        if overlap > 0:
+            old, new = base[i:i + overlap], rows[:overlap]
+            if not np.array_equal(old[:, 0], new[:, 0]):
+                return self._union(rows)
+            changed = np.flatnonzero((old != new).any(axis=1))
+            if len(changed) and (changed[0] + i != n - 1 or i + overlap != n):
+                return self._union(rows)
+            revised = bool(len(changed))
+            if revised:
+                base[-1] = new[-1]
+
+        fresh = rows[max(overlap, 0):]
+        self.base.extend(fresh)
+        self._refresh(n - 1 if revised else n)
+        return revised, len(fresh)
+
+    def _union(self, rows):
+        base = self.base.view()
+        older = base[base[:, 0] < rows[0, 0]]
+        newer = base[base[:, 0] > rows[-1, 0]]
+        self.reset(np.concatenate([older, rows, newer]))
+        return None
+
+    def window(self, lo, hi, budget):
+        n = len(self.base)
+        lo, hi = max(0, int(lo)), min(n, int(np.ceil(hi)))
+        if hi <= lo:
+            return np.empty(0), np.empty((0, 6)), np.empty(0, dtype=int), 1
+
+        k = 0
+        while (hi - lo) >> k > budget and k < len(self.levels):
+            k += 1
+        if k == 0:
+            idx = np.arange(lo, hi)
+            return idx.astype(float), self.base.data[lo:hi], idx, 1
+
+        size = 1 << k
+        bl, bh = lo >> k, ((hi - 1) >> k) + 1
+        buckets = np.arange(bl, bh)
+        idx = np.minimum((buckets + 1) * size - 1, n - 1)
+        x = buckets * size + (size - 1) / 2
+        return x, self.levels[k - 1].view()[bl:bh], idx, size
+
+    def _rebuild(self):
+        self.levels = []
+        src = self.base.view()
+        while len(src) > MIN_LEVEL_ROWS:
+            level = _Rows(_merge_pairs(src))
+            self.levels.append(level)
+            src = level.view()
+
+    def _refresh(self, start):
+        # Recompute only the buckets that cover base rows from `start` onward.
+        src = self.base.view()
+        for level in self.levels:
+            start //= 2
+            level.truncate(start)
+            level.extend(_merge_pairs(src[2 * start:]))
+            src = level.view()
+        while len(src) > MIN_LEVEL_ROWS:
+            level = _Rows(_merge_pairs(src))
+            self.levels.append(level)
+            src = level.view()
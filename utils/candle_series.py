@@ -0,0 +1,146 @@
+import numpy as np
+
+
+COLUMNS = ('ts', 'open', 'high', 'low', 'close', 'volume')
+CANDLE_DTYPE = np.dtype([('ts', '<i8'), ('open', '<f8'), ('high', '<f8'),
+                         ('low', '<f8'), ('close', '<f8'), ('volume', '<f8')])
+
+
+def _columns(rows):
+    if isinstance(rows, CandleSeries):
+        return rows.ts, rows.values[:, rows.start:rows.end]
+    if isinstance(rows, np.ndarray) and rows.dtype.names:
+        return rows['ts'], np.stack([rows[c] for c in COLUMNS[1:]])
+    arr = np.asarray(rows, dtype=float).reshape(-1, 6)
+    return arr[:, 0].astype(np.int64), arr[:, 1:].T
+
+
+class CandleSeries:
+    # Columnar candles: int64 open times and a (5, size) float64 block with one
+    # contiguous row per OHLCV column. Live candles sit in [start, end); once
+    # the series is full, appends slide the window and the block is compacted
+    # back to the front every `slack` appends.
+    def __init__(self, capacity, rows=None, slack=None):
+        self.capacity = max(1, capacity)
+        size = self.capacity + (self.capacity if slack is None else slack)
+        self.times = np.empty(size, dtype=np.int64)
+        self.values = np.empty((5, size))
+        self.start = self.end = 0
+        if rows is not None:
+            self.extend(rows)
+
+    def __len__(self):
+        return self.end - self.start
+
+    @property
+    def ts(self):
+        return self.times[self.start:self.end]
+
+    @property
+    def open(self):
+        return self.values[0, self.start:self.end]
+
+    @property
+    def high(self):
+        return self.values[1, self.start:self.end]
+
+    @property
+    def low(self):
+        return self.values[2, self.start:self.end]
+
+    @property
+    def close(self):
+        return self.values[3, self.start:self.end]
+
+    @property
+    def volume(self):
+        return self.values[4, self.start:self.end]
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.values.nbytes
+
+    def first_open_time(self):
+        return int(self.times[self.start]) if self.end > self.start else None
+
+    def last_open_time(self):
+        return int(self.times[self.end - 1]) if self.end > self.start else None
+
+    def last(self):
+        i = self.end - 1
+        return [int(self.times[i])] + self.values[:, i].tolist()
+
+    def append(self, row):
+        if self.end - self.start == self.capacity:
+            self.start += 1
+        if self.end == len(self.times):
+            self._compact()
+        self.times[self.end] = row[0]
+        self.values[:, self.end] = row[1:6]
+        self.end += 1
+
+    def update_last(self, row):
+        self.times[self.end - 1] = row[0]
+        self.values[:, self.end - 1] = row[1:6]
+
+    def extend(self, rows):
+        times, values = _columns(rows)
+        n = len(times)
+        if not n:
+            return
+        if n >= self.capacity:
+            times, values = times[-self.capacity:], values[:, -self.capacity:]
+            n = self.capacity
+            self.start = self.end = 0
+        self.start = max(self.start, self.end + n - self.capacity)
+        if self.end + n > len(self.times):
+            self._compact()
+        self.times[self.end:self.end + n] = times
+        self.values[:, self.end:self.end + n] = values
+        self.end += n
+
+    def clear(self):
+        self.start = self.end = 0
+
+    def index(self, ts):
+        return int(np.searchsorted(self.ts, ts))
+
+    def window(self, lo=0, hi=None):
+        # Zero-copy column views; valid until the series is next written to.
+        lo, hi = self.start + lo, self.end if hi is None else self.start + hi
+        return (self.times[lo:hi],) + tuple(self.values[:, lo:hi])
+
+    def copy(self, lo=0, hi=None):
+        lo, hi = self.start + lo, self.end if hi is None else self.start + hi
+        n = max(hi - lo, 0)
+        out = CandleSeries(n, slack=0)
+        out.times[:n] = self.times[lo:hi]
+        out.values[:, :n] = self.values[:, lo:hi]
+        out.end = n
+        return out
+
+    def to_array(self):
+        out = np.empty((len(self), 6))
+        out[:, 0] = self.ts
+        out[:, 1:] = self.values[:, self.start:self.end].T
+        return out
+
+    def __array__(self, dtype=None, copy=None):
+        out = self.to_array()
+        return out if dtype is None else out.astype(dtype, copy=False)
+
+    def tolist(self):
+        return [[int(t)] + v for t, v in zip(self.ts, self.values[:, self.start:self.end].T.tolist())]
+
+    def to_dataframe(self):
+        import pandas as pd
+        index = pd.to_datetime(self.ts, unit='ms')
+        index.name = 'ts'
+        return pd.DataFrame({c: self.values[i, self.start:self.end] for i, c in enumerate(COLUMNS[1:])},
+                            index=index)
+
+    def _compact(self):
+        n = len(self)
+        self.times[:n] = self.times[self.start:self.end]
+        self.values[:, :n] = self.values[:, self.start:self.end]
+        self.start, self.end = 0, n
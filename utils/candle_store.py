@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+from utils.candle_buffer import INTERVAL_MS
+from utils.candle_series import CandleSeries, CANDLE_DTYPE
+
+
+class CandleStore:
+    def __init__(self, root, max_bytes, max_rows, flush_every=30):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+        self.validated = set()
+        os.makedirs(self.root, exist_ok=True)
+        self.index_path = os.path.join(self.root, "index.json")
+        self.usage = self._load_index()
+        self.dirty = False
+        self.flushed = time.monotonic()
+        self.sizes = None
+
+    def read(self, pair, interval, limit=None):
+        with self.lock:
+            arr = self._open(pair, interval)
+            if arr is None or len(arr) == 0:
+                return CandleSeries(0)
+            self._touch(pair, interval)
+            if limit:
+                arr = arr[-limit:]
+            return CandleSeries(len(arr), arr, slack=0)
+
+    def last_open_time(self, pair, interval):
+        with self.lock:
+            arr = self._open(pair, interval)
+            if arr is None or len(arr) == 0:
+                return None
+            return int(arr['ts'][-1])
+
+    def append(self, pair, interval, rows, closed=False):
+        step = INTERVAL_MS.get(interval, 60_000)
+        now_ms = int(time.time() * 1000)
+        if not closed:
+            rows = [r for r in rows if r[0] + step <= now_ms]
+        if not rows:
+            return 0
+
+        with self.lock:
+            arr = self._open(pair, interval)
+            last = int(arr['ts'][-1]) if arr is not None and len(arr) else None
+            count = len(arr) if arr is not None else 0
+            del arr
+            if last is not None:
+                rows = [r for r in rows if r[0] > last]
+                if not rows:
+                    return 0
+
+            new = np.array([tuple(r) for r in rows], dtype=CANDLE_DTYPE)
+            contiguous = np.all(np.diff(new['ts']) == step)
+            path = self._path(pair, interval)
+
+            if last is None or new['ts'][0] != last + step or not contiguous:
+                new = self._tail_segment(new, step)
+                new.tofile(path)
+            else:
+                with open(path, "ab") as f:
+                    f.write(new.tobytes())
+                if count + len(new) > self.max_rows:
+                    np.fromfile(path, dtype=CANDLE_DTYPE)[-self.max_rows:].tofile(path)
+
+            self._touch(pair, interval)
+            self._evict(keep=os.path.basename(path))
+            return len(new)
+
+    def flush(self):
+        with self.lock:
+            if self.dirty:
+                self._save_index()
+
+    def _path(self, pair, interval):
+        return os.path.join(self.root, f"{pair}_{interval}.bin")
+
+    def _open(self, pair, interval):
+        path = self._path(pair, interval)
+        if not os.path.exists(path):
+            return None
+
+        size = os.path.getsize(path)
+        if size % CANDLE_DTYPE.itemsize:
+            with open(path, "r+b") as f:
+                f.truncate(size - size % CANDLE_DTYPE.itemsize)
+            size -= size % CANDLE_DTYPE.itemsize
+        key = (pair, interval)
+        if size and key not in self.validated:
+            size = self._repair(path, INTERVAL_MS.get(interval, 60_000))
+            self.validated.add(key)
+        if size == 0:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return np.memmap(path, dtype=CANDLE_DTYPE, mode='r')
+
+    def _repair(self, path, step):
+        arr = np.fromfile(path, dtype=CANDLE_DTYPE)
+        diffs = np.diff(arr['ts'])
+        if np.all(diffs == step):
+            return arr.nbytes
+
+        clean = arr
+        if np.any(diffs <= 0):
+            _, last_idx = np.unique(clean['ts'][::-1], return_index=True)
+            clean = clean[::-1][last_idx]
+        clean = self._tail_segment(clean, step)
+        print(f"Candle cache repaired {os.path.basename(path)}: {len(arr)} -> {len(clean)} rows")
+        clean.tofile(path)
+        return clean.nbytes
+
+    def _tail_segment(self, arr, step):
+        gaps = np.nonzero(np.diff(arr['ts']) != step)[0]
+        if gaps.size:
+            arr = arr[gaps[-1] + 1:]
+        return arr[-self.max_rows:]
+
+    def _touch(self, pair, interval):
+        # Reads and closed candles only mark the index dirty; it is written at
+        # most every flush_every seconds, on eviction and by flush().
+        self.usage[f"{pair}_{interval}.bin"] = time.time()
+        self.dirty = True
+        if time.monotonic() - self.flushed >= self.flush_every:
+            self._save_index()
+
+    def _evict(self, keep):
+        # File sizes are listed once and then tracked per write.
+        if self.sizes is None:
+            files = [f for f in os.listdir(self.root) if f.endswith(".bin")]
+            self.sizes = {f: os.path.getsize(os.path.join(self.root, f)) for f in files}
+        else:
+            self.sizes[keep] = os.path.getsize(os.path.join(self.root, keep))
+        total = sum(self.sizes.values())
+        if total <= self.max_bytes:
+            return
+        for f in sorted(self.sizes, key=lambda f: self.usage.get(f, 0)):
+            if total <= self.max_bytes:
+                break
+            if f == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.root, f))
+            except OSError:
+                pass
+            total -= self.sizes.pop(f)
+            self.usage.pop(f, None)
+            self.validated = {k for k in self.validated if f"{k[0]}_{k[1]}.bin" != f}
+        self._save_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        self.dirty = False
+        self.flushed = time.monotonic()
+        try:
+            with open(self.index_path, "w") as f:
+                json.dump(self.usage, f)
+        except OSError as e:
+            print(f"Candle cache index error: {e}")
@@ -0,0 +1,92 @@
+import threading
+from array import array
+
+
+class CoinSeries:
+    def __init__(self, points):
+        self.points = points
+        self.times = array('q')
+        self.closes = array('d')
+        self.pct = array('d')
+
+    def load(self, rows):
+        rows = rows[-self.points:]
+        self.times = array('q', (int(r[0]) for r in rows))
+        self.closes = array('d', (r[4] for r in rows))
+        self._normalise()
+
+    def apply(self, t, close):
+        if not self.times or t > self.times[-1]:
+            gap = bool(self.times) and t - self.times[-1] > 3_600_000
+            self.times.append(t)
+            self.closes.append(close)
+            if len(self.times) > self.points:
+                del self.times[0]
+                del self.closes[0]
+                self._normalise()
+            else:
+                self.pct.append(self._pct(close))
+            return True, gap
+        if t == self.times[-1]:
+            if self.closes[-1] == close:
+                return False, False
+            self.closes[-1] = close
+            if len(self.closes) == 1:
+                self._normalise()
+            else:
+                self.pct[-1] = self._pct(close)
+            return True, False
+        return False, False
+
+    def _pct(self, price):
+        start = self.closes[0]
+        return (price - start) / start * 100 if start else 0.0
+
+    def _normalise(self):
+        self.pct = array('d', (self._pct(p) for p in self.closes))
+
+
+class ComparisonFeed:
+    def __init__(self, coins, points=24):
+        self.coins = list(coins)
+        self.series = {c: CoinSeries(points) for c in self.coins}
+        self.dirty = set()
+        self.needs_backfill = set()
+        self.lock = threading.Lock()
+
+    def streams(self, interval="1h"):
+        return [f"{c.lower()}usdt@kline_{interval}" for c in self.coins]
+
+    def load(self, coin, rows):
+        if coin not in self.series or not rows:
+            return
+        with self.lock:
+            series = self.series[coin]
+            live = (series.times[-1], series.closes[-1]) if series.times else None
+            series.load(rows)
+            if live:
+                series.apply(*live)
+            self.needs_backfill.discard(coin)
+            self.dirty.add(coin)
+
+    def apply_kline(self, k):
+        coin = k.symbol[:-4]
+        if coin not in self.series or k.interval != "1h":
+            return False
+        with self.lock:
+            changed, gap = self.series[coin].apply(k.open_time, k.close)
+            if gap:
+                self.needs_backfill.add(coin)
+            if changed:
+                self.dirty.add(coin)
+        return changed
+
+    def take_backfill(self):
+        with self.lock:
+            coins, self.needs_backfill = self.needs_backfill, set()
+        return coins
+
+    def take_changes(self):
+        with self.lock:
+            changed, self.dirty = self.dirty, set()
+            return {c: list(self.series[c].pct) for c in changed if self.series[c].pct}
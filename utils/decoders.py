@@ -0,0 +1,151 @@
+import json
+
+try:
+    import orjson
+    JSON_BACKEND = "orjson"
+    _loads = orjson.loads
+except ImportError:
+    JSON_BACKEND = "json"
+    _loads = json.loads
+
+
+class Ticker:
+    __slots__ = ('symbol', 'last', 'change_pct', 'high', 'low', 'volume', 'quote_volume', 'event_time')
+
+    def __init__(self, symbol, last, change_pct, high, low, volume, quote_volume, event_time):
+        self.symbol = symbol
+        self.last = last
+        self.change_pct = change_pct
+        self.high = high
+        self.low = low
+        self.volume = volume
+        self.quote_volume = quote_volume
+        self.event_time = event_time
+
+
+class MiniTicker:
+    __slots__ = ('symbol', 'close', 'open', 'quote_volume', 'event_time')
+
+    def __init__(self, symbol, close, open_, quote_volume, event_time):
+        self.symbol = symbol
+        self.close = close
+        self.open = open_
+        self.quote_volume = quote_volume
+        self.event_time = event_time
+
+
+class DepthDiff:
+    __slots__ = ('symbol', 'first_id', 'last_id', 'bids', 'asks', 'event_time')
+
+    def __init__(self, symbol, first_id, last_id, bids, asks, event_time):
+        self.symbol = symbol
+        self.first_id = first_id
+        self.last_id = last_id
+        self.bids = bids
+        self.asks = asks
+        self.event_time = event_time
+
+
+class Trade:
+    __slots__ = ('symbol', 'price', 'qty', 'is_buyer_maker', 'trade_time', 'event_time')
+
+    def __init__(self, symbol, price, qty, is_buyer_maker, trade_time, event_time):
+        self.symbol = symbol
+        self.price = price
+        self.qty = qty
+        self.is_buyer_maker = is_buyer_maker
+        self.trade_time = trade_time
+        self.event_time = event_time
+
+
+class Kline:
+    __slots__ = ('symbol', 'interval', 'open_time', 'open', 'high', 'low', 'close',
+                 'volume', 'closed', 'event_time')
+
+    def __init__(self, symbol, interval, open_time, open_, high, low, close, volume, closed, event_time):
+        self.symbol = symbol
+        self.interval = interval
+        self.open_time = open_time
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.closed = closed
+        self.event_time = event_time
+
+    def row(self):
+        return [self.open_time, self.open, self.high, self.low, self.close, self.volume]
+
+
+def decode_ticker(d):
+    return Ticker(d['s'], float(d['c']), float(d['P']), float(d['h']), float(d['l']),
+                  float(d['v']), float(d['q']), d['E'])
+
+
+def decode_mini_ticker(d):
+    return MiniTicker(d['s'], float(d['c']), float(d['o']), float(d['q']), d['E'])
+
+
+def decode_mini_ticker_arr(items):
+    return [decode_mini_ticker(d) for d in items]
+
+
+def decode_depth(d):
+    return DepthDiff(d['s'], d['U'], d['u'],
+                     [(float(p), float(q)) for p, q in d['b']],
+                     [(float(p), float(q)) for p, q in d['a']],
+                     d['E'])
+
+
+def decode_trade(d):
+    return Trade(d['s'], float(d['p']), float(d['q']), d['m'], d['T'], d['E'])
+
+
+def decode_kline(d):
+    k = d['k']
+    return Kline(k['s'], k['i'], k['t'], float(k['o']), float(k['h']), float(k['l']),
+                 float(k['c']), float(k['v']), k['x'], d['E'])
+
+
+DECODERS = {
+    'ticker': decode_ticker,
+    'miniTicker': decode_mini_ticker,
+    'miniTicker@arr': decode_mini_ticker_arr,
+    'depth': decode_depth,
+    'aggTrade': decode_trade,
+    'kline': decode_kline,
+}
+
+
+def stream_kind(stream):
+    if stream.startswith('!'):
+        return stream[1:]
+    name = stream.split('@', 1)[1] if '@' in stream else stream
+    if name.startswith('kline_'):
+        return 'kline'
+    if name.startswith('depth'):
+        return 'depth'
+    return name
+
+
+class MessageDecoder:
+    def __init__(self, loads=None, decoders=None):
+        self.loads = loads or _loads
+        self.decoders = decoders or DECODERS
+        self.kinds = {}
+
+    def decode(self, message):
+        payload = self.loads(message)
+        stream = payload.get('stream')
+        if stream is None:
+            return payload
+
+        kind = self.kinds.get(stream)
+        if kind is None:
+            kind = self.kinds[stream] = stream_kind(stream)
+        decoder = self.decoders.get(kind)
+        if decoder is not None:
+            payload['data'] = decoder(payload['data'])
+        payload['kind'] = kind
+        return payload
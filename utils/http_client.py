@@ -0,0 +1,332 @@
+import heapq
+import itertools
+import threading
+import time
+import requests
+from concurrent.futures import Future, wait
+from requests.adapters import HTTPAdapter
+
+
+PRIORITY_USER = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+
+class RateLimited(Exception):
+    pass
+
+
+class StaleResponse(Exception):
+    pass
+
+
+def request_weight(url, params):
+    # Binance REQUEST_WEIGHT costs for the endpoints this app uses.
+    params = params or {}
+    endpoint = url.rsplit("/", 1)[-1]
+    if endpoint == "depth":
+        limit = int(params.get('limit', 100))
+        return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+    if endpoint == "price":
+        return 2 if 'symbol' in params else 4
+    if endpoint == "klines":
+        return 2
+    return 1
+
+
+class WeightBudget:
+    def __init__(self, limit, shares):
+        self.limit = limit
+        self.shares = shares
+        self.lock = threading.Lock()
+        self.window = None
+        self.used = 0
+        self.blocked_until = 0.0
+
+    def reserve(self, weight, priority):
+        # Returns 0 once the weight is reserved, otherwise seconds to wait.
+        # Lower priorities stop at a smaller share of the limit so user
+        # fetches still have headroom when background polling is busy.
+        now = time.time()
+        with self.lock:
+            self._roll(now)
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if self.used + weight > self.limit * self.shares[priority]:
+                return 60 - now % 60
+            self.used += weight
+            return 0
+
+    def release(self, weight):
+        # Returns weight that was reserved but never spent.
+        with self.lock:
+            self.used = max(self.used - weight, 0)
+
+    def observe(self, headers, status):
+        now = time.time()
+        with self.lock:
+            self._roll(now)
+            used = headers.get("X-MBX-USED-WEIGHT-1m")
+            if used is not None:
+                self.used = max(self.used, int(used))
+            if status in (418, 429):
+                retry = int(headers.get("Retry-After", 60))
+                self.blocked_until = max(self.blocked_until, now + retry)
+
+    def snapshot(self):
+        with self.lock:
+            self._roll(time.time())
+            return {'used': self.used, 'limit': self.limit,
+                    'blocked_s': max(self.blocked_until - time.time(), 0.0)}
+
+    def _roll(self, now):
+        window = int(now // 60)
+        if window != self.window:
+            self.window = window
+            self.used = 0
+
+
+class HttpClient:
+    def __init__(self, max_in_flight=8, timeout=3, weight_limit=6000, weight_shares=(0.95, 0.85, 0.6),
+                 max_wait=30):
+        self.timeout = timeout
+        self.max_wait = max_wait
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_in_flight)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.budget = WeightBudget(weight_limit, weight_shares)
+        self.cond = threading.Condition()
+        self.queue = []
+        self.order = itertools.count()
+        self.closed = False
+        self.local = threading.local()
+        self.workers = [threading.Thread(target=self._work, name=f"http-{i}", daemon=True)
+                        for i in range(max_in_flight)]
+        for w in self.workers:
+            w.start()
+
+        self.lock = threading.Lock()
+        self.throttled = set()
+        self.tagged = {}
+        self.inflight = {}
+        self.recorder = None
+        self.counters = {'sent': 0, 'coalesced': 0, 'throttled': 0, 'deferred': 0, 'stale': 0}
+
+    def get_json(self, url, params=None, timeout=None, priority=None):
+        if priority is None:
+            priority = getattr(self.local, 'priority', PRIORITY_NORMAL)
+        key = (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+        with self.lock:
+            entry = self.inflight.get(key)
+            owner = entry is None
+            if owner:
+                shared = Future()
+                self.inflight[key] = (shared, priority)
+            else:
+                shared, owner_priority = entry
+                self.counters['coalesced'] += 1
+        if not owner:
+            try:
+                return shared.result()
+            except RateLimited:
+                # The owner ran out of its own (smaller) share; a more urgent
+                # caller still has room, so it sends the request itself.
+                if owner_priority <= priority:
+                    raise
+            return self.get_json(url, params, timeout, priority)
+
+        try:
+            self._take_budget(request_weight(url, params), priority)
+            resp = self.session.get(url, params=params, timeout=timeout or self.timeout)
+            self.budget.observe(resp.headers, resp.status_code)
+            resp.raise_for_status()
+            if self.recorder is not None:
+                self.recorder.record_rest(url, params, resp.text)
+            data = resp.json()
+        except BaseException as e:
+            self._release(key)
+            shared.set_exception(e)
+            raise
+        self._release(key)
+        shared.set_result(data)
+        return data
+
+    def submit(self, url, params=None, tag=None, timeout=None, priority=PRIORITY_NORMAL, current=None):
+        return self.submit_call(self.get_json, url, params, timeout, tag=tag, priority=priority, current=current,
+                                weight=request_weight(url, params))
+
+    def submit_call(self, fn, *args, tag=None, priority=PRIORITY_NORMAL, current=None, weight=0):
+        # weight is what the call will spend; it is reserved before a worker
+        # picks the job up, so throttled jobs wait in the queue, not in a worker.
+        future = Future()
+        with self.cond:
+            if self.closed:
+                future.cancel()
+                return future
+            heapq.heappush(self.queue, (priority, next(self.order), future, fn, args, current, weight,
+                                        time.monotonic()))
+            self.cond.notify_all()
+        if tag is not None:
+            with self.lock:
+                old = self.tagged.get(tag)
+                self.tagged[tag] = future
+            if old is not None:
+                old.cancel()
+            future.add_done_callback(lambda f: self._untag(tag, f))
+        return future
+
+    def cancel(self, tag):
+        with self.lock:
+            future = self.tagged.pop(tag, None)
+        if future is not None:
+            future.cancel()
+
+    def get_many(self, requests_list, timeout=None, priority=PRIORITY_NORMAL):
+        futures = [self.submit(url, params, priority=priority) for url, params in requests_list]
+        done, not_done = wait(futures, timeout=timeout or self.timeout * 2)
+        for f in not_done:
+            f.cancel()
+
+        results = []
+        for f in futures:
+            if f in done and not f.cancelled() and f.exception() is None:
+                results.append(f.result())
+            else:
+                results.append(None)
+        return results
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        with self.cond:
+            counters['queued'] = len(self.queue)
+        return dict(counters, weight=self.budget.snapshot())
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            queued, self.queue = self.queue, []
+            self.cond.notify_all()
+        for job in queued:
+            job[2].cancel()
+        self.session.close()
+
+    def _take_budget(self, weight, priority):
+        # Weight reserved when the job was dequeued is spent first. A worker
+        # never sleeps on the budget; only callers on their own threads do.
+        prepaid = getattr(self.local, 'prepaid', None)
+        if prepaid is not None:
+            if prepaid >= weight:
+                self.local.prepaid = prepaid - weight
+                self._count('sent')
+                return
+            self._wait_for_budget(weight, priority, block=False)
+        else:
+            self._wait_for_budget(weight, priority)
+
+    def _wait_for_budget(self, weight, priority, block=True):
+        deadline = time.monotonic() + self.max_wait
+        throttled = False
+        while True:
+            delay = self.budget.reserve(weight, priority)
+            if delay <= 0:
+                break
+            # Background polls are dropped rather than queued; their caller
+            # retries on its next cycle.
+            if priority >= PRIORITY_BACKGROUND:
+                self._count('deferred')
+                raise RateLimited(f"weight budget exhausted, retry in {delay:.0f}s")
+            if not throttled:
+                self._count('throttled')
+                throttled = True
+            if not block or self.closed or time.monotonic() + min(delay, 0.5) > deadline:
+                raise RateLimited(f"weight budget exhausted, retry in {delay:.0f}s")
+            time.sleep(min(delay, 0.5))
+        self._count('sent')
+
+    def _next_job(self):
+        # Returns the next job whose weight fits the budget. A throttled head
+        # job stays queued, so a user fetch submitted meanwhile sorts ahead of
+        # it and runs as soon as its own (larger) share allows.
+        with self.cond:
+            while True:
+                while not self.queue and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    return None, None
+                job = self.queue[0]
+                priority, order, future, weight, queued = job[0], job[1], job[2], job[6], job[7]
+                if future.cancelled():
+                    heapq.heappop(self.queue)
+                    continue
+                delay = self.budget.reserve(weight, priority) if weight else 0
+                if delay <= 0:
+                    self.throttled.discard(order)
+                    return heapq.heappop(self.queue), None
+                if priority >= PRIORITY_BACKGROUND:
+                    self._count('deferred')
+                elif time.monotonic() - queued + min(delay, 0.5) > self.max_wait:
+                    pass
+                else:
+                    if order not in self.throttled:
+                        self.throttled.add(order)
+                        self._count('throttled')
+                    self.cond.wait(min(delay, 0.5))
+                    continue
+                self.throttled.discard(order)
+                heapq.heappop(self.queue)
+                return job, RateLimited(f"weight budget exhausted, retry in {delay:.0f}s")
+
+    def _work(self):
+        while True:
+            job, error = self._next_job()
+            if job is None:
+                return
+            priority, _, future, fn, args, current, weight, _ = job
+            if not future.set_running_or_notify_cancel():
+                self.budget.release(weight if error is None else 0)
+                continue
+            if error is not None:
+                future.set_exception(error)
+                continue
+            if current is not None and not current():
+                self.budget.release(weight)
+                self._count('stale')
+                future.set_exception(StaleResponse())
+                continue
+
+            self.local.priority = priority
+            self.local.prepaid = weight
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                future.set_exception(e)
+                continue
+            finally:
+                if self.local.prepaid:
+                    self.budget.release(self.local.prepaid)
+                self.local.priority = PRIORITY_NORMAL
+                self.local.prepaid = None
+
+            # The caller moved on (pair or interval changed) while this was in
+            # flight; drop the answer instead of letting it overwrite newer state.
+            if current is not None and not current():
+                self._count('stale')
+                future.set_exception(StaleResponse())
+            else:
+                future.set_result(result)
+
+    def _count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def _release(self, key):
+        with self.lock:
+            self.inflight.pop(key, None)
+
+    def _untag(self, tag, future):
+        with self.lock:
+            if self.tagged.get(tag) is future:
+                del self.tagged[tag]
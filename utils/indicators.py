@@ -0,0 +1,419 @@
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+DAY_MS = 86_400_000
+NAN = float('nan')
+
+
+def _sma(values, n):
+    out = np.full(len(values), np.nan)
+    if len(values) >= n:
+        cs = np.cumsum(np.insert(values, 0, 0.0))
+        out[n - 1:] = (cs[n:] - cs[:-n]) / n
+    return out
+
+
+def _ema(values, alpha, seed):
+    # Closed form e_t = d^t * (seed + alpha * sum(x_j / d^j)), evaluated in
+    # blocks short enough that d^-t cannot overflow.
+    out = np.empty(len(values))
+    decay = 1.0 - alpha
+    block = max(1, int(500 / -math.log(decay))) if decay > 0 else 1
+    prev = seed
+    for s in range(0, len(values), block):
+        chunk = values[s:s + block]
+        p = decay ** np.arange(1, len(chunk) + 1)
+        out[s:s + block] = p * (prev + alpha * np.cumsum(chunk / p))
+        prev = out[s + len(chunk) - 1]
+    return out
+
+
+def _prev_close(data):
+    return float(data[-2, 4]) if len(data) > 1 else None
+
+
+class _Window:
+    def __init__(self, n):
+        self.n = n
+        self.values = deque(maxlen=n - 1)
+        self.s1 = 0.0
+        self.s2 = 0.0
+        self.commits = 0
+
+    def reset(self, values):
+        keep = values[max(len(values) - (self.n - 1), 0):] if self.n > 1 else ()
+        self.values = deque((float(x) for x in keep), maxlen=self.n - 1)
+        self._resum()
+
+    def ready(self):
+        return len(self.values) == self.n - 1
+
+    def commit(self, x):
+        if self.n == 1:
+            return
+        if self.ready():
+            old = self.values[0]
+            self.s1 -= old
+            self.s2 -= old * old
+        self.values.append(x)
+        self.s1 += x
+        self.s2 += x * x
+        self.commits += 1
+        if self.commits >= self.n:
+            self._resum()
+
+    def _resum(self):
+        self.s1 = math.fsum(self.values)
+        self.s2 = math.fsum(x * x for x in self.values)
+        self.commits = 0
+
+
+class _Ema:
+    def __init__(self, n, alpha=None):
+        self.n = n
+        self.alpha = alpha if alpha is not None else 2.0 / (n + 1)
+        self.ema = None
+        self.warm = []
+
+    def load(self, values):
+        out = np.full(len(values), np.nan)
+        if len(values) >= self.n:
+            seed = values[:self.n].mean()
+            out[self.n - 1] = seed
+            out[self.n:] = _ema(values[self.n:], self.alpha, seed)
+
+        k = len(values) - 1
+        if k >= self.n:
+            self.ema, self.warm = float(out[k - 1]), []
+        else:
+            self.ema, self.warm = None, [float(x) for x in values[:max(k, 0)]]
+        return out
+
+    def value(self, x):
+        if self.ema is not None:
+            return self.ema + self.alpha * (x - self.ema)
+        if len(self.warm) == self.n - 1:
+            return (math.fsum(self.warm) + x) / self.n
+        return NAN
+
+    def commit(self, x):
+        if self.ema is not None or len(self.warm) == self.n - 1:
+            self.ema = self.value(x)
+            self.warm = []
+        else:
+            self.warm.append(x)
+
+
+class Indicator(ABC):
+    name = ""
+    overlay = True
+    bounds = None
+
+    def __init__(self):
+        self.outputs = ()
+
+    @abstractmethod
+    def load(self, data):
+        pass
+
+    @abstractmethod
+    def value(self, row):
+        pass
+
+    @abstractmethod
+    def commit(self, row):
+        pass
+
+
+class SMA(Indicator):
+    name = "MA"
+
+    def __init__(self, periods=(20, 50)):
+        self.windows = [_Window(n) for n in periods]
+        self.outputs = tuple(f"MA({n})" for n in periods)
+
+    def load(self, data):
+        c = data[:, 4]
+        for w in self.windows:
+            w.reset(c[:-1])
+        return [_sma(c, w.n) for w in self.windows]
+
+    def value(self, row):
+        c = row[4]
+        return tuple((w.s1 + c) / w.n if w.ready() else NAN for w in self.windows)
+
+    def commit(self, row):
+        for w in self.windows:
+            w.commit(row[4])
+
+
+class EMA(Indicator):
+    name = "EMA"
+
+    def __init__(self, periods=(21,)):
+        self.emas = [_Ema(n) for n in periods]
+        self.outputs = tuple(f"EMA({n})" for n in periods)
+
+    def load(self, data):
+        return [e.load(data[:, 4]) for e in self.emas]
+
+    def value(self, row):
+        return tuple(e.value(row[4]) for e in self.emas)
+
+    def commit(self, row):
+        for e in self.emas:
+            e.commit(row[4])
+
+
+class Bollinger(Indicator):
+    name = "BB"
+
+    def __init__(self, n=20, k=2.0):
+        self.n = n
+        self.k = k
+        self.window = _Window(n)
+        self.outputs = (f"BB({n})", "Upper", "Lower")
+
+    def load(self, data):
+        c = data[:, 4]
+        self.window.reset(c[:-1])
+        mid = _sma(c, self.n)
+        std = np.full(len(c), np.nan)
+        if len(c) >= self.n:
+            std[self.n - 1:] = sliding_window_view(c, self.n).std(axis=1)
+        return [mid, mid + self.k * std, mid - self.k * std]
+
+    def value(self, row):
+        w = self.window
+        if not w.ready():
+            return NAN, NAN, NAN
+        c = row[4]
+        mean = (w.s1 + c) / self.n
+        std = math.sqrt(max((w.s2 + c * c) / self.n - mean * mean, 0.0))
+        return mean, mean + self.k * std, mean - self.k * std
+
+    def commit(self, row):
+        self.window.commit(row[4])
+
+
+class VWAP(Indicator):
+    name = "VWAP"
+
+    def __init__(self):
+        self.outputs = ("VWAP",)
+        self.day = None
+        self.pv = 0.0
+        self.vol = 0.0
+
+    def load(self, data):
+        day = data[:, 0] // DAY_MS
+        pv = np.cumsum((data[:, 2] + data[:, 3] + data[:, 4]) / 3 * data[:, 5])
+        vol = np.cumsum(data[:, 5])
+
+        starts = np.zeros(len(data), dtype=int)
+        if len(data) > 1:
+            changed = np.flatnonzero(day[1:] != day[:-1]) + 1
+            starts[changed] = changed
+            starts = np.maximum.accumulate(starts)
+        base_pv = np.where(starts > 0, pv[starts - 1], 0.0)
+        base_vol = np.where(starts > 0, vol[starts - 1], 0.0)
+        session_pv, session_vol = pv - base_pv, vol - base_vol
+
+        if len(data) > 1:
+            self.day = day[-2]
+            self.pv, self.vol = float(session_pv[-2]), float(session_vol[-2])
+        else:
+            self.day, self.pv, self.vol = None, 0.0, 0.0
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return [np.where(session_vol > 0, session_pv / session_vol, np.nan)]
+
+    def _session(self, row):
+        pv = (row[2] + row[3] + row[4]) / 3 * row[5]
+        if row[0] // DAY_MS != self.day:
+            return pv, row[5]
+        return self.pv + pv, self.vol + row[5]
+
+    def value(self, row):
+        pv, vol = self._session(row)
+        return (pv / vol if vol > 0 else NAN,)
+
+    def commit(self, row):
+        self.pv, self.vol = self._session(row)
+        self.day = row[0] // DAY_MS
+
+
+class RSI(Indicator):
+    name = "RSI"
+    overlay = False
+    bounds = (0.0, 100.0)
+
+    def __init__(self, n=14):
+        self.gain = _Ema(n, 1.0 / n)
+        self.loss = _Ema(n, 1.0 / n)
+        self.prev = None
+        self.outputs = (f"RSI({n})",)
+
+    @staticmethod
+    def _rsi(gain, loss):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(loss > 0, 100 - 100 / (1 + gain / loss), 100.0)
+
+    def load(self, data):
+        diff = np.diff(data[:, 4])
+        gain = self.gain.load(np.maximum(diff, 0.0))
+        loss = self.loss.load(np.maximum(-diff, 0.0))
+        rsi = np.where(np.isnan(gain), np.nan, self._rsi(gain, loss))
+        self.prev = _prev_close(data)
+        return [np.insert(rsi, 0, np.nan)]
+
+    def value(self, row):
+        if self.prev is None:
+            return (NAN,)
+        d = row[4] - self.prev
+        gain = self.gain.value(max(d, 0.0))
+        loss = self.loss.value(max(-d, 0.0))
+        if gain != gain:
+            return (NAN,)
+        return (100 - 100 / (1 + gain / loss) if loss > 0 else 100.0,)
+
+    def commit(self, row):
+        if self.prev is not None:
+            d = row[4] - self.prev
+            self.gain.commit(max(d, 0.0))
+            self.loss.commit(max(-d, 0.0))
+        self.prev = row[4]
+
+
+class MACD(Indicator):
+    name = "MACD"
+    overlay = False
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = _Ema(fast)
+        self.slow = _Ema(slow)
+        self.signal = _Ema(signal)
+        self.outputs = (f"MACD({fast},{slow})", f"Signal({signal})", "Hist")
+
+    def load(self, data):
+        c = data[:, 4]
+        macd = self.fast.load(c) - self.slow.load(c)
+        valid = ~np.isnan(macd)
+        signal = np.full(len(c), np.nan)
+        signal[valid] = self.signal.load(macd[valid])
+        return [macd, signal, macd - signal]
+
+    def value(self, row):
+        macd = self.fast.value(row[4]) - self.slow.value(row[4])
+        if macd != macd:
+            return NAN, NAN, NAN
+        signal = self.signal.value(macd)
+        return macd, signal, macd - signal
+
+    def commit(self, row):
+        macd = self.fast.value(row[4]) - self.slow.value(row[4])
+        self.fast.commit(row[4])
+        self.slow.commit(row[4])
+        if macd == macd:
+            self.signal.commit(macd)
+
+
+class ATR(Indicator):
+    name = "ATR"
+    overlay = False
+
+    def __init__(self, n=14):
+        self.ema = _Ema(n, 1.0 / n)
+        self.prev = None
+        self.outputs = (f"ATR({n})",)
+
+    @staticmethod
+    def _true_range(high, low, prev):
+        if prev is None:
+            return high - low
+        return max(high - low, abs(high - prev), abs(low - prev))
+
+    def load(self, data):
+        h, l, c = data[:, 2], data[:, 3], data[:, 4]
+        prev = np.insert(c[:-1], 0, np.nan)
+        tr = np.fmax(h - l, np.fmax(np.abs(h - prev), np.abs(l - prev)))
+        self.prev = _prev_close(data)
+        return [self.ema.load(tr)]
+
+    def value(self, row):
+        return (self.ema.value(self._true_range(row[2], row[3], self.prev)),)
+
+    def commit(self, row):
+        self.ema.commit(self._true_range(row[2], row[3], self.prev))
+        self.prev = row[4]
+
+
+def default_indicators():
+    return [SMA(), EMA(), Bollinger(), VWAP(), RSI(), MACD(), ATR()]
+
+
+class _Buffer:
+    def __init__(self, values):
+        n = len(values)
+        self.data = np.full(max(64, 2 * n), np.nan)
+        self.data[:n] = values
+        self.start = 0
+        self.end = n
+
+    def view(self):
+        return self.data[self.start:self.end]
+
+    def last(self):
+        return self.data[self.end - 1] if self.end > self.start else NAN
+
+    def set_last(self, value):
+        self.data[self.end - 1] = value
+
+    def popleft(self):
+        self.start += 1
+
+    def append(self, value):
+        if self.end == len(self.data):
+            n = self.end - self.start
+            data = self.data if 2 * n <= len(self.data) else np.full(2 * len(self.data), np.nan)
+            data[:n] = self.data[self.start:self.end]
+            self.data, self.start, self.end = data, 0, n
+        self.data[self.end] = value
+        self.end += 1
+
+
+class IndicatorEngine:
+    def __init__(self, indicators=None):
+        self.indicators = list(indicators) if indicators is not None else default_indicators()
+        self.by_name = {ind.name: ind for ind in self.indicators}
+        self.series = {}
+
+    def load(self, data):
+        for ind in self.indicators:
+            self.series[ind.name] = [_Buffer(s) for s in ind.load(data)]
+
+    def update_last(self, row):
+        for ind in self.indicators:
+            for buf, v in zip(self.series[ind.name], ind.value(row)):
+                buf.set_last(v)
+
+    def append(self, prev_row, row, drop=False):
+        for ind in self.indicators:
+            bufs = self.series[ind.name]
+            for buf, v in zip(bufs, ind.value(prev_row)):
+                buf.set_last(v)
+            ind.commit(prev_row)
+            for buf, v in zip(bufs, ind.value(row)):
+                if drop:
+                    buf.popleft()
+                buf.append(v)
+
+    def get(self, name):
+        return [buf.view() for buf in self.series.get(name, ())]
+
+    def last(self, name):
+        return [buf.last() for buf in self.series.get(name, ())]
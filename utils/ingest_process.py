@@ -0,0 +1,344 @@
+import itertools
+import multiprocessing as mp
+import queue
+import signal
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from config import (INGEST_RING_CAPACITY, INGEST_DEPTH_LEVELS, INGEST_POLL_MS, INGEST_HEARTBEAT_TIMEOUT)
+from utils.decoders import Ticker, MiniTicker, DepthDiff, Trade, Kline, stream_kind
+from utils.shm_ring import ShmRing
+
+
+# 'more' marks a record continued by the next one: depth diffs wider than
+# INGEST_DEPTH_LEVELS and miniTicker arrays are split across records.
+# 'gen' is the parent's subscription generation for the stream, so records
+# written for an earlier subscription of the same stream can be dropped.
+_COMMON = [('seq', 'i8'), ('stream', 'i4'), ('gen', 'i8'), ('more', '?'), ('event_time', 'i8'),
+           ('recv', 'f8'), ('decoded', 'f8'), ('symbol', 'S16')]
+
+DTYPES = {
+    'ticker': _COMMON + [('last', 'f8'), ('change_pct', 'f8'), ('high', 'f8'), ('low', 'f8'),
+                         ('volume', 'f8'), ('quote_volume', 'f8')],
+    'miniTicker': _COMMON + [('close', 'f8'), ('open', 'f8'), ('quote_volume', 'f8')],
+    'aggTrade': _COMMON + [('price', 'f8'), ('qty', 'f8'), ('is_buyer_maker', '?'), ('trade_time', 'i8')],
+    'kline': _COMMON + [('interval', 'S4'), ('open_time', 'i8'), ('open', 'f8'), ('high', 'f8'),
+                        ('low', 'f8'), ('close', 'f8'), ('volume', 'f8'), ('closed', '?')],
+    'depth': _COMMON + [('first_id', 'i8'), ('last_id', 'i8'), ('nb', 'i4'), ('na', 'i4'),
+                        ('bids', 'f8', (INGEST_DEPTH_LEVELS, 2)), ('asks', 'f8', (INGEST_DEPTH_LEVELS, 2))],
+}
+RING_KIND = {'miniTicker@arr': 'miniTicker'}
+CONTROL = np.dtype([('heartbeat', 'f8'), ('messages', 'i8'), ('dropped_stale', 'i8'), ('reconnects', 'i8')])
+
+
+def _capacity(kind):
+    # Depth records are ~3 KB each, the rest under 200 bytes.
+    return INGEST_RING_CAPACITY // 8 if kind == 'depth' else INGEST_RING_CAPACITY
+
+
+class _Writer:
+    def __init__(self, ring_names):
+        self.rings = {kind: ShmRing(DTYPES[kind], _capacity(kind), name) for kind, name in ring_names.items()}
+        self.stream_ids = {}
+
+    def on_data(self, payload):
+        kind = RING_KIND.get(payload['kind'], payload['kind'])
+        ring = self.rings.get(kind)
+        ids = self.stream_ids.get(payload['stream'])
+        if ring is None or ids is None:
+            return
+        stream_id, gen = ids
+        recv, decoded = payload['recv'], payload['decoded']
+        if kind == 'depth':
+            self._write_depth(ring, stream_id, gen, recv, decoded, payload['data'])
+            return
+        items = payload['data'] if isinstance(payload['data'], list) else [payload['data']]
+        last = len(items) - 1
+        for i, d in enumerate(items):
+            ring.put((-1, stream_id, gen, i < last, d.event_time, recv, decoded, d.symbol) + self._fields(kind, d))
+
+    @staticmethod
+    def _fields(kind, d):
+        if kind == 'aggTrade':
+            return d.price, d.qty, d.is_buyer_maker, d.trade_time
+        if kind == 'ticker':
+            return d.last, d.change_pct, d.high, d.low, d.volume, d.quote_volume
+        if kind == 'miniTicker':
+            return d.close, d.open, d.quote_volume
+        return d.interval, d.open_time, d.open, d.high, d.low, d.close, d.volume, d.closed
+
+    def _write_depth(self, ring, stream_id, gen, recv, decoded, d):
+        n = INGEST_DEPTH_LEVELS
+        chunks = max(-(-len(d.bids) // n), -(-len(d.asks) // n), 1)
+        for c in range(chunks):
+            bids, asks = d.bids[c * n:(c + 1) * n], d.asks[c * n:(c + 1) * n]
+            rec = ring.claim()
+            rec['stream'], rec['gen'], rec['more'], rec['event_time'] = stream_id, gen, c < chunks - 1, d.event_time
+            rec['recv'], rec['decoded'], rec['symbol'] = recv, decoded, d.symbol
+            rec['first_id'], rec['last_id'], rec['nb'], rec['na'] = d.first_id, d.last_id, len(bids), len(asks)
+            if bids:
+                rec['bids'][:len(bids)] = bids
+            if asks:
+                rec['asks'][:len(asks)] = asks
+            ring.commit()
+
+
+def _worker_main(ring_names, control_name, commands):
+    # The parent owns shutdown; Ctrl+C in the terminal must not kill the worker
+    # before the GUI has stopped reading from it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from utils.binance_api import BinanceStream
+
+    writer = _Writer(ring_names)
+    control_shm = shared_memory.SharedMemory(name=control_name)
+    control = np.ndarray((1,), dtype=CONTROL, buffer=control_shm.buf)
+    stream = BinanceStream()
+    parent = mp.parent_process()
+    stream.start()
+    try:
+        while parent is None or parent.is_alive():
+            try:
+                cmd = commands.get(timeout=0.25)
+            except queue.Empty:
+                cmd = None
+            if cmd is not None:
+                if cmd[0] == 'stop':
+                    break
+                _, removed, added = cmd
+                for s in removed:
+                    writer.stream_ids.pop(s, None)
+                writer.stream_ids.update((s, (stream_id, gen)) for s, stream_id, gen in added)
+                stream.replace(removed, [s for s, _, _ in added], writer.on_data)
+            stats = stream.stats
+            control[0] = (time.time(), stats['messages'], stats['dropped_stale'], stats['reconnects'])
+    finally:
+        stream.stop()
+
+
+class ProcessStream:
+    def __init__(self, poll_ms=INGEST_POLL_MS, heartbeat_timeout=INGEST_HEARTBEAT_TIMEOUT):
+        self.poll = poll_ms / 1000
+        self.heartbeat_timeout = heartbeat_timeout
+        self.ctx = mp.get_context("spawn")
+        self.is_running = False
+        self.process = None
+        self.commands = None
+        self.reader = None
+        self.watchdog = None
+        self.wake = threading.Event()
+
+        self.rings = {kind: ShmRing(dtype, _capacity(kind)) for kind, dtype in DTYPES.items()}
+        self.control_shm = shared_memory.SharedMemory(create=True, size=CONTROL.itemsize)
+        self.control = np.ndarray((1,), dtype=CONTROL, buffer=self.control_shm.buf)
+        self.control[0] = (0.0, 0, 0, 0)
+
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.callbacks = {}
+        self.active = {}
+        self.stream_ids = {}
+        self.stream_names = []
+        self.stream_kinds = []
+        self.partial = {}
+        self.counters = {'dropped_stale': 0, 'restarts': 0}
+        self.base = {'messages': 0, 'dropped_stale': 0, 'reconnects': 0}
+
+    @property
+    def stats(self):
+        c = self.control[0] if self.control is not None else {'messages': 0, 'dropped_stale': 0, 'reconnects': 0}
+        return {
+            'messages': self.base['messages'] + int(c['messages']),
+            'dropped_stale': self.base['dropped_stale'] + int(c['dropped_stale']) + self.counters['dropped_stale'],
+            'reconnects': self.base['reconnects'] + int(c['reconnects']),
+            'restarts': self.counters['restarts'],
+            'overruns': sum(r.overruns for r in self.rings.values()),
+        }
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.wake.clear()
+        self._spawn()
+        self.reader = threading.Thread(target=self._read_loop, daemon=True)
+        self.reader.start()
+        self.watchdog = threading.Thread(target=self._watch, daemon=True)
+        self.watchdog.start()
+
+    def stop(self):
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.wake.set()
+        try:
+            self.commands.put(('stop',))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+        if self.reader is not None:
+            self.reader.join(timeout=1)
+        if self.watchdog is not None:
+            self.watchdog.join(timeout=1)
+        self._fold_counters()
+        for ring in self.rings.values():
+            ring.close()
+        self.control = None
+        self.control_shm.close()
+        self.control_shm.unlink()
+
+    def subscribe(self, streams, callback):
+        self.replace([], streams, callback)
+
+    def unsubscribe(self, streams, callback):
+        self.replace(streams, [], callback)
+
+    def replace(self, old_streams, new_streams, callback):
+        removed, added = [], []
+        with self.lock:
+            for s in old_streams:
+                if s in new_streams:
+                    continue
+                callbacks = [cb for cb in self.callbacks.get(s, []) if cb != callback]
+                if callbacks:
+                    self.callbacks[s] = callbacks
+                else:
+                    self.callbacks.pop(s, None)
+                    self.active.pop(s, None)
+                    removed.append(s)
+            # Like BinanceStream's SUBSCRIBE ids: records still in the rings
+            # from a previous subscription of a stream carry an older gen.
+            gen = next(self.ids)
+            for s in new_streams:
+                callbacks = self.callbacks.get(s, [])
+                if not callbacks:
+                    self.active[s] = gen
+                    added.append((s, self._stream_id(s), gen))
+                if callback not in callbacks:
+                    self.callbacks[s] = callbacks + [callback]
+            if self.process is not None and (removed or added):
+                self.commands.put(('replace', removed, added))
+
+    def _stream_id(self, stream):
+        stream_id = self.stream_ids.get(stream)
+        if stream_id is None:
+            stream_id = self.stream_ids[stream] = len(self.stream_names)
+            self.stream_names.append(stream)
+            self.stream_kinds.append(stream_kind(stream))
+        return stream_id
+
+    def _spawn(self):
+        with self.lock:
+            self.commands = self.ctx.Queue()
+            self.control[0]['heartbeat'] = time.time()
+            self.process = self.ctx.Process(
+                target=_worker_main, daemon=True,
+                args=({k: r.name for k, r in self.rings.items()}, self.control_shm.name, self.commands))
+            self.process.start()
+            if self.callbacks:
+                self.commands.put(('replace', [], [(s, self._stream_id(s), self.active[s]) for s in self.callbacks]))
+
+    def _watch(self):
+        while not self.wake.wait(0.5):
+            alive = self.process.is_alive()
+            # The heartbeat stays at spawn time until the worker has imported
+            # its modules, so allow for a slow first start.
+            stale = time.time() - self.control[0]['heartbeat'] > self.heartbeat_timeout
+            if alive and not stale:
+                continue
+            print(f"Ingest worker {'exited' if not alive else 'stalled'}, restarting")
+            if alive:
+                self.process.kill()
+                self.process.join(timeout=1)
+            self._fold_counters()
+            self.counters['restarts'] += 1
+            self.partial.clear()
+            if self.is_running:
+                self._spawn()
+
+    def _fold_counters(self):
+        # Worker counters restart from zero with each process.
+        c = self.control[0]
+        for key in ('messages', 'dropped_stale', 'reconnects'):
+            self.base[key] += int(c[key])
+        self.control[0] = (time.time(), 0, 0, 0)
+
+    def _read_loop(self):
+        while self.is_running:
+            try:
+                if not self._drain():
+                    time.sleep(self.poll)
+            except Exception as e:
+                print(f"Ingest Read Error: {e}")
+
+    def _drain(self):
+        got = False
+        for kind, ring in self.rings.items():
+            batch = ring.read()
+            if batch is None or not len(batch):
+                continue
+            got = True
+            if kind == 'ticker':
+                # Only the newest ticker per stream matters to the UI.
+                newest = {s: i for i, s in enumerate(batch['stream'].tolist())}
+                batch = batch[sorted(newest.values())]
+            for stream_id, gen, data, recv, decoded in self._records(kind, batch):
+                self._dispatch(stream_id, gen, data, recv, decoded)
+        return got
+
+    def _records(self, kind, batch):
+        cols = {name: batch[name].tolist() for name in batch.dtype.names if name not in ('bids', 'asks')}
+        for i in range(len(batch)):
+            stream_id, t = cols['stream'][i], cols['event_time'][i]
+            symbol = cols['symbol'][i].decode()
+            if kind == 'aggTrade':
+                data = Trade(symbol, cols['price'][i], cols['qty'][i], cols['is_buyer_maker'][i],
+                             cols['trade_time'][i], t)
+            elif kind == 'ticker':
+                data = Ticker(symbol, cols['last'][i], cols['change_pct'][i], cols['high'][i], cols['low'][i],
+                              cols['volume'][i], cols['quote_volume'][i], t)
+            elif kind == 'kline':
+                data = Kline(symbol, cols['interval'][i].decode(), cols['open_time'][i], cols['open'][i],
+                             cols['high'][i], cols['low'][i], cols['close'][i], cols['volume'][i],
+                             cols['closed'][i], t)
+            elif kind == 'miniTicker':
+                data = MiniTicker(symbol, cols['close'][i], cols['open'][i], cols['quote_volume'][i], t)
+                if self.stream_kinds[stream_id] == 'miniTicker@arr':
+                    data = self._join(stream_id, data, cols['more'][i])
+            else:
+                nb, na = cols['nb'][i], cols['na'][i]
+                data = DepthDiff(symbol, cols['first_id'][i], cols['last_id'][i],
+                                 batch['bids'][i, :nb].tolist(), batch['asks'][i, :na].tolist(), t)
+                data = self._join(stream_id, data, cols['more'][i])
+            if data is not None:
+                yield stream_id, cols['gen'][i], data, cols['recv'][i], cols['decoded'][i]
+
+    def _join(self, stream_id, item, more):
+        # Reassemble records the worker split; returns None until the last part.
+        parts = self.partial.pop(stream_id, None)
+        if isinstance(item, DepthDiff):
+            if parts is not None:
+                parts.bids += item.bids
+                parts.asks += item.asks
+                item = parts
+        else:
+            item = (parts or []) + [item]
+        if more:
+            self.partial[stream_id] = item
+            return None
+        return item
+
+    def _dispatch(self, stream_id, gen, data, recv, decoded):
+        name = self.stream_names[stream_id]
+        with self.lock:
+            callbacks = self.callbacks.get(name)
+            current = self.active.get(name)
+        if not callbacks or gen != current:
+            self.counters['dropped_stale'] += 1
+            return
+        payload = {'stream': name, 'kind': self.stream_kinds[stream_id], 'data': data,
+                   'recv': recv, 'decoded': decoded, 'gen': gen}
+        for callback in callbacks:
+            callback(payload)
@@ -0,0 +1,80 @@
+import time
+import threading
+from collections import OrderedDict
+from utils.candle_series import CandleSeries
+
+
+class KlineCache:
+    def __init__(self, loader, max_rows, ttl):
+        self.loader = loader
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.total_rows = 0
+        self.total_bytes = 0
+        self.loading = set()
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'stale_hits': 0, 'misses': 0,
+                         'prefetches': 0, 'evictions': 0}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.counters['misses'] += 1
+                return None, False
+            self.entries.move_to_end(key)
+            rows, stamp = entry
+            fresh = time.monotonic() - stamp < self.ttl
+            self.counters['hits' if fresh else 'stale_hits'] += 1
+            return rows, fresh
+
+    def put(self, key, rows):
+        if not len(rows):
+            return
+        # Stored as a compact columnar copy: 48 bytes per candle.
+        rows = CandleSeries(len(rows), rows, slack=0)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self._forget(old[0])
+            self.entries[key] = (rows, time.monotonic())
+            self.total_rows += len(rows)
+            self.total_bytes += rows.nbytes
+            while self.total_rows > self.max_rows and len(self.entries) > 1:
+                _, (evicted, _) = self.entries.popitem(last=False)
+                self._forget(evicted)
+                self.counters['evictions'] += 1
+
+    def is_fresh(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and time.monotonic() - entry[1] < self.ttl
+
+    def prefetch(self, keys):
+        for key in keys:
+            with self.lock:
+                if key in self.loading:
+                    continue
+                entry = self.entries.get(key)
+                if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                    continue
+                self.loading.add(key)
+                self.counters['prefetches'] += 1
+            self.loader(key, lambda rows, k=key: self._on_loaded(k, rows))
+
+    def stats(self):
+        with self.lock:
+            total = self.counters['hits'] + self.counters['stale_hits'] + self.counters['misses']
+            hit_rate = (self.counters['hits'] + self.counters['stale_hits']) / total if total else 0.0
+            return dict(self.counters, series=len(self.entries),
+                        rows=self.total_rows, bytes=self.total_bytes, hit_rate=hit_rate)
+
+    def _forget(self, rows):
+        self.total_rows -= len(rows)
+        self.total_bytes -= rows.nbytes
+
+    def _on_loaded(self, key, rows):
+        with self.lock:
+            self.loading.discard(key)
+        self.put(key, rows)
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+
+# Incremental stages follow one message through the app; 'ingest' and
+# 'total' are cumulative from the exchange event time.
+STAGES = ('exchange', 'network', 'decode', 'handle', 'ingest', 'queue', 'render', 'total')
+
+
+def now_ms():
+    return time.time() * 1000
+
+
+class LatencyHistogram:
+    __slots__ = ('bounds', 'buckets', 'count', 'total', 'max', 'samples')
+
+    def __init__(self, bounds, samples):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=samples)
+
+    def add(self, ms):
+        self.buckets[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+        self.samples.append(ms)
+
+    def summary(self):
+        s = sorted(self.samples) or [0.0]
+        return {'count': self.count, 'p50_ms': s[len(s) // 2],
+                'p99_ms': s[min(len(s) - 1, int(len(s) * 0.99))], 'max_ms': s[-1]}
+
+
+class LatencyTracer:
+    def __init__(self, bounds, samples=2048):
+        self.bounds = tuple(bounds)
+        self.samples = samples
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.pending = {}
+
+    def observe(self, stage, stream, ms):
+        with self.lock:
+            hist = self.histograms.get((stage, stream))
+            if hist is None:
+                hist = self.histograms[(stage, stream)] = LatencyHistogram(self.bounds, self.samples)
+            hist.add(ms)
+
+    def mark(self, topic, event_time):
+        # A coalesced frame paints many events at once; keep the oldest one so
+        # 'total' reflects how stale the newest paint was for that topic.
+        if not event_time:
+            return
+        with self.lock:
+            if topic not in self.pending:
+                self.pending[topic] = (event_time, now_ms())
+
+    def painted(self, topic, started, finished):
+        with self.lock:
+            entry = self.pending.pop(topic, None)
+        if entry is None:
+            return
+        event_time, published = entry
+        self.observe('queue', topic, started - published)
+        self.observe('render', topic, finished - started)
+        self.observe('total', topic, finished - event_time)
+
+    def discard(self):
+        with self.lock:
+            self.pending.clear()
+
+    def summary(self, stage, stream):
+        with self.lock:
+            hist = self.histograms.get((stage, stream))
+            return hist.summary() if hist else None
+
+    def snapshot(self):
+        with self.lock:
+            items = list(self.histograms.items())
+            out = {}
+            for (stage, stream), hist in items:
+                out.setdefault(stage, {})[stream] = hist.summary()
+        return out
+
+    def to_prometheus(self, prefix="crypto_terminal"):
+        name = f"{prefix}_latency_seconds"
+        lines = [f"# HELP {name} Time spent between pipeline stages, from exchange event to painted frame.",
+                 f"# TYPE {name} histogram"]
+        with self.lock:
+            for (stage, stream), hist in sorted(self.histograms.items()):
+                labels = f'stage="{stage}",stream="{stream}"'
+                cumulative = 0
+                for bound, n in zip(self.bounds, hist.buckets):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{{labels},le="{bound / 1000:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.total / 1000:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {hist.count}")
+            lines.append(f"# HELP {prefix}_latency_max_seconds Largest latency seen per stage and stream.")
+            lines.append(f"# TYPE {prefix}_latency_max_seconds gauge")
+            for (stage, stream), hist in sorted(self.histograms.items()):
+                lines.append(f'{prefix}_latency_max_seconds{{stage="{stage}",stream="{stream}"}} '
+                             f"{hist.max / 1000:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    def __init__(self, tracer, path, every):
+        self.tracer = tracer
+        self.path = path
+        self.every = every
+        self.wake = threading.Event()
+        self.thread = None
+
+    def start(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.wake.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.wake.set()
+        self.write()
+
+    def write(self):
+        # Write beside the target and rename so scrapers never read half a file.
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                f.write(self.tracer.to_prometheus())
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Metrics Export Error: {e}")
+
+    def _run(self):
+        while not self.wake.wait(self.every):
+            self.write()
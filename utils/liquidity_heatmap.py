@@ -0,0 +1,113 @@
+import itertools
+import threading
+import numpy as np
+
+
+# Shared across instances so a consumer holding an old (epoch, head) cursor can
+# never mistake a new pair's heatmap for the one it last read.
+_epochs = itertools.count(1)
+
+
+class LiquidityHeatmap:
+    # Fixed (price rows x time columns) grid of resting notional around mid.
+    # Columns form a ring indexed by time bucket; rows are a fixed price step
+    # and shift as a block when mid drifts too far from the centre row.
+    def __init__(self, symbol, rows, cols, bucket_ms, step_bps, levels, sample_ms):
+        self.symbol = symbol
+        self.rows = rows
+        self.cols = cols
+        self.bucket_ms = bucket_ms
+        self.step_bps = step_bps
+        self.levels = levels
+        self.sample_ms = sample_ms
+        self.grid = np.zeros((rows, cols), dtype=np.float32)
+        self.lock = threading.Lock()
+
+        self.epoch = next(_epochs)
+        self.head = None
+        self.base = None
+        self.step = None
+        self.last_sample = 0
+        self.samples = 0
+
+    def sample(self, book, event_time):
+        # The throttle is checked before the book is copied; most diffs stop here.
+        if event_time - self.last_sample < self.sample_ms:
+            return False
+        # OrderBook.depth() stores bid keys negated.
+        bid_keys, bid_qtys, ask_keys, ask_qtys = book.depth(self.levels)
+        if not bid_keys or not ask_keys:
+            return False
+        prices = np.concatenate((-np.frombuffer(bid_keys), np.frombuffer(ask_keys)))
+        qtys = np.concatenate((np.frombuffer(bid_qtys), np.frombuffer(ask_qtys)))
+        mid = (prices[0] + prices[len(bid_keys)]) / 2
+
+        with self.lock:
+            self.last_sample = event_time
+            self.samples += 1
+            if self.base is None:
+                self.step = mid * self.step_bps / 10_000
+                self.base = mid - self.rows / 2 * self.step
+            else:
+                self._recentre(mid)
+            bucket = int(event_time // self.bucket_ms)
+            self._advance(bucket)
+
+            idx = np.floor((prices - self.base) / self.step).astype(np.intp)
+            keep = (idx >= 0) & (idx < self.rows)
+            column = np.bincount(idx[keep], weights=prices[keep] * qtys[keep], minlength=self.rows)
+            col = self.grid[:, self.head % self.cols]
+            np.maximum(col, column, out=col)
+        return True
+
+    def changes(self, since=None):
+        # Returns what a renderer holding cursor `since` is missing: either the
+        # whole grid oldest-first (shift None) or the columns from its last head
+        # onwards plus how far to scroll. Pass back the returned 'cursor'.
+        with self.lock:
+            if self.head is None:
+                return None
+            out = {'cursor': (self.epoch, self.head), 'head': self.head, 'bucket_ms': self.bucket_ms,
+                   'base': self.base, 'step': self.step, 'rows': self.rows, 'cols': self.cols,
+                   'vmax': float(self.grid.max())}
+            if since is None or since[0] != self.epoch or self.head - since[1] >= self.cols:
+                out['shift'] = None
+                out['block'] = self._columns(self.head - self.cols + 1, self.head)
+            else:
+                out['shift'] = self.head - since[1]
+                out['block'] = self._columns(since[1], self.head)
+            return out
+
+    def stats(self):
+        with self.lock:
+            return {'samples': self.samples, 'bytes': self.grid.nbytes}
+
+    def _columns(self, first, last):
+        return self.grid[:, np.arange(first, last + 1) % self.cols]
+
+    def _advance(self, bucket):
+        if self.head is None:
+            self.head = bucket
+            return
+        if bucket <= self.head:
+            return
+        gap = min(bucket - self.head, self.cols)
+        self.grid[:, np.arange(bucket - gap + 1, bucket + 1) % self.cols] = 0
+        self.head = bucket
+
+    def _recentre(self, mid):
+        # Re-centre once mid leaves the middle half of the price range.
+        centre = self.base + self.rows / 2 * self.step
+        if abs(mid - centre) < self.rows / 4 * self.step:
+            return
+        shift = int(round((mid - centre) / self.step))
+        if abs(shift) >= self.rows:
+            self.grid[:] = 0
+        elif shift > 0:
+            self.grid[:-shift] = self.grid[shift:]
+            self.grid[-shift:] = 0
+        else:
+            self.grid[-shift:] = self.grid[:shift]
+            self.grid[:-shift] = 0
+        self.base += shift * self.step
+        self.epoch = next(_epochs)
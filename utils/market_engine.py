@@ -0,0 +1,298 @@
+import threading
+import time
+from config import *
+from utils.binance_api import BinanceAPI, BinanceStream
+from utils.http_client import PRIORITY_BACKGROUND
+from utils.candle_buffer import CandleBuffer, INTERVAL_MS
+from utils.comparison_feed import ComparisonFeed
+from utils.kline_cache import KlineCache
+from utils.latency import LatencyTracer, now_ms
+from utils.liquidity_heatmap import LiquidityHeatmap
+from utils.order_book import OrderBook
+from utils.price_table import PriceTable
+from utils.trade_flow import TradeFlow
+
+
+TOPICS = ('kline', 'ticker', 'depth', 'aggTrade', 'comparison', 'watchlist')
+
+
+class EngineStats:
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.received = {}
+        self.published = {}
+
+    def record(self, kind):
+        with self.lock:
+            self.received[kind] = self.received.get(kind, 0) + 1
+
+    def trace_in(self, kind, payload):
+        data = payload['data']
+        if isinstance(data, list):
+            event_time = data[0].event_time if data else None
+        else:
+            event_time = getattr(data, 'event_time', None)
+        self.record(kind)
+        recv = payload.get('recv')
+        if event_time and recv:
+            self.tracer.observe('network', kind, recv - event_time)
+            self.tracer.observe('decode', kind, payload['decoded'] - recv)
+        return event_time
+
+    def trace_out(self, kind, payload, event_time):
+        decoded = payload.get('decoded')
+        if event_time and decoded:
+            done = now_ms()
+            self.tracer.observe('handle', kind, done - decoded)
+            self.tracer.observe('ingest', kind, done - event_time)
+
+    def record_publish(self, topic):
+        with self.lock:
+            self.published[topic] = self.published.get(topic, 0) + 1
+
+    def snapshot(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        with self.lock:
+            received = dict(self.received)
+            published = dict(self.published)
+
+        streams = {}
+        for kind, count in received.items():
+            latency = self.tracer.summary('ingest', kind) or {'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+            streams[kind] = {
+                'count': count,
+                'rate': count / elapsed,
+                'latency_p50_ms': latency['p50_ms'],
+                'latency_p99_ms': latency['p99_ms'],
+                'latency_max_ms': latency['max_ms'],
+            }
+        return {'uptime_s': elapsed, 'streams': streams, 'published': published}
+
+
+class MarketEngine:
+    def __init__(self, pair=DEFAULT_PAIR, interval=DEFAULT_INTERVAL, coins=DEFAULT_COINS, stream=None):
+        self.pair = pair
+        self.interval = interval
+        self.coins = list(coins)
+        self.is_running = False
+        self.wake = threading.Event()
+
+        self.lock = threading.Lock()
+        self.listeners = {topic: [] for topic in TOPICS}
+        self.tracer = LatencyTracer(LATENCY_BUCKETS_MS, LATENCY_SAMPLES)
+        self.stats = EngineStats(self.tracer)
+
+        self.trade_flow = TradeFlow(TRADE_FLOW_CAPACITY, TRADE_FLOW_WINDOWS)
+        self.candles = CandleBuffer(self.pair, self.interval)
+        self.kline_cache = KlineCache(self._load_series, KLINE_LRU_MAX_ROWS, KLINE_LRU_TTL)
+        self.order_book = OrderBook(self.pair, BinanceAPI.fetch_depth_snapshot)
+        self.heatmap = self._new_heatmap()
+        self.comp_feed = ComparisonFeed(self.coins)
+        self.watch_pairs = [f"{c}USDT" for c in self.coins]
+        self.prices = PriceTable(self.watch_pairs)
+        for pair in self.watch_pairs:
+            self.prices.subscribe(pair, self._on_price_change)
+
+        self.ws_manager = stream or BinanceStream()
+        self.pair_streams = self._pair_streams()
+
+    def subscribe(self, topic, callback):
+        with self.lock:
+            self.listeners[topic] = self.listeners[topic] + [callback]
+
+    def unsubscribe(self, topic, callback):
+        with self.lock:
+            self.listeners[topic] = [cb for cb in self.listeners[topic] if cb != callback]
+
+    def publish(self, topic, payload):
+        self.stats.record_publish(topic)
+        for callback in self.listeners[topic]:
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"Engine Listener Error ({topic}): {e}")
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.wake.clear()
+
+        self._fetch_chart()
+        self._backfill_comparison(self.coins)
+        self.ws_manager.subscribe(self.pair_streams, self.handle_stream_data)
+        self.ws_manager.subscribe(
+            self.comp_feed.streams() + self.prices.streams(self.watch_pairs), self.handle_market_data)
+        self.ws_manager.start()
+        threading.Thread(target=self._housekeeping, daemon=True).start()
+
+    def stop(self):
+        self.is_running = False
+        self.wake.set()
+        self.ws_manager.stop()
+
+    def set_pair(self, pair):
+        self.pair = pair
+        BinanceAPI.http.cancel("klines")
+        self._stash_candles()
+        self.candles = CandleBuffer(self.pair, self.interval)
+        self.trade_flow = TradeFlow(TRADE_FLOW_CAPACITY, TRADE_FLOW_WINDOWS)
+        self.order_book = OrderBook(self.pair, BinanceAPI.fetch_depth_snapshot)
+        self.heatmap = self._new_heatmap()
+        self._fetch_chart()
+        self._resubscribe()
+
+    def set_interval(self, interval):
+        self.interval = interval
+        BinanceAPI.http.cancel("klines")
+        self._stash_candles()
+        self.candles = CandleBuffer(self.pair, self.interval)
+        self._fetch_chart()
+        self._resubscribe()
+
+    def load_history(self, key, end_time, callback):
+        def worker():
+            rows = BinanceAPI.get_kline_history(key[0], key[1], end_time, HISTORY_PAGES_PER_LOAD)
+            if self.is_running:
+                callback(rows)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def snapshot(self):
+        bids, asks = self.order_book.top(1)
+        return {
+            'pair': self.pair,
+            'interval': self.interval,
+            'engine': self.stats.snapshot(),
+            'socket': dict(self.ws_manager.stats),
+            'kline_cache': self.kline_cache.stats(),
+            'rest': BinanceAPI.http.stats(),
+            'candles': len(self.candles),
+            'best_bid': bids[0][0] if bids else None,
+            'best_ask': asks[0][0] if asks else None,
+            'trade_flow': self.trade_flow.stats(),
+            'heatmap': self.heatmap.stats(),
+            'latency': self.tracer.snapshot(),
+        }
+
+    def _new_heatmap(self):
+        return LiquidityHeatmap(self.pair, HEATMAP_PRICE_BUCKETS, HEATMAP_TIME_BUCKETS, HEATMAP_BUCKET_MS,
+                                HEATMAP_STEP_BPS, HEATMAP_LEVELS, HEATMAP_SAMPLE_MS)
+
+    def _housekeeping(self):
+        while not self.wake.wait(KLINE_PREFETCH_INTERVAL_MS / 1000):
+            self._prefetch_neighbours()
+
+    def _pair_streams(self):
+        symbol = self.pair.lower()
+        return [f"{symbol}@ticker", f"{symbol}@depth@100ms",
+                f"{symbol}@aggTrade", f"{symbol}@kline_{self.interval}"]
+
+    def _resubscribe(self):
+        new_streams = self._pair_streams()
+        self.ws_manager.replace(self.pair_streams, new_streams, self.handle_stream_data)
+        self.pair_streams = new_streams
+
+    def _fetch_chart(self):
+        key = (self.pair, self.interval)
+        rows, fresh = self.kline_cache.get(key)
+        if rows is None:
+            rows = BinanceAPI.get_cached_kline_rows(*key)
+        self._apply_backfill(self.pair, self.interval, rows)
+        if not fresh:
+            self._backfill_gap()
+        self._prefetch_neighbours()
+
+    def _stash_candles(self):
+        self.kline_cache.put((self.candles.pair, self.candles.interval), self.candles.snapshot())
+
+    def _load_series(self, key, callback):
+        BinanceAPI.fetch_kline_rows(key[0], key[1], callback, tag=None, priority=PRIORITY_BACKGROUND)
+
+    def _prefetch_neighbours(self):
+        keys = [(f"{c}USDT", self.interval) for c in self.coins if f"{c}USDT" != self.pair]
+        keys += [(self.pair, tf) for tf in INTERVAL_MS if tf != self.interval]
+        self.kline_cache.prefetch(keys)
+
+    def _backfill_gap(self):
+        candles = self.candles
+        candles.needs_backfill = False
+        pair, interval = candles.pair, candles.interval
+        BinanceAPI.fetch_kline_rows(
+            pair, interval, lambda rows: self._apply_backfill(pair, interval, rows),
+            current=lambda: self.candles.matches(pair, interval))
+
+    def _apply_backfill(self, pair, interval, rows):
+        candles = self.candles
+        if not rows or not candles.matches(pair, interval):
+            return
+        candles.load(rows)
+        self.kline_cache.put((pair, interval), candles.snapshot())
+        self.publish('kline', candles)
+
+    def _backfill_comparison(self, coins):
+        def worker():
+            pairs = [f"{c}USDT" for c in coins]
+            rows = BinanceAPI.get_kline_rows_many(pairs, "1h", limit=24)
+            for c in coins:
+                self.comp_feed.load(c, rows.get(f"{c}USDT"))
+            self.publish('comparison', self.comp_feed)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_price_change(self, symbol):
+        self.publish('watchlist', symbol)
+
+    def _publish_traced(self, topic, payload, event_time):
+        self.tracer.mark(topic, event_time)
+        self.publish(topic, payload)
+
+    def handle_market_data(self, payload):
+        if not payload or 'data' not in payload:
+            return
+        kind = payload['kind']
+        data = payload['data']
+        event_time = self.stats.trace_in(kind, payload)
+
+        if kind == 'miniTicker@arr':
+            self.prices.apply_many(data)
+        elif kind == 'miniTicker':
+            self.prices.apply_mini_ticker(data)
+        elif kind == 'kline':
+            if self.comp_feed.apply_kline(data):
+                self.publish('comparison', self.comp_feed)
+            stale = self.comp_feed.take_backfill()
+            if stale:
+                self._backfill_comparison(sorted(stale))
+        self.stats.trace_out(kind, payload, event_time)
+
+    def handle_stream_data(self, payload):
+        if not payload or 'data' not in payload:
+            return
+        kind = payload['kind']
+        data = payload['data']
+        event_time = self.stats.trace_in(kind, payload)
+
+        if kind == 'kline':
+            candles = self.candles
+            if candles.apply_kline(data):
+                self._publish_traced('kline', candles, event_time)
+                if data.closed:
+                    BinanceAPI.store.append(data.symbol, data.interval, [data.row()], closed=True)
+            if candles.needs_backfill:
+                self._backfill_gap()
+        elif kind == 'ticker':
+            self._publish_traced('ticker', data, event_time)
+        elif kind == 'depth':
+            book = self.order_book
+            if book.apply_diff(data):
+                self.heatmap.sample(book, data.event_time)
+                self._publish_traced('depth', book, event_time)
+        elif kind == 'aggTrade':
+            self.tracer.observe('exchange', kind, data.event_time - data.trade_time)
+            if data.symbol == self.pair:
+                self.trade_flow.add(data.trade_time, data.price, data.qty, data.is_buyer_maker)
+            self._publish_traced('aggTrade', data, event_time)
+        self.stats.trace_out(kind, payload, event_time)
@@ -0,0 +1,158 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import deque
+from itertools import accumulate
+from config import ORDERBOOK_RESYNC_DELAY, ORDERBOOK_RESYNC_MAX_DELAY, ORDERBOOK_RESYNC_ATTEMPTS
+
+
+class BookSide:
+    def __init__(self, descending):
+        self.descending = descending
+        self.keys = array('d')
+        self.qtys = array('d')
+
+    def clear(self):
+        del self.keys[:]
+        del self.qtys[:]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, price, qty):
+        key = -price if self.descending else price
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            if qty == 0:
+                del self.keys[i]
+                del self.qtys[i]
+            else:
+                self.qtys[i] = qty
+        elif qty != 0:
+            self.keys.insert(i, key)
+            self.qtys.insert(i, qty)
+
+    def best(self):
+        if not self.keys:
+            return None
+        return -self.keys[0] if self.descending else self.keys[0]
+
+    def top(self, n):
+        sign = -1.0 if self.descending else 1.0
+        return [(sign * k, q) for k, q in zip(self.keys[:n], self.qtys[:n])]
+
+    def cumulative(self, n):
+        return list(accumulate(self.qtys[:n]))
+
+
+class OrderBook:
+    def __init__(self, symbol, snapshot_fn, retry_delay=ORDERBOOK_RESYNC_DELAY, max_delay=ORDERBOOK_RESYNC_MAX_DELAY,
+                 max_attempts=ORDERBOOK_RESYNC_ATTEMPTS):
+        # snapshot_fn(symbol, callback) requests a REST snapshot and later
+        # calls callback with it ({} on failure).
+        self.symbol = symbol.upper()
+        self.snapshot_fn = snapshot_fn
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.last_update_id = None
+        self.pending = deque(maxlen=2000)
+        self.snapshot_pending = False
+        self.attempts = 0
+        self.next_snapshot_at = 0.0
+        self.synced_at = 0.0
+        self.lock = threading.Lock()
+
+    def apply_diff(self, event):
+        if event.symbol != self.symbol:
+            return False
+        with self.lock:
+            if self.last_update_id is None:
+                self.pending.append(event)
+                applied = False
+            else:
+                applied = self._apply(event)
+                if applied and self.attempts and time.monotonic() - self.synced_at > self.max_delay:
+                    self.attempts = 0
+            request = self.last_update_id is None and self._claim_snapshot()
+        # Requested outside the lock; the callback takes it again.
+        if request:
+            self.snapshot_fn(self.symbol, self._load_snapshot)
+        return applied
+
+    def top(self, n):
+        with self.lock:
+            return self.bids.top(n), self.asks.top(n)
+
+    def cumulative(self, n):
+        with self.lock:
+            return self.bids.cumulative(n), self.asks.cumulative(n)
+
+    def depth(self, n):
+        # Raw copies of the first n keys/qtys per side (bid keys are negated).
+        with self.lock:
+            return self.bids.keys[:n], self.bids.qtys[:n], self.asks.keys[:n], self.asks.qtys[:n]
+
+    def _apply(self, event):
+        if event.last_id <= self.last_update_id:
+            return False
+        if event.first_id > self.last_update_id + 1:
+            print(f"OrderBook gap on {self.symbol}, resyncing")
+            self._reset()
+            self.pending.append(event)
+            return False
+
+        for p, q in event.bids:
+            self.bids.update(p, q)
+        for p, q in event.asks:
+            self.asks.update(p, q)
+        self.last_update_id = event.last_id
+        return True
+
+    def _reset(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+
+    def _claim_snapshot(self):
+        # Resyncs back off exponentially and give up after max_attempts, so a
+        # snapshot that keeps lagging the stream can't drain the REST budget.
+        # The counter only resets once the book has stayed in sync a while.
+        if self.snapshot_pending or self.snapshot_fn is None or self.attempts >= self.max_attempts:
+            return False
+        now = time.monotonic()
+        if now < self.next_snapshot_at:
+            return False
+        self.snapshot_pending = True
+        self.next_snapshot_at = now + min(self.retry_delay * 2 ** self.attempts, self.max_delay)
+        self.attempts += 1
+        return True
+
+    def _load_snapshot(self, snap):
+        with self.lock:
+            self.snapshot_pending = False
+            if snap and 'lastUpdateId' in snap:
+                self._load(snap)
+            if self.last_update_id is not None:
+                self.synced_at = time.monotonic()
+            elif self.attempts >= self.max_attempts:
+                print(f"OrderBook {self.symbol}: resync failed {self.attempts} times, giving up")
+
+    def _load(self, snap):
+        self._reset()
+        for p, q in snap['bids']:
+            self.bids.update(float(p), float(q))
+        for p, q in snap['asks']:
+            self.asks.update(float(p), float(q))
+        self.last_update_id = snap['lastUpdateId']
+
+        pending = list(self.pending)
+        self.pending.clear()
+        for event in pending:
+            if self.last_update_id is None:
+                self.pending.append(event)
+            else:
+                self._apply(event)
@@ -0,0 +1,88 @@
+import threading
+from array import array
+
+
+class PriceTable:
+    def __init__(self, symbols=(), track_all=False):
+        self.track_all = track_all
+        self.index = {}
+        self.symbols = []
+        self.last = array('d')
+        self.change = array('d')
+        self.volume = array('d')
+        self.event_time = array('q')
+        self.listeners = {}
+        self.lock = threading.Lock()
+        for sym in symbols:
+            self.slot(sym)
+
+    def slot(self, symbol):
+        i = self.index.get(symbol)
+        if i is None:
+            with self.lock:
+                i = self.index.get(symbol)
+                if i is None:
+                    i = len(self.symbols)
+                    self.symbols.append(symbol)
+                    self.last.append(0.0)
+                    self.change.append(0.0)
+                    self.volume.append(0.0)
+                    self.event_time.append(0)
+                    self.index[symbol] = i
+        return i
+
+    def subscribe(self, symbol, callback):
+        # Listener lists are replaced, never mutated, so the ingest thread can
+        # iterate whichever tuple it read without holding the lock.
+        self.slot(symbol)
+        with self.lock:
+            self.listeners[symbol] = self.listeners.get(symbol, ()) + (callback,)
+        return lambda: self.unsubscribe(symbol, callback)
+
+    def unsubscribe(self, symbol, callback):
+        with self.lock:
+            callbacks = list(self.listeners.get(symbol, ()))
+            if callback in callbacks:
+                callbacks.remove(callback)
+                self.listeners[symbol] = tuple(callbacks)
+
+    def get(self, symbol):
+        i = self.index.get(symbol)
+        if i is None:
+            return None
+        return self.last[i], self.change[i], self.volume[i]
+
+    def streams(self, symbols):
+        return [f"{s.lower()}@miniTicker" for s in symbols]
+
+    def apply_mini_ticker(self, d):
+        symbol = d.symbol
+        i = self.index.get(symbol)
+        if i is None:
+            if not self.track_all:
+                return False
+            i = self.slot(symbol)
+
+        last = d.close
+        open_price = d.open
+        change = (last - open_price) / open_price * 100 if open_price else 0.0
+        # Every column is written, but listeners only hear about ticks that
+        # move the price or change%; volume alone ticks on every trade.
+        shown = last != self.last[i] or change != self.change[i] or not self.event_time[i]
+        self.last[i] = last
+        self.change[i] = change
+        self.volume[i] = d.quote_volume
+        self.event_time[i] = d.event_time
+        if not shown:
+            return False
+
+        for callback in self.listeners.get(symbol, ()):
+            callback(symbol)
+        return True
+
+    def apply_many(self, items):
+        changed = 0
+        for d in items:
+            if self.apply_mini_ticker(d):
+                changed += 1
+        return changed
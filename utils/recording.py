@@ -0,0 +1,237 @@
+import os
+import glob
+import gzip
+import json
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
+from config import RECORD_SEGMENT_BYTES, RECORD_FLUSH_SECONDS, CANDLE_CACHE_MAX_BYTES, CANDLE_CACHE_MAX_ROWS
+from utils.binance_api import BinanceAPI, BinanceStream
+from utils.candle_store import CandleStore
+from utils.decoders import MessageDecoder
+from utils.http_client import HttpClient
+
+
+FRAME_WS = 0
+FRAME_REST = 1
+HEADER = struct.Struct('<dBI')
+TIME_PARAMS = ('startTime', 'endTime')
+
+
+def segment_paths(path):
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.seg.gz")))
+    return [path]
+
+
+def read_frames(path):
+    for seg in segment_paths(path):
+        with gzip.open(seg, 'rb') as f:
+            while True:
+                try:
+                    head = f.read(HEADER.size)
+                    if len(head) < HEADER.size:
+                        break
+                    t, kind, length = HEADER.unpack(head)
+                    body = f.read(length)
+                except (EOFError, zlib.error, gzip.BadGzipFile):
+                    break
+                if len(body) < length:
+                    break
+                yield t, kind, body
+
+
+class Recorder:
+    def __init__(self, path, segment_bytes=RECORD_SEGMENT_BYTES, flush_every=RECORD_FLUSH_SECONDS):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+        self.file = None
+        self.segments = 0
+        self.written = 0
+        self.last_flush = 0.0
+        self.counts = {'ws': 0, 'rest': 0, 'bytes': 0}
+
+    def record_ws(self, message):
+        if isinstance(message, str):
+            message = message.encode()
+        self._write(FRAME_WS, message)
+        self.counts['ws'] += 1
+
+    def record_rest(self, url, params, text):
+        self._write(FRAME_REST, json.dumps({'url': url, 'params': params, 'body': text}).encode())
+        self.counts['rest'] += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def _write(self, kind, body):
+        t = time.time()
+        with self.lock:
+            if self.file is None or self.written >= self.segment_bytes:
+                self._rotate()
+            self.file.write(HEADER.pack(t, kind, len(body)))
+            self.file.write(body)
+            self.written += HEADER.size + len(body)
+            self.counts['bytes'] += HEADER.size + len(body)
+            if t - self.last_flush >= self.flush_every:
+                self.file.flush()
+                self.last_flush = t
+
+    def _rotate(self):
+        if self.file is not None:
+            self.file.close()
+        self.segments += 1
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.segments:03d}.seg.gz"
+        self.file = gzip.open(os.path.join(self.path, name), 'ab')
+        self.written = 0
+
+
+def _param_key(params, drop=()):
+    return tuple(sorted((k, str(v)) for k, v in (params or {}).items() if k not in drop))
+
+
+class ReplayHttp(HttpClient):
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.exact = {}
+        self.relaxed = {}
+        self.misses = 0
+        for _, kind, body in read_frames(path):
+            if kind != FRAME_REST:
+                continue
+            rec = json.loads(body)
+            for table, key in ((self.exact, _param_key(rec['params'])),
+                               (self.relaxed, _param_key(rec['params'], TIME_PARAMS))):
+                table.setdefault((rec['url'], key), deque()).append(rec['body'])
+
+    def get_json(self, url, params=None, timeout=None, priority=None):
+        # Time-relative parameters differ between runs, so fall back to a match
+        # that ignores them. Repeated requests walk through the recorded answers.
+        for table, key in ((self.exact, _param_key(params)),
+                           (self.relaxed, _param_key(params, TIME_PARAMS))):
+            bodies = table.get((url, key))
+            if bodies:
+                body = bodies.popleft() if len(bodies) > 1 else bodies[0]
+                return json.loads(body)
+        self.misses += 1
+        raise LookupError(f"No recorded response for {url} {params}")
+
+
+class ReplaySource:
+    def __init__(self, path, speed=1.0, decoder=None, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.decoder = decoder or MessageDecoder()
+        self.thread = None
+        self.is_running = False
+        self.wake = threading.Event()
+        self.finished = threading.Event()
+
+        self.lock = threading.Lock()
+        self.callbacks = {}
+        self.stats = {'messages': 0, 'dropped_stale': 0, 'reconnects': 0}
+        self.scratch = None
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.wake.clear()
+        self.finished.clear()
+        self.thread = threading.Thread(target=self._play, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        self.wake.set()
+
+    def subscribe(self, streams, callback):
+        self.replace([], streams, callback)
+
+    def unsubscribe(self, streams, callback):
+        self.replace(streams, [], callback)
+
+    def replace(self, old_streams, new_streams, callback):
+        with self.lock:
+            for s in old_streams:
+                if s in new_streams:
+                    continue
+                callbacks = [cb for cb in self.callbacks.get(s, []) if cb != callback]
+                if callbacks:
+                    self.callbacks[s] = callbacks
+                else:
+                    self.callbacks.pop(s, None)
+            for s in new_streams:
+                callbacks = self.callbacks.get(s, [])
+                if callback not in callbacks:
+                    self.callbacks[s] = callbacks + [callback]
+
+    def _play(self):
+        try:
+            while self.is_running:
+                self._play_once()
+                if not self.loop:
+                    break
+        finally:
+            self.finished.set()
+
+    def _play_once(self):
+        t0 = wall0 = None
+        for t, kind, body in read_frames(self.path):
+            if not self.is_running:
+                return
+            if kind != FRAME_WS:
+                continue
+            if t0 is None:
+                t0, wall0 = t, time.monotonic()
+            elif self.speed > 0:
+                delay = (t - t0) / self.speed - (time.monotonic() - wall0)
+                if delay > 0 and self.wake.wait(delay):
+                    return
+            self._dispatch(body)
+
+    def _dispatch(self, body):
+        recv = time.time() * 1000
+        try:
+            data = self.decoder.decode(body)
+            stream = data.get('stream')
+            if stream is None:
+                return
+            data['recv'] = recv
+            data['decoded'] = time.time() * 1000
+            self.stats['messages'] += 1
+            callbacks = self.callbacks.get(stream)
+            if not callbacks:
+                self.stats['dropped_stale'] += 1
+                return
+            for callback in callbacks:
+                callback(data)
+        except Exception as e:
+            print(f"Replay Decode Error: {e}")
+
+
+def start_recording(path):
+    recorder = Recorder(path)
+    BinanceAPI.http.recorder = recorder
+    return recorder, BinanceStream(recorder=recorder)
+
+
+def start_replay(path, speed=1.0, loop=False):
+    # A replay must not see (or write into) the user's on-disk candle cache:
+    # it would paint from whatever happens to be cached and derive different
+    # startTime params from run to run.
+    source = ReplaySource(path, speed, loop=loop)
+    source.scratch = tempfile.TemporaryDirectory(prefix="replay-candles-")
+    BinanceAPI.http = ReplayHttp(path)
+    BinanceAPI.store = CandleStore(source.scratch.name, CANDLE_CACHE_MAX_BYTES, CANDLE_CACHE_MAX_ROWS)
+    return source
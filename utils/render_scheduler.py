@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import deque
+
+
+class RenderScheduler:
+    def __init__(self, root, fps, tracer=None, budget_ms=None):
+        self.root = root
+        self.tracer = tracer
+        self.frame_ms = max(1, int(1000 / fps))
+        self.budget_ms = budget_ms
+        self.is_running = False
+        self.lock = threading.Lock()
+
+        self.handlers = {}
+        self.modes = {}
+        self.maxlens = {}
+        self.latest = {}
+        self.appended = {}
+
+        self.order = []
+        self.cursor = 0
+        self.frames = 0
+        self.counters = {}
+
+    def register(self, key, handler, append=False, maxlen=None):
+        if key not in self.handlers:
+            self.order.append(key)
+        self.handlers[key] = handler
+        self.modes[key] = append
+        self.maxlens[key] = maxlen
+        self.counters[key] = {'received': 0, 'coalesced': 0, 'dropped': 0, 'rendered': 0, 'deferred': 0}
+
+    def push(self, key, payload):
+        with self.lock:
+            counter = self.counters[key]
+            counter['received'] += 1
+            if self.modes[key]:
+                buf = self.appended.get(key)
+                if buf is None:
+                    buf = self.appended[key] = deque(maxlen=self.maxlens[key])
+                elif buf.maxlen is not None and len(buf) == buf.maxlen:
+                    counter['dropped'] += 1
+                buf.append(payload)
+            else:
+                if key in self.latest:
+                    counter['coalesced'] += 1
+                self.latest[key] = payload
+
+    def discard(self):
+        with self.lock:
+            self.latest.clear()
+            self.appended.clear()
+        if self.tracer is not None:
+            self.tracer.discard()
+
+    def stats(self):
+        with self.lock:
+            return {'frames': self.frames,
+                    'streams': {k: dict(v) for k, v in self.counters.items()}}
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.root.after(self.frame_ms, self._frame)
+
+    def stop(self):
+        self.is_running = False
+
+    def _frame(self):
+        if not self.is_running:
+            return
+        t0 = time.perf_counter()
+
+        with self.lock:
+            latest, self.latest = self.latest, {}
+            appended, self.appended = self.appended, {}
+            self.frames += 1
+
+        if self.budget_ms is None:
+            for key, payload in latest.items():
+                self._render(key, payload)
+            for key, items in appended.items():
+                self._render(key, list(items))
+        else:
+            self._render_within_budget(latest, appended, t0)
+
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        self.root.after(max(1, int(self.frame_ms - elapsed_ms)), self._frame)
+
+    def _render_within_budget(self, latest, appended, t0):
+        # Keys are visited round-robin from where the last frame ran out of
+        # time, so with many panes every one still gets its turn. Whatever is
+        # left over goes back in the queue for the next frame.
+        n = len(self.order)
+        keys = [self.order[(self.cursor + i) % n] for i in range(n)]
+        keys = [k for k in keys if k in latest or k in appended]
+        for i, key in enumerate(keys):
+            if i and (time.perf_counter() - t0) * 1000 >= self.budget_ms:
+                self._defer(keys[i:], latest, appended)
+                self.cursor = self.order.index(key)
+                return
+            if key in latest:
+                self._render(key, latest[key])
+            else:
+                self._render(key, list(appended[key]))
+
+    def _defer(self, keys, latest, appended):
+        with self.lock:
+            for key in keys:
+                self.counters[key]['deferred'] += 1
+                if key in latest:
+                    # A newer push since the swap supersedes the deferred one.
+                    self.latest.setdefault(key, latest[key])
+                else:
+                    buf = self.appended.get(key)
+                    if buf is None:
+                        self.appended[key] = appended[key]
+                    else:
+                        old = appended[key]
+                        old.extend(buf)
+                        self.appended[key] = old
+
+    def _render(self, key, payload):
+        try:
+            started = time.time() * 1000
+            self.handlers[key](payload)
+            self.counters[key]['rendered'] += 1
+            if self.tracer is not None:
+                self.tracer.painted(key, started, time.time() * 1000)
+        except Exception as e:
+            print(f"Render Error ({key}): {e}")
@@ -0,0 +1,79 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+
+HEADER_BYTES = 64
+
+
+class ShmRing:
+    # Single-producer ring of fixed-size records in shared memory. The header
+    # holds the next sequence number; each record carries its own sequence so
+    # a reader can tell when the writer lapped it mid-copy.
+    def __init__(self, dtype, capacity, name=None):
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        self.owner = name is None
+        size = HEADER_BYTES + capacity * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.head = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self.records = np.ndarray((capacity,), dtype=self.dtype, buffer=self.shm.buf, offset=HEADER_BYTES)
+        if self.owner:
+            self.head[0] = 0
+            self.records['seq'] = -1
+        self.read_seq = int(self.head[0])
+        self.overruns = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def claim(self):
+        seq = int(self.head[0])
+        rec = self.records[seq % self.capacity]
+        rec['seq'] = -1
+        return rec
+
+    def put(self, values):
+        i = int(self.head[0]) % self.capacity
+        self.records['seq'][i] = -1
+        self.records[i] = values
+        self.commit()
+
+    def commit(self):
+        seq = int(self.head[0])
+        self.records['seq'][seq % self.capacity] = seq
+        self.head[0] = seq + 1
+
+    def read(self):
+        head = int(self.head[0])
+        seq = self.read_seq
+        if head - seq > self.capacity:
+            self.overruns += head - seq - self.capacity
+            seq = head - self.capacity
+        if seq >= head:
+            return None
+
+        start, stop = seq % self.capacity, (head - 1) % self.capacity + 1
+        if start < stop:
+            batch = self.records[start:stop].copy()
+            live = self.records['seq'][start:stop]
+        else:
+            batch = np.concatenate((self.records[start:], self.records[:stop]))
+            live = np.concatenate((self.records['seq'][start:], self.records['seq'][:stop]))
+        self.read_seq = head
+
+        # The writer clears a slot's sequence before touching its fields, so a
+        # record is intact only if its sequence still matches after the copy.
+        expected = np.arange(seq, head)
+        valid = (batch['seq'] == expected) & (live == expected)
+        if not valid.all():
+            self.overruns += int((~valid).sum())
+            batch = batch[valid]
+        return batch
+
+    def close(self):
+        self.head = None
+        self.records = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
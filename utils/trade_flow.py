@@ -0,0 +1,117 @@
+import threading
+import time
+from array import array
+from collections import deque
+
+
+class TradeWindow:
+    def __init__(self, label, span_ms):
+        self.label = label
+        self.span_ms = span_ms
+        self.tail = 0
+        self.count = 0
+        self.pv = 0.0
+        self.volume = 0.0
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+        self.largest = deque()
+
+    def add(self, flow, seq):
+        i = seq % flow.capacity
+        q = flow.qty[i]
+        self.count += 1
+        self.pv += flow.price[i] * q
+        self.volume += q
+        if flow.is_sell[i]:
+            self.sell_volume += q
+        else:
+            self.buy_volume += q
+        while self.largest and flow.qty[self.largest[-1] % flow.capacity] <= q:
+            self.largest.pop()
+        self.largest.append(seq)
+
+    def expire(self, flow, now_ms):
+        cutoff = now_ms - self.span_ms
+        while self.tail < flow.seq and flow.times[self.tail % flow.capacity] <= cutoff:
+            self.evict(flow)
+
+    def evict(self, flow):
+        i = self.tail % flow.capacity
+        q = flow.qty[i]
+        self.count -= 1
+        self.pv -= flow.price[i] * q
+        self.volume -= q
+        if flow.is_sell[i]:
+            self.sell_volume -= q
+        else:
+            self.buy_volume -= q
+        if self.largest and self.largest[0] == self.tail:
+            self.largest.popleft()
+        self.tail += 1
+        if self.count == 0:
+            self.pv = self.volume = self.buy_volume = self.sell_volume = 0.0
+
+    def snapshot(self, flow):
+        vwap = self.pv / self.volume if self.volume > 0 else 0.0
+        if self.largest:
+            i = self.largest[0] % flow.capacity
+            largest = (flow.price[i], flow.qty[i], bool(flow.is_sell[i]))
+        else:
+            largest = None
+        return {'count': self.count, 'vwap': vwap, 'buy_volume': self.buy_volume,
+                'sell_volume': self.sell_volume, 'largest': largest}
+
+
+class TradeFlow:
+    def __init__(self, capacity, windows):
+        self.capacity = capacity
+        self.times = array('q', bytes(8 * capacity))
+        self.price = array('d', bytes(8 * capacity))
+        self.qty = array('d', bytes(8 * capacity))
+        self.is_sell = array('b', bytes(capacity))
+        self.seq = 0
+        self.offset = None
+        self.windows = [TradeWindow(label, span) for label, span in windows]
+        self.lock = threading.Lock()
+
+    def add(self, trade_time, price, qty, is_sell):
+        with self.lock:
+            seq = self.seq
+            if seq >= self.capacity:
+                overwritten = seq - self.capacity
+                for w in self.windows:
+                    if w.tail <= overwritten:
+                        w.evict(self)
+
+            i = seq % self.capacity
+            self.times[i] = trade_time
+            self.price[i] = price
+            self.qty[i] = qty
+            self.is_sell[i] = is_sell
+            self.seq = seq + 1
+            # Windows hold exchange trade times, so they are expired against
+            # the exchange clock as seen from here, not the local wall clock.
+            self.offset = trade_time - time.time() * 1000
+
+            for w in self.windows:
+                w.add(self, seq)
+                w.expire(self, trade_time)
+
+    def recent(self, n):
+        with self.lock:
+            out = []
+            for seq in range(self.seq - 1, max(self.seq - min(n, self.capacity), 0) - 1, -1):
+                i = seq % self.capacity
+                out.append((self.times[i], self.price[i], self.qty[i], bool(self.is_sell[i])))
+            return out
+
+    def stats(self, now_ms=None):
+        with self.lock:
+            if now_ms is None and self.offset is not None:
+                now_ms = time.time() * 1000 + self.offset
+            result = {}
+            for w in self.windows:
+                if now_ms is not None:
+                    w.expire(self, now_ms)
+                result[w.label] = w.snapshot(self)
+            return result
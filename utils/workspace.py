@@ -0,0 +1,251 @@
+import itertools
+import threading
+from config import *
+from utils.binance_api import BinanceAPI, BinanceStream
+from utils.http_client import PRIORITY_BACKGROUND
+from utils.candle_buffer import CandleBuffer
+from utils.kline_cache import KlineCache
+from utils.latency import LatencyTracer
+from utils.liquidity_heatmap import LiquidityHeatmap
+from utils.market_engine import EngineStats
+from utils.order_book import OrderBook
+
+
+PANE_TOPICS = ('kline', 'ticker', 'depth')
+
+
+class PairFeed:
+    # Per-symbol state shared by every pane showing that symbol.
+    def __init__(self, pair):
+        self.pair = pair
+        self.order_book = OrderBook(pair, BinanceAPI.fetch_depth_snapshot)
+        self.heatmap = LiquidityHeatmap(pair, HEATMAP_PRICE_BUCKETS, HEATMAP_TIME_BUCKETS, HEATMAP_BUCKET_MS,
+                                        HEATMAP_STEP_BPS, HEATMAP_LEVELS, HEATMAP_SAMPLE_MS)
+        self.ticker = None
+
+    def streams(self):
+        symbol = self.pair.lower()
+        return [f"{symbol}@ticker", f"{symbol}@depth@100ms"]
+
+
+class Pane:
+    def __init__(self, pane_id, pair, interval):
+        self.id = pane_id
+        self.pair = pair
+        self.interval = interval
+        self.feed = None
+        self.candles = None
+
+    def key(self, topic):
+        # Render/latency key for this pane's copy of a topic.
+        return f"{topic}:{self.id}"
+
+    def shows(self, topic, payload):
+        return payload is (self.candles if topic == 'kline' else self.feed)
+
+
+class Workspace:
+    # One stream connection and one candle cache behind any number of panes.
+    # Pair feeds and candle buffers are reference counted by the panes that
+    # show them: the first pane subscribes their streams, the last one to
+    # leave unsubscribes them.
+    def __init__(self, stream=None):
+        self.is_running = False
+        self.lock = threading.Lock()
+        self.listeners = {topic: [] for topic in PANE_TOPICS}
+        self.tracer = LatencyTracer(LATENCY_BUCKETS_MS, LATENCY_SAMPLES)
+        self.stats = EngineStats(self.tracer)
+        self.kline_cache = KlineCache(self._load_series, KLINE_LRU_MAX_ROWS, KLINE_LRU_TTL)
+
+        self.ids = itertools.count()
+        self.panes = {}
+        self.feeds = {}
+        self.series = {}
+        self.refs = {}
+
+        self.stream = stream or BinanceStream()
+
+    def subscribe(self, topic, callback):
+        with self.lock:
+            self.listeners[topic] = self.listeners[topic] + [callback]
+
+    def publish(self, topic, payload, event_time=None):
+        # One event can reach several panes; each pane's render key is marked
+        # so the tracer follows it to that pane's paint.
+        if event_time:
+            with self.lock:
+                panes = list(self.panes.values())
+            for pane in panes:
+                if pane.shows(topic, payload):
+                    self.tracer.mark(pane.key(topic), event_time)
+        self.stats.record_publish(topic)
+        for callback in self.listeners[topic]:
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"Workspace Listener Error ({topic}): {e}")
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.stream.start()
+
+    def stop(self):
+        self.is_running = False
+        self.stream.stop()
+
+    def open_pane(self, pair, interval):
+        pane = Pane(next(self.ids), pair, interval)
+        with self.lock:
+            self.panes[pane.id] = pane
+            added, fresh = self._hold(pane)
+        self.stream.replace([], added, self.handle_stream_data)
+        if fresh:
+            self._fetch_series(pane.candles)
+        return pane
+
+    def close_pane(self, pane):
+        with self.lock:
+            if self.panes.pop(pane.id, None) is None:
+                return
+            removed = self._drop(pane)
+        self.stream.replace(removed, [], self.handle_stream_data)
+
+    def set_pair(self, pane, pair):
+        self._retarget(pane, pair, pane.interval)
+
+    def set_interval(self, pane, interval):
+        self._retarget(pane, pane.pair, interval)
+
+    def load_history(self, key, end_time, callback):
+        def worker():
+            rows = BinanceAPI.get_kline_history(key[0], key[1], end_time, HISTORY_PAGES_PER_LOAD)
+            if self.is_running:
+                callback(rows)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def snapshot(self):
+        with self.lock:
+            panes = {p.id: f"{p.pair} {p.interval}" for p in self.panes.values()}
+            streams = dict(self.refs)
+        return {
+            'panes': panes,
+            'feeds': len(self.feeds),
+            'series': len(self.series),
+            'streams': streams,
+            'engine': self.stats.snapshot(),
+            'socket': dict(self.stream.stats),
+            'kline_cache': self.kline_cache.stats(),
+            'rest': BinanceAPI.http.stats(),
+        }
+
+    def _retarget(self, pane, pair, interval):
+        with self.lock:
+            if pane.id not in self.panes:
+                return
+            # Take the new holds before releasing the old ones so a feed or
+            # stream this pane keeps using is never torn down in between.
+            old = Pane(pane.id, pane.pair, pane.interval)
+            old.feed, old.candles = pane.feed, pane.candles
+            pane.pair, pane.interval = pair, interval
+            added, fresh = self._hold(pane)
+            removed = self._drop(old)
+        self.stream.replace(removed, added, self.handle_stream_data)
+        if fresh:
+            self._fetch_series(pane.candles)
+        else:
+            self.publish('kline', pane.candles)
+
+    def _hold(self, pane):
+        # Called with the lock held; returns streams that gained their first
+        # holder and whether the candle buffer was just created.
+        key = (pane.pair, pane.interval)
+        added, fresh = [], False
+        if pane.pair not in self.feeds:
+            self.feeds[pane.pair] = PairFeed(pane.pair)
+        if key not in self.series:
+            self.series[key] = CandleBuffer(*key)
+            fresh = True
+        pane.feed = self.feeds[pane.pair]
+        pane.candles = self.series[key]
+        for s in pane.feed.streams() + [f"{pane.pair.lower()}@kline_{pane.interval}"]:
+            self.refs[s] = self.refs.get(s, 0) + 1
+            if self.refs[s] == 1:
+                added.append(s)
+        return added, fresh
+
+    def _drop(self, pane):
+        removed = []
+        for s in pane.feed.streams() + [f"{pane.pair.lower()}@kline_{pane.interval}"]:
+            self.refs[s] -= 1
+            if not self.refs[s]:
+                del self.refs[s]
+                removed.append(s)
+        if not any(p.pair == pane.pair for p in self.panes.values() if p is not pane):
+            self.feeds.pop(pane.pair, None)
+        key = (pane.pair, pane.interval)
+        if not any((p.pair, p.interval) == key for p in self.panes.values() if p is not pane):
+            candles = self.series.pop(key, None)
+            if candles is not None:
+                self.kline_cache.put(key, candles.snapshot())
+        return removed
+
+    def _is_live(self, candles):
+        return self.series.get((candles.pair, candles.interval)) is candles
+
+    def _load_series(self, key, callback):
+        BinanceAPI.fetch_kline_rows(key[0], key[1], callback, tag=None, priority=PRIORITY_BACKGROUND)
+
+    def _fetch_series(self, candles):
+        key = (candles.pair, candles.interval)
+        rows, fresh = self.kline_cache.get(key)
+        if rows is None:
+            rows = BinanceAPI.get_cached_kline_rows(*key)
+        self._apply_backfill(candles, rows)
+        if not fresh:
+            self._backfill_gap(candles)
+
+    def _backfill_gap(self, candles):
+        # No shared tag here: cancelling by tag would cut off other panes' fetches.
+        candles.needs_backfill = False
+        BinanceAPI.fetch_kline_rows(
+            candles.pair, candles.interval, lambda rows: self._apply_backfill(candles, rows),
+            tag=None, current=lambda: self._is_live(candles))
+
+    def _apply_backfill(self, candles, rows):
+        if not rows or not self._is_live(candles):
+            return
+        candles.load(rows)
+        self.kline_cache.put((candles.pair, candles.interval), candles.snapshot())
+        self.publish('kline', candles)
+
+    def handle_stream_data(self, payload):
+        if not payload or 'data' not in payload:
+            return
+        kind = payload['kind']
+        data = payload['data']
+        event_time = self.stats.trace_in(kind, payload)
+
+        if kind == 'kline':
+            candles = self.series.get((data.symbol, data.interval))
+            if candles is not None:
+                if candles.apply_kline(data):
+                    self.publish('kline', candles, event_time)
+                    if data.closed:
+                        BinanceAPI.store.append(data.symbol, data.interval, [data.row()], closed=True)
+                if candles.needs_backfill:
+                    self._backfill_gap(candles)
+        else:
+            feed = self.feeds.get(data.symbol)
+            if feed is None:
+                pass
+            elif kind == 'ticker':
+                feed.ticker = data
+                self.publish('ticker', feed, event_time)
+            elif kind == 'depth':
+                if feed.order_book.apply_diff(data):
+                    feed.heatmap.sample(feed.order_book, data.event_time)
+                    self.publish('depth', feed, event_time)
+        self.stats.trace_out(kind, payload, event_time)